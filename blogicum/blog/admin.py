@@ -1,6 +1,13 @@
 from django.contrib import admin
+from django.db.models import ImageField, Q
 
-from .models import Box, Order, Review, ServiceType
+from .forms import BoundedImageField
+from .models import (
+    Box, DailyRevenue, MediaBlob, Order, RatingSummary, Review, ServiceType,
+    Task
+)
+from .plates import normalize_plate, plate_prefix_q
+from .search import search_filter, search_terms
 
 
 @admin.register(ServiceType)
@@ -9,6 +16,7 @@ class ServiceTypeAdmin(admin.ModelAdmin):
         'title',
         'description',
         'price',
+        'duration',
         'slug',
         'is_published',
         'created_at'
@@ -38,11 +46,48 @@ class OrderAdmin(admin.ModelAdmin):
         'status',
         'price',
         'discount',
+        'final_price',
         'is_published',
         'created_at'
     )
     list_filter = ('status', 'is_published', 'service_type', 'box')
     search_fields = ('car_model', 'car_number', 'client__username')
+    formfield_overrides = {ImageField: {'form_class': BoundedImageField}}
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_final_price()
+
+    def get_search_results(self, request, queryset, search_term):
+        """Искать по полнотекстовому индексу, а не LIKE '%x%' по таблице.
+
+        Начало логина клиента и номер в любом написании
+        (см. blog.plates) ищутся по своим индексам.
+        """
+        terms = search_terms(search_term)
+        if not terms:
+            return queryset, False
+        condition = (
+            search_filter(terms, queryset.db)
+            | Q(client__username__istartswith=search_term.strip())
+        )
+        plate = normalize_plate(search_term)
+        if plate:
+            condition |= plate_prefix_q(plate)
+        return queryset.filter(condition), False
+
+    @admin.display(description='Итоговая цена', ordering='final_price')
+    def final_price(self, order):
+        return order.final_price
+
+    def changelist_view(self, request, extra_context=None):
+        """Итог по отфильтрованным записям считается в базе."""
+        response = super().changelist_view(request, extra_context)
+        changelist = getattr(response, 'context_data', {}).get('cl')
+        if changelist is not None:
+            response.context_data['final_price_total'] = (
+                changelist.queryset.final_price_total()
+            )
+        return response
 
 
 @admin.register(Review)
@@ -54,3 +99,53 @@ class ReviewAdmin(admin.ModelAdmin):
         'author',
         'created_at'
     )
+
+
+@admin.register(MediaBlob)
+class MediaBlobAdmin(admin.ModelAdmin):
+    list_display = ('name', 'ref_count', 'widths', 'replaced_by', 'created_at')
+    search_fields = ('name', 'replaced_by')
+
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = (
+        'name',
+        'status',
+        'attempts',
+        'run_after',
+        'started_at',
+        'finished_at',
+        'created_at'
+    )
+    list_filter = ('status', 'name')
+
+
+@admin.register(DailyRevenue)
+class DailyRevenueAdmin(admin.ModelAdmin):
+    list_display = (
+        'day',
+        'service_type',
+        'box',
+        'washer',
+        'orders',
+        'gross',
+        'discount',
+        'net'
+    )
+    list_filter = ('service_type', 'box')
+    date_hierarchy = 'day'
+
+
+@admin.register(RatingSummary)
+class RatingSummaryAdmin(admin.ModelAdmin):
+    list_display = (
+        '__str__',
+        'count',
+        'rating_5',
+        'rating_4',
+        'rating_3',
+        'rating_2',
+        'rating_1'
+    )
+    list_select_related = ('service_type', 'box', 'washer')
@@ -0,0 +1,140 @@
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import Box, Order, ServiceType
+
+OPENING_HOUR = 8
+CLOSING_HOUR = 22
+SLOT_STEP_MINUTES = 30
+DEFAULT_DURATION_MINUTES = 60
+
+
+def day_bounds(day):
+    """Начало и конец рабочего дня в текущем часовом поясе."""
+    tz = timezone.get_current_timezone()
+    opening = getattr(settings, 'BLOG_OPENING_HOUR', OPENING_HOUR)
+    closing = getattr(settings, 'BLOG_CLOSING_HOUR', CLOSING_HOUR)
+    return (
+        timezone.make_aware(datetime.combine(day, time(opening)), tz),
+        timezone.make_aware(datetime.combine(day, time(closing)), tz),
+    )
+
+
+def service_duration(service_type):
+    if service_type is None:
+        return timedelta(minutes=DEFAULT_DURATION_MINUTES)
+    return timedelta(minutes=service_type.duration)
+
+
+class BoxSchedule:
+    """Интервалы занятости одного бокса, отсортированные по границам.
+
+    Машина занимает бокс на [начало, конец). Число машин в боксе в момент
+    point — это число начал не позже point минус число концов не позже
+    point; оба считаются двоичным поиском.
+    """
+
+    def __init__(self, box):
+        self.box = box
+        self.starts = []
+        self.ends = []
+
+    def add(self, start, end):
+        insort(self.starts, start)
+        insort(self.ends, end)
+
+    def load_at(self, point):
+        started = bisect_right(self.starts, point)
+        return started - bisect_right(self.ends, point)
+
+    def peak_load(self, start, end):
+        """Наибольшее число машин в боксе на отрезке [start, end)."""
+        points = [start]
+        points += self.starts[
+            bisect_right(self.starts, start):bisect_left(self.starts, end)
+        ]
+        return max(self.load_at(point) for point in points)
+
+    def has_room(self, start, end):
+        return self.peak_load(start, end) < self.box.capacity
+
+
+def load_schedules(boxes, window_start, window_end, exclude_order_id=None,
+                   using=None):
+    """Собрать BoxSchedule по записям, пересекающим окно времени.
+
+    using задаёт базу явно: проверка внутри транзакции записи
+    должна читать ту же базу, а не реплику.
+    """
+    schedules = {box.pk: BoxSchedule(box) for box in boxes}
+    longest = ServiceType.objects.db_manager(using).aggregate(
+        longest=Max('duration')
+    )['longest'] or DEFAULT_DURATION_MINUTES
+    orders = Order.objects.db_manager(using).filter(
+        box_id__in=schedules,
+        is_published=True,
+        appointment_date__gt=window_start - timedelta(minutes=longest),
+        appointment_date__lt=window_end,
+    ).exclude(
+        status='cancelled'
+    ).select_related('service_type').only(
+        'box_id', 'appointment_date', 'service_type__duration'
+    )
+    if exclude_order_id is not None:
+        orders = orders.exclude(pk=exclude_order_id)
+    for order in orders:
+        schedules[order.box_id].add(
+            order.appointment_date,
+            order.appointment_date + service_duration(order.service_type)
+        )
+    return schedules
+
+
+class DayAvailability:
+    """Расписание всех доступных боксов на один день.
+
+    Строится одним запросом к записям дня; после этого ответы
+    на «свободно ли» и «какие слоты свободны» не ходят в базу.
+    """
+
+    def __init__(self, day, exclude_order_id=None):
+        self.day = day
+        self.opening, self.closing = day_bounds(day)
+        boxes = Box.objects.filter(is_published=True).order_by('pk')
+        self.schedules = load_schedules(
+            boxes, self.opening, self.closing, exclude_order_id
+        )
+
+    def free_slots(self, service_type):
+        """Список (время начала, [свободные боксы]) для услуги на день."""
+        duration = service_duration(service_type)
+        step = timedelta(minutes=getattr(
+            settings, 'BLOG_SLOT_STEP_MINUTES', SLOT_STEP_MINUTES
+        ))
+        now = timezone.now()
+        slots = []
+        start = self.opening
+        while start + duration <= self.closing:
+            if start >= now:
+                boxes = [
+                    schedule.box for schedule in self.schedules.values()
+                    if schedule.has_room(start, start + duration)
+                ]
+                if boxes:
+                    slots.append((start, boxes))
+            start += step
+        return slots
+
+
+def box_has_room(box, start, service_type=None, exclude_order_id=None,
+                 using=None):
+    """Проверить, поместится ли ещё одна машина в бокс на это время."""
+    end = start + service_duration(service_type)
+    schedule = load_schedules(
+        [box], start, end, exclude_order_id, using
+    )[box.pk]
+    return schedule.has_room(start, end)
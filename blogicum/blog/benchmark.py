@@ -0,0 +1,292 @@
+import random
+import re
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.test import Client
+from django.utils import timezone
+
+from .metrics import percentiles
+from .models import Box, Order, Review, ServiceType
+
+User = get_user_model()
+
+SIZES = {'10k': 10_000, '100k': 100_000, '1m': 1_000_000}
+BATCH_SIZE = 5000
+BOXES = 20
+SERVICE_TYPES = 10
+ORDERS_PER_USER = 20
+MAX_REVIEWS_PER_ORDER = 3
+PUBLISHED_SHARE = 0.95
+FUTURE_SHARE = 0.05
+HISTORY_DAYS = 730
+SAMPLE_SIZE = 1000
+PASSWORD = 'benchmark'
+
+SERVER_TIMING_RE = re.compile(r'db;dur=([\d.]+);desc="(\d+) queries"')
+
+
+def dataset_counts(orders):
+    return {
+        'orders': orders,
+        'users': max(orders // ORDERS_PER_USER, 10),
+        'boxes': BOXES,
+        'service_types': SERVICE_TYPES,
+    }
+
+
+def next_pk(model):
+    return (model.objects.order_by('-pk').values_list(
+        'pk', flat=True
+    ).first() or 0) + 1
+
+
+def reset_sequences(*models):
+    """Сдвинуть автоинкремент за явно вставленные id (как loaddata)."""
+    statements = connection.ops.sequence_reset_sql(no_style(), models)
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+def batches(count, size):
+    for start in range(0, count, size):
+        yield start, min(start + size, count)
+
+
+@transaction.atomic
+def seed_dataset(orders, batch_size=BATCH_SIZE, seed=0):
+    """Заполнить базу синтетическими данными через bulk_create.
+
+    id задаются явно, поэтому отзывы ссылаются на записи без чтения
+    id обратно, а счётчики отзывов у записей сразу верные. Сигналы
+    при bulk_create не срабатывают, кэши после заполнения чистятся.
+    Возвращает число созданных строк по таблицам.
+    """
+    rng = random.Random(seed)
+    counts = dataset_counts(orders)
+    now = timezone.now()
+    password = make_password(PASSWORD)
+
+    first_service = next_pk(ServiceType)
+    ServiceType.objects.bulk_create(
+        ServiceType(
+            pk=first_service + i,
+            title=f'Услуга {i + 1}',
+            description='Синтетическая услуга для нагрузочного теста.',
+            price=Decimal(500 + 250 * i),
+            duration=30 * (1 + i % 4),
+            slug=f'bench-service-{first_service + i}',
+        )
+        for i in range(counts['service_types'])
+    )
+    first_box = next_pk(Box)
+    Box.objects.bulk_create(
+        Box(pk=first_box + i, name=f'Бокс {i + 1}', capacity=2)
+        for i in range(counts['boxes'])
+    )
+    first_user = next_pk(User)
+    for start, end in batches(counts['users'], batch_size):
+        User.objects.bulk_create(
+            User(
+                pk=first_user + i,
+                username=f'bench{first_user + i}',
+                email=f'bench{first_user + i}@example.com',
+                password=password,
+            )
+            for i in range(start, end)
+        )
+    services = range(first_service, first_service + counts['service_types'])
+    boxes = range(first_box, first_box + counts['boxes'])
+    users = range(first_user, first_user + counts['users'])
+
+    first_order = next_pk(Order)
+    reviews_created = 0
+    for start, end in batches(orders, batch_size):
+        order_batch = []
+        review_batch = []
+        for i in range(start, end):
+            pk = first_order + i
+            if rng.random() < FUTURE_SHARE:
+                minutes = -rng.randrange(60, 60 * 24 * 30)
+            else:
+                minutes = rng.randrange(60 * 24 * HISTORY_DAYS)
+            ratings = [
+                rng.randint(1, 5)
+                for _ in range(rng.randint(0, MAX_REVIEWS_PER_ORDER))
+            ]
+            order_batch.append(Order(
+                pk=pk,
+                car_model=rng.choice(('Lada', 'Kia', 'Skoda', 'BMW')),
+                car_number=f'A{pk % 1000:03d}BC{pk % 90 + 10}',
+                plate_normalized=f'A{pk % 1000:03d}BC{pk % 90 + 10}',
+                description='Синтетическая запись. ' * rng.randint(1, 20),
+                appointment_date=now - timedelta(minutes=minutes),
+                client_id=rng.choice(users),
+                box_id=rng.choice(boxes),
+                service_type_id=rng.choice(services),
+                price=Decimal(rng.randrange(500, 5000)),
+                status=rng.choice(('pending', 'completed')),
+                is_published=rng.random() < PUBLISHED_SHARE,
+                review_count=len(ratings),
+                rating_sum=sum(ratings),
+            ))
+            review_batch.extend(
+                Review(
+                    text='Всё отлично.',
+                    rating=rating,
+                    order_id=pk,
+                    author_id=rng.choice(users),
+                )
+                for rating in ratings
+            )
+        Order.objects.bulk_create(order_batch)
+        Review.objects.bulk_create(review_batch, batch_size=batch_size)
+        reviews_created += len(review_batch)
+    reset_sequences(ServiceType, Box, User, Order)
+    transaction.on_commit(cache.clear)
+    return {**counts, 'reviews': reviews_created}
+
+
+def request_targets(seed=0):
+    """Выборка slug, пользователей и записей, по которым идут запросы."""
+    rng = random.Random(seed)
+    published = list(Order.objects.published().values_list(
+        'pk', flat=True
+    )[:SAMPLE_SIZE * 10])
+    usernames = list(User.objects.filter(
+        username__startswith='bench'
+    ).values_list('username', flat=True)[:SAMPLE_SIZE])
+    return {
+        'slugs': list(ServiceType.objects.filter(
+            is_published=True
+        ).values_list('slug', flat=True)),
+        'boxes': list(Box.objects.filter(
+            is_published=True
+        ).values_list('pk', flat=True)),
+        'usernames': usernames,
+        'orders': rng.sample(published, min(len(published), SAMPLE_SIZE)),
+        'user': User.objects.get(username=usernames[0]),
+    }
+
+
+def view_requests(targets):
+    """Функции (client, i) -> response для измеряемых представлений."""
+    latest = Order.objects.aggregate(
+        latest=Max('appointment_date')
+    )['latest'] or timezone.now()
+    first_slot = timezone.localtime(
+        max(latest, timezone.now()) + timedelta(days=1)
+    )
+    service = ServiceType.objects.get(slug=targets['slugs'][0])
+
+    def create_post(client, i):
+        appointment = first_slot + timedelta(hours=3 * i)
+        return client.post('/posts/create/', {
+            'car_model': 'Lada',
+            'car_number': 'A123BC77',
+            'appointment_date': appointment.strftime('%Y-%m-%d %H:%M:%S'),
+            'box': targets['boxes'][i % len(targets['boxes'])],
+            'service_type': service.pk,
+        })
+
+    return {
+        'index': lambda client, i: client.get(
+            '/', {'page': 1 + i % 5}
+        ),
+        'category_posts': lambda client, i: client.get(
+            f'/category/{targets["slugs"][i % len(targets["slugs"])]}/'
+        ),
+        'profile': lambda client, i: client.get(
+            f'/profile/'
+            f'{targets["usernames"][i % len(targets["usernames"])]}/'
+        ),
+        'post_detail': lambda client, i: client.get(
+            f'/posts/{targets["orders"][i % len(targets["orders"])]}/'
+        ),
+        'create_post': create_post,
+    }
+
+
+def measure(client, make_request, requests, warmup):
+    """Прогнать запросы и собрать задержки и число SQL-запросов.
+
+    Число запросов и время в базе берутся из Server-Timing, который
+    ставит QueryTimingMiddleware, чтобы не замерять дважды.
+    """
+    for i in range(warmup):
+        make_request(client, i)
+    latencies = []
+    queries = []
+    sql_ms = []
+    errors = 0
+    started = time.perf_counter()
+    for i in range(warmup, warmup + requests):
+        request_started = time.perf_counter()
+        response = make_request(client, i)
+        latencies.append((time.perf_counter() - request_started) * 1000)
+        if response.status_code >= 400:
+            errors += 1
+        match = SERVER_TIMING_RE.search(response.get('Server-Timing', ''))
+        if match:
+            sql_ms.append(float(match.group(1)))
+            queries.append(int(match.group(2)))
+    elapsed = time.perf_counter() - started
+    return {
+        'requests': requests,
+        'errors': errors,
+        'rps': round(requests / elapsed, 2),
+        'latency_ms': {
+            'mean': round(sum(latencies) / len(latencies), 3),
+            **{
+                key: round(value, 3)
+                for key, value in percentiles(latencies).items()
+            },
+            'max': round(max(latencies), 3),
+        },
+        'sql_ms': percentiles(sql_ms) if sql_ms else {},
+        'queries': percentiles(queries) if queries else {},
+    }
+
+
+def run_benchmark(views=None, requests=200, warmup=20):
+    """Замерить представления от имени залогиненного клиента.
+
+    Залогиненный клиент обходит кэш страниц целиком, поэтому меряется
+    настоящая работа представления; кэш чистится перед каждым.
+    """
+    targets = request_targets()
+    makers = view_requests(targets)
+    client = Client()
+    client.force_login(targets['user'])
+    results = {}
+    for name in views or makers:
+        cache.clear()
+        results[name] = measure(client, makers[name], requests, warmup)
+    return results
+
+
+def compare_results(previous, current):
+    """Строки «вид: было -> стало (изменение)» для p50, p95 и rps."""
+    lines = []
+    for name, now in current['views'].items():
+        before = previous.get('views', {}).get(name)
+        if before is None:
+            continue
+        for label, old, new in (
+            ('p50', before['latency_ms']['p50'], now['latency_ms']['p50']),
+            ('p95', before['latency_ms']['p95'], now['latency_ms']['p95']),
+            ('rps', before['rps'], now['rps']),
+        ):
+            change = (new - old) / old * 100 if old else 0
+            lines.append(
+                f'{name} {label}: {old} -> {new} ({change:+.1f}%)'
+            )
+    return lines
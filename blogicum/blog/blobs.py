@@ -0,0 +1,115 @@
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import F, Q
+
+from .images import (
+    delete_variants, generate_variants, overwrite, strip_metadata
+)
+from .models import MediaBlob, Order
+from .storage import is_content_name
+
+
+def retain(name):
+    """Учесть ещё одну ссылку на файл и вернуть его MediaBlob."""
+    blob, created = MediaBlob.objects.get_or_create(
+        name=name, defaults={'ref_count': 1}
+    )
+    if not created:
+        MediaBlob.objects.filter(pk=blob.pk).update(
+            ref_count=F('ref_count') + 1
+        )
+    return blob
+
+
+def replacement(name):
+    """Имя очищенной копии, которой заменён файл, или None."""
+    return MediaBlob.objects.filter(name=name).exclude(
+        replaced_by=''
+    ).values_list('replaced_by', flat=True).first()
+
+
+def release(storage, name):
+    """Снять ссылку на файл; без ссылок он удалится после коммита."""
+    MediaBlob.objects.filter(name=name).update(ref_count=F('ref_count') - 1)
+    transaction.on_commit(lambda: free_unreferenced(storage, [name]))
+
+
+def free_unreferenced(storage, names):
+    """Удалить файлы без ссылок вместе с их уменьшенными копиями.
+
+    Строка блокируется и удаляется в транзакции, файлы — после неё:
+    если кто-то успел снова сослаться на файл, счётчик уже не ноль
+    и строка не попадёт в выборку.
+    """
+    with transaction.atomic():
+        blobs = list(MediaBlob.objects.select_for_update().filter(
+            name__in=names, ref_count__lte=0, replaced_by=''
+        ))
+        freed = [blob.name for blob in blobs]
+        MediaBlob.objects.filter(
+            Q(pk__in=[blob.pk for blob in blobs]) | Q(replaced_by__in=freed)
+        ).delete()
+    for blob in blobs:
+        storage.delete(blob.name)
+        delete_variants(storage, blob.name, blob.widths)
+    return blobs
+
+
+def replace_blob(storage, blob, data):
+    """Сохранить очищенные байты под их хэшем и перевесить ссылки.
+
+    Старая строка MediaBlob остаётся псевдонимом: повторная загрузка
+    того же оригинала сразу получит очищенную копию. Файл оригинала
+    с метаданными удаляется после коммита.
+    """
+    name = storage.save(blob.name, ContentFile(data))
+    if name == blob.name:
+        return blob
+    target, _ = MediaBlob.objects.get_or_create(name=name)
+    MediaBlob.objects.filter(pk=target.pk).update(
+        ref_count=F('ref_count') + blob.ref_count
+    )
+    MediaBlob.objects.filter(pk=blob.pk).update(
+        ref_count=0, replaced_by=name
+    )
+    Order.objects.filter(car_image=blob.name).update(car_image=name)
+    old_name = blob.name
+    transaction.on_commit(lambda: storage.delete(old_name))
+    return MediaBlob.objects.select_for_update().get(pk=target.pk)
+
+
+def prepare_blob(field_file):
+    """Очистить фото и создать копии один раз на файл, а не на запись.
+
+    Очищенные байты получают своё имя по хэшу (см. replace_blob),
+    так что имя файла всегда совпадает с его содержимым. Повторно
+    пережимать уже очищенный JPEG нельзя — каждый проход теряет
+    качество, поэтому готовые ширины берутся из MediaBlob. Файлы без
+    MediaBlob (ещё не перенесённые dedup_car_images) очищаются на месте.
+    Возвращает итоговое имя файла и ширины копий.
+    """
+    storage = field_file.storage
+    with transaction.atomic():
+        blob = MediaBlob.objects.select_for_update().filter(
+            name=field_file.name
+        ).first()
+        if blob is not None and blob.replaced_by:
+            blob = MediaBlob.objects.select_for_update().get(
+                name=blob.replaced_by
+            )
+        if blob is not None and blob.widths:
+            return blob.name, blob.widths
+        data = strip_metadata(field_file)
+        if data is not None:
+            if blob is not None and is_content_name(blob.name):
+                blob = replace_blob(storage, blob, data)
+            else:
+                overwrite(storage, field_file.name, data)
+        if blob is not None:
+            field_file.name = blob.name
+        if blob is not None and blob.widths:
+            return blob.name, blob.widths
+        widths = generate_variants(field_file)
+        if blob is not None:
+            MediaBlob.objects.filter(pk=blob.pk).update(widths=widths)
+    return field_file.name, widths
@@ -0,0 +1,97 @@
+import random
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import OperationalError, connections, router, transaction
+from django.utils import timezone
+
+from .availability import (
+    SLOT_STEP_MINUTES, box_has_room, service_duration
+)
+from .models import BoxSlot, Order
+
+MAX_ATTEMPTS = 5
+RETRY_DELAY = 0.02
+MAX_RETRY_DELAY = 0.5
+
+RETRYABLE_SQLSTATES = ('40001', '40P01')
+
+
+class SlotUnavailable(Exception):
+    """В боксе не осталось места на выбранное время."""
+
+
+def slot_starts(start, end):
+    """Начала всех слотов сетки, которые пересекает отрезок [start, end)."""
+    step = timedelta(minutes=getattr(
+        settings, 'BLOG_SLOT_STEP_MINUTES', SLOT_STEP_MINUTES
+    ))
+    start = start.astimezone(timezone.utc)
+    midnight = start.replace(hour=0, minute=0, second=0, microsecond=0)
+    current = midnight + step * ((start - midnight) // step)
+    while current < end:
+        yield current
+        current += step
+
+
+def lock_box_slots(box, start, end, using):
+    """Заблокировать строки слотов бокса до конца текущей транзакции.
+
+    Две пересекающиеся по времени записи всегда делят хотя бы один слот,
+    поэтому они выполняются строго по очереди. Строки блокируются
+    в порядке start, чтобы параллельные записи не ждали друг друга
+    по кругу. SQLite не умеет SELECT ... FOR UPDATE: там первым
+    в транзакции выполняется UPDATE, который берёт блокировку
+    записи на всю базу.
+    """
+    starts = list(slot_starts(start, end))
+    BoxSlot.objects.using(using).bulk_create(
+        [BoxSlot(box=box, start=slot) for slot in starts],
+        ignore_conflicts=True
+    )
+    slots = BoxSlot.objects.using(using).filter(box=box, start__in=starts)
+    if connections[using].features.has_select_for_update:
+        list(slots.select_for_update().order_by('start').values_list('pk'))
+    slots.update(locked_at=timezone.now())
+
+
+def is_retryable(error):
+    """Блокировка SQLite или ошибка сериализации/дедлок PostgreSQL."""
+    cause = error.__cause__
+    if getattr(cause, 'pgcode', None) in RETRYABLE_SQLSTATES:
+        return True
+    return 'locked' in str(error)
+
+
+def place_order(order):
+    """Сохранить запись, если в боксе есть место, без гонок.
+
+    Проверка вместимости и сохранение выполняются в одной транзакции
+    под блокировкой слотов бокса. Конфликты блокировок повторяются
+    с небольшой случайной задержкой.
+    """
+    using = router.db_for_write(Order, instance=order)
+    attempts = getattr(settings, 'BLOG_BOOKING_ATTEMPTS', MAX_ATTEMPTS)
+    for attempt in range(1, attempts + 1):
+        try:
+            with transaction.atomic(using=using):
+                if order.box_id is not None:
+                    start = order.appointment_date
+                    end = start + service_duration(order.service_type)
+                    lock_box_slots(order.box, start, end, using)
+                    if not box_has_room(
+                        order.box,
+                        start,
+                        service_type=order.service_type,
+                        exclude_order_id=order.pk,
+                        using=using
+                    ):
+                        raise SlotUnavailable
+                order.save(using=using)
+                return order
+        except OperationalError as error:
+            if attempt == attempts or not is_retryable(error):
+                raise
+            delay = min(RETRY_DELAY * 2 ** attempt, MAX_RETRY_DELAY)
+            time.sleep(delay * random.random())
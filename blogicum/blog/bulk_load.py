@@ -0,0 +1,193 @@
+import bz2
+import gzip
+import json
+import lzma
+import re
+import time
+
+from django.core import serializers
+from django.core.management.color import no_style
+from django.db import connections, transaction
+
+from .page_cache import ALL_FEEDS, purge_pages
+
+BATCH_SIZE = 1000
+CHUNK_SIZE = 1024 * 1024
+SEPARATORS_RE = re.compile(r'[\s,]*')
+
+OPENERS = {
+    '.gz': gzip.open,
+    '.bz2': bz2.open,
+    '.xz': lzma.open,
+    '.lzma': lzma.open,
+}
+
+
+def open_dump(path):
+    for extension, opener in OPENERS.items():
+        if path.endswith(extension):
+            return opener(path, 'rt', encoding='utf-8')
+    return open(path, encoding='utf-8')
+
+
+def iter_json_array(stream, chunk_size=CHUNK_SIZE):
+    """Объекты JSON-массива по одному; файл целиком в память не читается.
+
+    В буфере держится только недочитанный хвост: объект разбирается
+    raw_decode, а если он оборван на границе куска, дочитывается
+    следующий кусок и разбор повторяется.
+    """
+    decoder = json.JSONDecoder()
+    buffer = stream.read(chunk_size).lstrip()
+    if not buffer.startswith('['):
+        raise ValueError('Ожидался JSON-массив объектов.')
+    position = 1
+    eof = False
+    while True:
+        position = SEPARATORS_RE.match(buffer, position).end()
+        if position < len(buffer) and buffer[position] == ']':
+            return
+        try:
+            if position == len(buffer):
+                raise json.JSONDecodeError('', buffer, position)
+            item, position = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if eof:
+                raise ValueError('Файл оборван: массив не закрыт.')
+            chunk = stream.read(chunk_size)
+            eof = not chunk
+            buffer = buffer[position:] + chunk
+            position = 0
+            continue
+        yield item
+
+
+class BulkLoader:
+    """Вставка десериализованных объектов пачками по моделям.
+
+    Строки пишутся тем же INSERT, что и bulk_create, но с raw=True,
+    как у loaddata: auto_now поля сохраняют значения из дампа,
+    а сигналы не отправляются. Объекты без id или с id, который уже
+    есть в базе, сохраняются по-старому через save(), чтобы поведение
+    совпадало с loaddata и на непустой базе.
+    """
+
+    def __init__(self, using, batch_size=BATCH_SIZE):
+        self.using = using
+        self.batch_size = batch_size
+        self.pending = {}
+        self.models = set()
+        self.rows = 0
+
+    def add(self, deserialized):
+        model = type(deserialized.object)
+        self.models.add(model)
+        batch = self.pending.setdefault(model, [])
+        batch.append(deserialized)
+        if len(batch) >= self.batch_size:
+            self.flush(model)
+
+    def flush_all(self):
+        for model in list(self.pending):
+            self.flush(model)
+
+    def flush(self, model):
+        batch = self.pending.pop(model, [])
+        if not batch:
+            return
+        manager = model._base_manager.db_manager(self.using)
+        existing = set(manager.filter(
+            pk__in=[item.object.pk for item in batch]
+        ).values_list('pk', flat=True))
+        new = []
+        for item in batch:
+            if item.object.pk is None or item.object.pk in existing:
+                item.save(using=self.using)
+            else:
+                new.append(item)
+        if new:
+            self.insert(manager, [item.object for item in new])
+            self.insert_m2m(model, new)
+        self.rows += len(batch)
+
+    def insert(self, manager, objects):
+        """INSERT пачками, которые база примет за один запрос.
+
+        SQLite ограничивает число параметров и строк в одном INSERT,
+        поэтому пачка режется так же, как в bulk_create.
+        """
+        fields = manager.model._meta.local_concrete_fields
+        size = connections[self.using].ops.bulk_batch_size(fields, objects)
+        size = max(min(size, self.batch_size), 1)
+        for start in range(0, len(objects), size):
+            manager._insert(
+                objects[start:start + size],
+                fields=fields,
+                raw=True,
+                using=self.using,
+            )
+
+    def insert_m2m(self, model, items):
+        for field in model._meta.many_to_many:
+            through = field.remote_field.through
+            if not through._meta.auto_created:
+                continue
+            rows = [
+                through(**{
+                    field.m2m_field_name() + '_id': item.object.pk,
+                    field.m2m_reverse_field_name() + '_id': target,
+                })
+                for item in items
+                for target in item.m2m_data.get(field.name, [])
+            ]
+            through._base_manager.db_manager(self.using).bulk_create(
+                rows, batch_size=self.batch_size
+            )
+
+
+def bulk_load(
+        path, using='default', batch_size=BATCH_SIZE, exclude=(),
+        ignorenonexistent=False, progress=None):
+    """Загрузить дамп dumpdata в одной транзакции и вернуть статистику.
+
+    Проверки внешних ключей отложены до конца загрузки, как в loaddata,
+    поэтому порядок моделей в дампе не важен.
+    """
+    connection = connections[using]
+    loader = BulkLoader(using, batch_size)
+    started = time.perf_counter()
+    with open_dump(path) as stream, transaction.atomic(using=using):
+        with connection.constraint_checks_disabled():
+            exclude = {label.lower() for label in exclude}
+            objects = (
+                item for item in iter_json_array(stream)
+                if item.get('model', '').lower() not in exclude
+                and item.get('model', '').split('.')[0] not in exclude
+            )
+            for count, deserialized in enumerate(serializers.deserialize(
+                'python',
+                objects,
+                using=using,
+                ignorenonexistent=ignorenonexistent,
+            ), start=1):
+                loader.add(deserialized)
+                if progress and not count % batch_size:
+                    progress(count, time.perf_counter() - started)
+            loader.flush_all()
+        connection.check_constraints(
+            table_names=[model._meta.db_table for model in loader.models]
+        )
+        statements = connection.ops.sequence_reset_sql(
+            no_style(), list(loader.models)
+        )
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+    purge_pages(ALL_FEEDS)
+    seconds = time.perf_counter() - started
+    return {
+        'rows': loader.rows,
+        'models': len(loader.models),
+        'seconds': seconds,
+        'rows_per_second': loader.rows / seconds if seconds else 0,
+    }
@@ -0,0 +1,124 @@
+import csv
+import json
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .models import Order
+
+CHUNK_SIZE = 2000
+FORMATS = ('csv', 'jsonl')
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+}
+COLUMNS = (
+    ('id', 'id'),
+    ('appointment_date', 'appointment_date'),
+    ('status', 'status'),
+    ('client', 'client__username'),
+    ('service', 'service_type__title'),
+    ('box', 'box__name'),
+    ('price', 'price'),
+    ('discount', 'discount'),
+    ('final_price', 'final_price'),
+    ('created_at', 'created_at'),
+)
+STATUSES = {value for value, _ in Order.STATUS_CHOICES}
+
+
+class ExportError(ValueError):
+    """Неверные параметры выгрузки."""
+
+
+def parse_day(value, name):
+    if not value:
+        return None
+    try:
+        day = parse_date(value)
+    except ValueError:
+        day = None
+    if day is None:
+        raise ExportError(f'{name}: укажите дату в формате ГГГГ-ММ-ДД.')
+    return day
+
+
+def start_of_day(day):
+    return timezone.make_aware(
+        datetime.combine(day, time.min), timezone.get_current_timezone()
+    )
+
+
+def export_queryset(date_from=None, date_to=None, statuses=()):
+    """Записи для выгрузки: даты записи включительно, любой из статусов."""
+    date_from = parse_day(date_from, 'date_from')
+    date_to = parse_day(date_to, 'date_to')
+    unknown = set(statuses) - STATUSES
+    if unknown:
+        raise ExportError(f'Неизвестный статус: {", ".join(sorted(unknown))}.')
+    orders = Order.objects.all()
+    if date_from:
+        orders = orders.filter(appointment_date__gte=start_of_day(date_from))
+    if date_to:
+        orders = orders.filter(
+            appointment_date__lt=start_of_day(date_to + timedelta(days=1))
+        )
+    if statuses:
+        orders = orders.filter(status__in=statuses)
+    return orders.with_final_price().order_by('appointment_date', 'id')
+
+
+def export_rows(queryset, chunk_size=CHUNK_SIZE):
+    """Строки выгрузки кортежами, без создания объектов моделей.
+
+    iterator() читает результат кусками (на PostgreSQL — серверным
+    курсором), поэтому память не зависит от числа записей.
+    """
+    return queryset.values_list(
+        *(lookup for _, lookup in COLUMNS)
+    ).iterator(chunk_size=chunk_size)
+
+
+class Echo:
+    """Файлоподобный объект для csv.writer: write() отдаёт строку назад."""
+
+    def write(self, value):
+        return value
+
+
+def format_value(value):
+    if isinstance(value, datetime):
+        return timezone.localtime(value).isoformat()
+    if value is None:
+        return ''
+    return str(value)
+
+
+def csv_lines(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow([name for name, _ in COLUMNS])
+    for row in rows:
+        yield writer.writerow([format_value(value) for value in row])
+
+
+def json_value(value):
+    """Деньги — строкой, чтобы не терять копейки на float."""
+    if value is None or isinstance(value, (int, str)):
+        return value
+    return format_value(value)
+
+
+def jsonl_lines(rows):
+    names = [name for name, _ in COLUMNS]
+    for row in rows:
+        yield json.dumps(
+            {name: json_value(value) for name, value in zip(names, row)},
+            ensure_ascii=False
+        ) + '\n'
+
+
+def export_lines(export_format, rows):
+    if export_format not in FORMATS:
+        raise ExportError(f'Формат выгрузки: {" или ".join(FORMATS)}.')
+    return csv_lines(rows) if export_format == 'csv' else jsonl_lines(rows)
@@ -1,11 +1,30 @@
 from django import forms
 from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
 
+from .availability import box_has_room
 from .models import Box, Order, Review, ServiceType
+from .uploads import check_upload
 
 User = get_user_model()
 
 
+class BoundedImageField(forms.ImageField):
+    """ImageField, который сначала проверяет лимиты загрузки.
+
+    Размер, формат и число пикселей проверяются по заголовку, поэтому
+    Pillow не распаковывает изображение, которое всё равно отклонят.
+    """
+
+    def to_python(self, data):
+        if data in self.empty_values:
+            return None
+        error = check_upload(data)
+        if error:
+            raise ValidationError(error, code='invalid_image')
+        return super().to_python(data)
+
+
 class OrderForm(forms.ModelForm):
     class Meta:
         model = Order
@@ -18,6 +37,7 @@ class OrderForm(forms.ModelForm):
             'service_type',
             'car_image'
         )
+        field_classes = {'car_image': BoundedImageField}
         widgets = {
             'appointment_date': forms.DateTimeInput(
                 format='%Y-%m-%d %H:%M:%S',
@@ -34,6 +54,22 @@ class OrderForm(forms.ModelForm):
             is_published=True
         )
 
+    def clean(self):
+        cleaned_data = super().clean()
+        box = cleaned_data.get('box')
+        appointment_date = cleaned_data.get('appointment_date')
+        if box and appointment_date and not box_has_room(
+            box,
+            appointment_date,
+            service_type=cleaned_data.get('service_type'),
+            exclude_order_id=self.instance.pk
+        ):
+            self.add_error(
+                'appointment_date',
+                'В выбранном боксе на это время нет свободных мест.'
+            )
+        return cleaned_data
+
 
 class ReviewForm(forms.ModelForm):
     class Meta:
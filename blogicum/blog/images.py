@@ -0,0 +1,110 @@
+import os
+from io import BytesIO
+
+from django.conf import settings
+from PIL import Image, ImageOps
+
+VARIANT_WIDTHS = (320, 640, 1280)
+VARIANT_FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+
+def variant_widths():
+    return getattr(settings, 'BLOG_IMAGE_WIDTHS', VARIANT_WIDTHS)
+
+
+def variant_name(name, width, extension):
+    """cars/photo.jpg -> cars/photo_640w.webp, рядом с оригиналом."""
+    root, _ = os.path.splitext(name)
+    return f'{root}_{width}w.{extension}'
+
+
+def variant_names(name, widths):
+    return [
+        variant_name(name, width, extension)
+        for width in widths
+        for extension in VARIANT_FORMATS
+    ]
+
+
+def overwrite(storage, name, data):
+    """Записать файл ровно под этим именем.
+
+    save() хранилища по содержимому выбрал бы имя по хэшу, а копии
+    и очищенный оригинал должны остаться там, где их ищут.
+    """
+    with storage.open(name, 'wb') as target:
+        target.write(data)
+
+
+REENCODE_FORMATS = {
+    'JPEG': {'quality': 90, 'optimize': True},
+    'PNG': {'optimize': True},
+    'WEBP': {'quality': 90},
+}
+
+
+def strip_metadata(field_file):
+    """Байты оригинала без EXIF, с уже применённым поворотом.
+
+    В EXIF телефонных фото бывают координаты съёмки, поэтому наружу
+    оригинал не должен уходить с ними. Для форматов, которые нельзя
+    пережать без потерь смысла (например, анимированного GIF),
+    возвращает None.
+    """
+    storage = field_file.storage
+    with storage.open(field_file.name, 'rb') as source:
+        image = Image.open(source)
+        pil_format = image.format
+        if pil_format not in REENCODE_FORMATS:
+            return None
+        image = ImageOps.exif_transpose(image)
+        image.load()
+    if pil_format == 'JPEG':
+        image = image.convert('RGB')
+    buffer = BytesIO()
+    image.save(buffer, pil_format, **REENCODE_FORMATS[pil_format])
+    return buffer.getvalue()
+
+
+def generate_variants(field_file):
+    """Сохранить уменьшенные WebP и JPEG копии фото автомобиля.
+
+    Фото поворачивается по EXIF и пережимается без метаданных. Ширины
+    больше оригинала не создаются, но самая маленькая есть всегда.
+    Возвращает список созданных ширин.
+    """
+    storage = field_file.storage
+    with storage.open(field_file.name, 'rb') as source:
+        image = Image.open(source)
+        image = ImageOps.exif_transpose(image)
+        image = image.convert('RGB')
+    widths = sorted(variant_widths())
+    widths = [w for w in widths if w <= image.width] or widths[:1]
+    for width in widths:
+        resized = image.copy()
+        resized.thumbnail((width, width * 10), Image.LANCZOS)
+        for extension, (pil_format, options) in VARIANT_FORMATS.items():
+            buffer = BytesIO()
+            resized.save(buffer, pil_format, **options)
+            overwrite(
+                storage,
+                variant_name(field_file.name, width, extension),
+                buffer.getvalue()
+            )
+    return widths
+
+
+def delete_variants(storage, name, widths):
+    for variant in variant_names(name, widths):
+        storage.delete(variant)
+
+
+def missing_variants(field_file, widths):
+    storage = field_file.storage
+    return [
+        name for name in variant_names(field_file.name, widths)
+        if not storage.exists(name)
+    ]
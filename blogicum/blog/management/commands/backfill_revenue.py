@@ -0,0 +1,63 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from blog.exports import ExportError, parse_day
+from blog.models import DailyRevenue, Order
+from blog.rollups import COUNTED_STATUS, rebuild_day
+
+
+def stored_days():
+    """Первый и последний день, за которые есть записи или сводки."""
+    orders = Order.objects.filter(status=COUNTED_STATUS).aggregate(
+        first=Min('appointment_date'), last=Max('appointment_date')
+    )
+    rollups = DailyRevenue.objects.aggregate(first=Min('day'), last=Max('day'))
+    days = [
+        timezone.localdate(value) for value in orders.values() if value
+    ] + [value for value in rollups.values() if value]
+    if not days:
+        return None, None
+    return min(days), max(days)
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитать сводки выручки по дням из записей. Каждый день '
+        'пересчитывается в своей транзакции, поэтому прерванный запуск '
+        'можно продолжить с --since.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', help='ГГГГ-ММ-ДД, включительно.')
+        parser.add_argument('--until', help='ГГГГ-ММ-ДД, включительно.')
+
+    def handle(self, *args, since, until, verbosity, **options):
+        try:
+            since = parse_day(since, '--since')
+            until = parse_day(until, '--until')
+        except ExportError as error:
+            raise CommandError(error)
+        first, last = stored_days()
+        since = since or first
+        until = until or last
+        if since is None or until is None:
+            self.stdout.write('Нет записей для пересчёта.')
+            return
+        day = since
+        rows = 0
+        try:
+            while day <= until:
+                rows += rebuild_day(day)
+                if verbosity >= 2:
+                    self.stdout.write(f'{day}: готово')
+                day += timedelta(days=1)
+        except KeyboardInterrupt:
+            raise CommandError(
+                f'Прервано; продолжить: --since {day.isoformat()}'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитаны дни с {since} по {until}: {rows} строк сводки.'
+        ))
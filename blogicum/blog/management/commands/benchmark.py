@@ -0,0 +1,129 @@
+import json
+import platform
+import subprocess
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from blog.benchmark import (
+    BATCH_SIZE, SIZES, compare_results, run_benchmark, seed_dataset
+)
+from blog.models import Order
+
+VIEWS = ('index', 'category_posts', 'profile', 'post_detail', 'create_post')
+
+
+def current_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True, cwd=settings.BASE_DIR
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполнить отдельную базу синтетическими данными и замерить '
+        'скорость представлений; результат пишется в JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--size', choices=SIZES, default='10k',
+            help='Число записей в наборе данных.'
+        )
+        parser.add_argument(
+            '--orders', type=int,
+            help='Точное число записей вместо --size.'
+        )
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--warmup', type=int, default=20)
+        parser.add_argument(
+            '--views', nargs='+', choices=VIEWS, default=list(VIEWS)
+        )
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument(
+            '--output',
+            help='Куда записать JSON (по умолчанию benchmark-<size>.json).'
+        )
+        parser.add_argument(
+            '--compare', help='JSON прошлого прогона для сравнения.'
+        )
+        parser.add_argument(
+            '--keepdb', action='store_true',
+            help='Не удалять базу и не заполнять её повторно.'
+        )
+
+    def handle(self, *args, **options):
+        orders = options['orders'] or SIZES[options['size']]
+        label = options['size'] if not options['orders'] else str(orders)
+        previous = None
+        if options['compare']:
+            try:
+                with open(options['compare'], encoding='utf-8') as source:
+                    previous = json.load(source)
+            except (OSError, ValueError) as error:
+                raise CommandError(f'{options["compare"]}: {error}')
+        test_settings = connection.settings_dict.setdefault('TEST', {})
+        if connection.vendor == 'sqlite' and not test_settings.get('NAME'):
+            test_settings['NAME'] = str(
+                settings.BASE_DIR / f'benchmark-{label}.sqlite3'
+            )
+        with override_settings(
+            DEBUG=False,
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']
+        ):
+            old_name = connection.settings_dict['NAME']
+            connection.creation.create_test_db(
+                verbosity=0, autoclobber=True, keepdb=options['keepdb']
+            )
+            try:
+                result = self.run(orders, label, options)
+            finally:
+                connection.creation.destroy_test_db(
+                    old_name, verbosity=0, keepdb=options['keepdb']
+                )
+        output = options['output'] or f'benchmark-{label}.json'
+        with open(output, 'w', encoding='utf-8') as target:
+            json.dump(result, target, ensure_ascii=False, indent=2)
+        for name, stats in result['views'].items():
+            latency = stats['latency_ms']
+            self.stdout.write(
+                f'{name}: {stats["rps"]} запросов/с, '
+                f'p50 {latency["p50"]} мс, p95 {latency["p95"]} мс, '
+                f'p99 {latency["p99"]} мс, '
+                f'SQL-запросов p50 {stats["queries"].get("p50")}'
+            )
+        if previous is not None:
+            for line in compare_results(previous, result):
+                self.stdout.write(line)
+        self.stdout.write(self.style.SUCCESS(f'Результат записан в {output}.'))
+
+    def run(self, orders, label, options):
+        dataset = None
+        if not (options['keepdb'] and Order.objects.count() >= orders):
+            self.stdout.write(f'Заполнение базы: {orders} записей...')
+            started = timezone.now()
+            dataset = seed_dataset(orders, batch_size=options['batch_size'])
+            seconds = (timezone.now() - started).total_seconds()
+            self.stdout.write(f'Заполнено за {seconds:.1f} с.')
+        return {
+            'commit': current_commit(),
+            'created_at': timezone.now().isoformat(),
+            'size': label,
+            'dataset': dataset or {'orders': Order.objects.count()},
+            'database': connection.vendor,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'requests': options['requests'],
+            'warmup': options['warmup'],
+            'views': run_benchmark(
+                options['views'], options['requests'], options['warmup']
+            ),
+        }
@@ -0,0 +1,67 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.base import DeserializationError
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, IntegrityError
+
+from blog.bulk_load import BATCH_SIZE, bulk_load
+
+
+class Command(BaseCommand):
+    help = (
+        'Быстро загрузить дамп dumpdata (JSON, можно .gz/.bz2/.xz): '
+        'файл читается потоком, строки вставляются пачками '
+        'в одной транзакции.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('fixture', help='Путь к файлу дампа.')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help='Сколько строк одной модели вставлять одним INSERT.'
+        )
+        parser.add_argument(
+            '--database',
+            default=DEFAULT_DB_ALIAS,
+            help='База, в которую загружать дамп.'
+        )
+        parser.add_argument(
+            '-e', '--exclude',
+            action='append',
+            default=[],
+            help='Пропустить приложение или модель (app_label.ModelName).'
+        )
+        parser.add_argument(
+            '-i', '--ignorenonexistent',
+            action='store_true',
+            help='Пропускать поля, которых больше нет в моделях.'
+        )
+
+    def handle(self, *args, fixture, batch_size, database, exclude,
+               ignorenonexistent, verbosity, **options):
+        def progress(rows, seconds):
+            if verbosity >= 2:
+                self.stdout.write(
+                    f'{rows} объектов, {rows / seconds:.0f} строк/с'
+                )
+
+        try:
+            stats = bulk_load(
+                fixture,
+                using=database,
+                batch_size=batch_size,
+                exclude=exclude,
+                ignorenonexistent=ignorenonexistent,
+                progress=progress,
+            )
+        except (
+            OSError, ValueError, DeserializationError, FieldDoesNotExist,
+            IntegrityError, DatabaseError
+        ) as error:
+            raise CommandError(f'{fixture}: {error}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено {stats["rows"]} объектов {stats["models"]} моделей '
+            f'за {stats["seconds"]:.1f} с '
+            f'({stats["rows_per_second"]:.0f} строк/с).'
+        ))
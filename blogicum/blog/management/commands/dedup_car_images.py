@@ -0,0 +1,107 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from django.template.defaultfilters import filesizeformat
+
+from blog.blobs import free_unreferenced
+from blog.images import overwrite, variant_names
+from blog.models import MediaBlob, Order
+from blog.storage import content_digest, content_name, is_content_name
+
+
+class Command(BaseCommand):
+    help = (
+        'Перенести фото автомобилей в хранилище по содержимому, '
+        'удалить дубликаты и пересчитать ссылки на файлы.'
+    )
+
+    def handle(self, *args, **options):
+        storage = Order._meta.get_field('car_image').storage
+        names = Order.objects.exclude(car_image='').values_list(
+            'car_image', flat=True
+        ).distinct()
+        moved = duplicates = freed = 0
+        for name in list(names):
+            if is_content_name(name):
+                continue
+            if not storage.exists(name):
+                self.stderr.write(f'{name}: файла нет в хранилище.')
+                continue
+            with storage.open(name, 'rb') as source:
+                new_name = content_name(name, content_digest(source))
+                duplicate = storage.exists(new_name)
+                if not duplicate:
+                    storage.save(name, source)
+            widths = self.move_variants(storage, name, new_name)
+            Order.objects.filter(car_image=name).update(
+                car_image=new_name, car_image_widths=widths
+            )
+            if duplicate:
+                duplicates += 1
+                freed += storage.size(name)
+            storage.delete(name)
+            moved += 1
+        freed_blobs = self.resync()
+        self.stdout.write(self.style.SUCCESS(
+            f'Перенесено файлов: {moved}, из них дубликатов: {duplicates}, '
+            f'удалено файлов без ссылок: {len(freed_blobs)}, '
+            f'освобождено {filesizeformat(freed)}.'
+        ))
+
+    def move_variants(self, storage, name, new_name):
+        """Перенести копии старого файла к новому или отдать уже готовые."""
+        existing = MediaBlob.objects.filter(name=new_name).first()
+        if existing is not None and existing.widths:
+            widths = existing.widths
+        else:
+            widths = max(
+                Order.objects.filter(car_image=name).values_list(
+                    'car_image_widths', flat=True
+                ),
+                key=len,
+                default=[]
+            )
+        for old, new in zip(
+            variant_names(name, widths), variant_names(new_name, widths)
+        ):
+            if not storage.exists(old):
+                continue
+            if not storage.exists(new):
+                with storage.open(old, 'rb') as source:
+                    overwrite(storage, new, source.read())
+            storage.delete(old)
+        return widths
+
+    def resync(self):
+        """Выставить счётчики ссылок по фактическим записям."""
+        counts = dict(
+            Order.objects.exclude(car_image='').order_by().values(
+                'car_image'
+            ).annotate(total=Count('pk')).values_list('car_image', 'total')
+        )
+        widths = {}
+        for name, order_widths in Order.objects.filter(
+            car_image__in=counts
+        ).values_list('car_image', 'car_image_widths'):
+            if len(order_widths or []) > len(widths.get(name, [])):
+                widths[name] = order_widths
+        with transaction.atomic():
+            for name, total in counts.items():
+                blob, created = MediaBlob.objects.get_or_create(
+                    name=name,
+                    defaults={
+                        'ref_count': total,
+                        'widths': widths.get(name, [])
+                    }
+                )
+                if not created and blob.ref_count != total:
+                    MediaBlob.objects.filter(pk=blob.pk).update(
+                        ref_count=total
+                    )
+            MediaBlob.objects.exclude(name__in=counts).update(ref_count=0)
+        orphans = MediaBlob.objects.filter(ref_count__lte=0).values_list(
+            'name', flat=True
+        )
+        return free_unreferenced(
+            Order._meta.get_field('car_image').storage, list(orphans)
+        )
@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.exports import (
+    CHUNK_SIZE, FORMATS, ExportError, export_lines, export_queryset,
+    export_rows
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгрузить записи с итоговой ценой в CSV или JSONL потоком, '
+        'без загрузки всей таблицы в память.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=FORMATS, default='csv')
+        parser.add_argument(
+            '--output', help='Файл для выгрузки; по умолчанию stdout.'
+        )
+        parser.add_argument('--date-from', help='ГГГГ-ММ-ДД, включительно.')
+        parser.add_argument('--date-to', help='ГГГГ-ММ-ДД, включительно.')
+        parser.add_argument(
+            '--status', action='append', default=[],
+            help='Статус записи; можно указать несколько раз.'
+        )
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            orders = export_queryset(
+                date_from=options['date_from'],
+                date_to=options['date_to'],
+                statuses=options['status'],
+            )
+            lines = export_lines(
+                options['format'],
+                export_rows(orders, chunk_size=options['chunk_size'])
+            )
+        except ExportError as error:
+            raise CommandError(error)
+        if not options['output']:
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+        rows = -1 if options['format'] == 'csv' else 0
+        with open(
+            options['output'], 'w', encoding='utf-8', newline=''
+        ) as target:
+            for line in lines:
+                target.write(line)
+                rows += 1
+        self.stderr.write(f'Выгружено записей: {rows}.')
@@ -0,0 +1,69 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from blog.models import Order, Review
+from blog.ratings import rebuild_summaries
+
+
+def review_counter_values(review_model):
+    """Выражения для пересчёта review_count и rating_sum по отзывам."""
+    reviews = review_model.objects.filter(
+        order=OuterRef('pk')
+    ).order_by().values('order')
+    return {
+        'review_count': Coalesce(
+            Subquery(
+                reviews.annotate(total=Count('pk')).values('total'),
+                output_field=IntegerField()
+            ),
+            0
+        ),
+        'rating_sum': Coalesce(
+            Subquery(
+                reviews.annotate(total=Sum('rating')).values('total'),
+                output_field=IntegerField()
+            ),
+            0
+        ),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитать число отзывов и сумму оценок у записей '
+        'и сводки оценок услуг, боксов и мойщиков.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=10000,
+            help='Сколько записей обновлять в одной транзакции.'
+        )
+
+    def handle(self, *args, batch_size, **options):
+        values = review_counter_values(Review)
+        last_pk = 0
+        updated = 0
+        while True:
+            pks = list(
+                Order.objects.filter(pk__gt=last_pk)
+                .order_by('pk')
+                .values_list('pk', flat=True)[:batch_size]
+            )
+            if not pks:
+                break
+            with transaction.atomic():
+                updated += Order.objects.filter(
+                    pk__gte=pks[0], pk__lte=pks[-1]
+                ).update(**values)
+            last_pk = pks[-1]
+        with transaction.atomic():
+            summaries = rebuild_summaries()
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитаны счётчики отзывов у {updated} записей '
+            f'и {summaries} сводок оценок.'
+        ))
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from blog.images import generate_variants, missing_variants, variant_widths
+from blog.models import MediaBlob, Order
+
+
+class Command(BaseCommand):
+    help = 'Создать недостающие уменьшенные копии фото автомобилей.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Пересоздать копии у всех записей, даже если они есть.'
+        )
+
+    def handle(self, *args, force, **options):
+        orders = Order.objects.exclude(car_image='').only(
+            'pk', 'car_image', 'car_image_widths'
+        )
+        regenerated = failed = 0
+        for order in orders.iterator():
+            expected = order.car_image_widths or variant_widths()
+            if not force and order.car_image_widths and not missing_variants(
+                order.car_image, expected
+            ):
+                continue
+            try:
+                widths = generate_variants(order.car_image)
+            except (OSError, ValueError) as error:
+                failed += 1
+                self.stderr.write(f'{order.car_image.name}: {error}')
+                continue
+            Order.objects.filter(pk=order.pk).update(
+                car_image_widths=widths,
+                updated_at=timezone.now()
+            )
+            MediaBlob.objects.filter(name=order.car_image.name).update(
+                widths=widths
+            )
+            regenerated += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересозданы копии фото у {regenerated} записей, '
+            f'ошибок: {failed}.'
+        ))
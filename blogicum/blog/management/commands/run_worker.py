@@ -0,0 +1,75 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from blog.tasks import claim_tasks, run_task
+from blog.worker import execute, setup_process
+
+
+class Command(BaseCommand):
+    help = 'Выполнять фоновые задачи из очереди в базе данных.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Размер пула процессов; 0 — выполнять в этом процессе.'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Сколько задач забирать за раз (по умолчанию 2 на процесс).'
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=1.0,
+            help='Пауза в секундах, когда очередь пуста.'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Выйти, как только очередь опустеет.'
+        )
+
+    def handle(self, *args, processes, batch_size, sleep, once, **options):
+        batch_size = batch_size or max(processes, 1) * 2
+        pool = None
+        if processes:
+            pool = ProcessPoolExecutor(
+                max_workers=processes,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=setup_process
+            )
+        done = failed = 0
+        try:
+            while True:
+                claimed = claim_tasks(batch_size)
+                if not claimed:
+                    if once:
+                        break
+                    time.sleep(sleep)
+                    continue
+                if pool is None:
+                    results = [run_task(pk) for pk in claimed]
+                else:
+                    connections.close_all()
+                    futures = [pool.submit(execute, pk) for pk in claimed]
+                    wait(futures)
+                    results = [future.result() for future in futures]
+                done += results.count(True)
+                failed += results.count(False)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        self.stdout.write(self.style.SUCCESS(
+            f'Выполнено задач: {done}, с ошибкой: {failed}.'
+        ))
@@ -0,0 +1,114 @@
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from math import ceil
+
+from django.conf import settings
+from django.template.backends.django import DjangoTemplates, Template
+
+BUFFER_SIZE = 5000
+PERCENTILES = (50, 95, 99)
+FIELDS = ('queries', 'sql_ms', 'template_ms', 'total_ms')
+
+current_metrics = ContextVar('current_metrics', default=None)
+
+
+class RequestMetrics:
+    """Счётчики одного запроса, которые копятся по ходу его обработки."""
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_seconds = 0.0
+        self.template_seconds = 0.0
+        self.template_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        """execute_wrapper: считает запросы и время в базе."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.sql_seconds += time.perf_counter() - started
+
+
+class MetricsBuffer:
+    """Кольцевой буфер последних запросов, общий для потоков процесса.
+
+    Старые записи вытесняются новыми, поэтому память не растёт,
+    а перцентили всегда посчитаны по свежему окну.
+    """
+
+    def __init__(self, size):
+        self.lock = threading.Lock()
+        self.records = deque(maxlen=size)
+
+    def add(self, view_name, **values):
+        with self.lock:
+            self.records.append((view_name, values))
+
+    def clear(self):
+        with self.lock:
+            self.records.clear()
+
+    def summary(self):
+        """{view: {'count': n, 'queries': {'p50': …, …}, …}} по окну."""
+        with self.lock:
+            records = list(self.records)
+        by_view = {}
+        for view_name, values in records:
+            by_view.setdefault(view_name, []).append(values)
+        return {
+            view_name: {
+                'count': len(rows),
+                **{
+                    field: percentiles([row[field] for row in rows])
+                    for field in FIELDS
+                },
+            }
+            for view_name, rows in sorted(by_view.items())
+        }
+
+
+def percentiles(values):
+    """Перцентили методом ближайшего ранга."""
+    ordered = sorted(values)
+    return {
+        f'p{rank}': ordered[max(ceil(rank / 100 * len(ordered)), 1) - 1]
+        for rank in PERCENTILES
+    }
+
+
+buffer = MetricsBuffer(
+    getattr(settings, 'BLOG_METRICS_BUFFER_SIZE', BUFFER_SIZE)
+)
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        metrics = current_metrics.get()
+        if metrics is None:
+            return super().render(context, request)
+        metrics.template_depth += 1
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            metrics.template_depth -= 1
+            if not metrics.template_depth:
+                metrics.template_seconds += time.perf_counter() - started
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """Движок DTL, который засекает время рендеринга шаблонов запроса.
+
+    Вложенные render_to_string внутри шаблона не считаются второй раз.
+    """
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return TimedTemplate(template.template, self)
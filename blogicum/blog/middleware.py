@@ -0,0 +1,130 @@
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from .metrics import RequestMetrics, buffer, current_metrics
+from .query_budget import REPEAT_THRESHOLD, capture_queries
+from .routers import (
+    STICKY_COOKIE, STICKY_SECONDS, RequestRoute, choose_replica, current_route,
+    replica_aliases
+)
+
+logger = logging.getLogger('blog.queries')
+
+
+class QueryTimingMiddleware:
+    """Замерять запросы к базе, рендеринг шаблонов и общее время.
+
+    Числа уходят в заголовок Server-Timing и в кольцевой буфер
+    по имени представления, откуда их читает blog:request_metrics.
+    Работает без DEBUG: запросы считает execute_wrapper соединений.
+    Время шаблонов включает SQL ленивых querysets, выполненных из них.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(metrics))
+                response = self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        total = time.perf_counter() - started
+        sql_ms = metrics.sql_seconds * 1000
+        template_ms = metrics.template_seconds * 1000
+        total_ms = total * 1000
+        response['Server-Timing'] = ', '.join((
+            f'db;dur={sql_ms:.1f};desc="{metrics.queries} queries"',
+            f'tpl;dur={template_ms:.1f}',
+            f'total;dur={total_ms:.1f}',
+        ))
+        match = request.resolver_match
+        if match is not None:
+            buffer.add(
+                match.view_name,
+                queries=metrics.queries,
+                sql_ms=round(sql_ms, 2),
+                template_ms=round(template_ms, 2),
+                total_ms=round(total_ms, 2),
+            )
+        return response
+
+
+class RepeatedQueryMiddleware:
+    """В DEBUG писать в лог одинаковые запросы, повторённые за запрос.
+
+    Так N+1 видно при обычной работе с сайтом: в сообщении есть
+    представление, число повторов и строка шаблона, откуда они идут.
+    """
+
+    def __init__(self, get_response):
+        if not settings.DEBUG:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with capture_queries() as log:
+            response = self.get_response(request)
+        threshold = getattr(
+            settings, 'BLOG_REPEATED_QUERY_THRESHOLD', REPEAT_THRESHOLD
+        )
+        match = request.resolver_match
+        view_name = match.view_name if match else request.path
+        for sql, count, origins in log.repeated(threshold):
+            logger.warning(
+                '%s: запрос повторён %d раз (%s): %s',
+                view_name,
+                count,
+                ', '.join(origins) or 'вне шаблона',
+                sql
+            )
+        return response
+
+
+class ReplicaMiddleware:
+    """Направлять чтение представлений из REPLICA_VIEWS на реплику.
+
+    После запроса с записью браузер получает cookie STICKY_COOKIE
+    и на время STICKY_SECONDS (запас на отставание реплик) читает
+    основную базу: пользователь сразу видит свою запись или отзыв.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        route = RequestRoute()
+        token = current_route.set(route)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_route.reset(token)
+        if route.wrote and replica_aliases():
+            response.set_cookie(
+                STICKY_COOKIE,
+                '1',
+                max_age=getattr(
+                    settings, 'BLOG_REPLICA_STICKY_SECONDS', STICKY_SECONDS
+                ),
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        route = current_route.get()
+        match = request.resolver_match
+        if route is not None and match is not None:
+            route.replica = choose_replica(
+                match.view_name, match.namespace, request.COOKIES
+            )
@@ -0,0 +1,44 @@
+# Generated by Django 3.2.16 on 2026-10-18 01:34
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def fill_review_counters(apps, schema_editor):
+    Order = apps.get_model('blog', 'Order')
+    Review = apps.get_model('blog', 'Review')
+    reviews = Review.objects.filter(
+        order=OuterRef('pk')
+    ).order_by().values('order')
+    Order.objects.update(
+        review_count=Coalesce(Subquery(
+            reviews.annotate(total=Count('pk')).values('total'),
+            output_field=IntegerField()
+        ), 0),
+        rating_sum=Coalesce(Subquery(
+            reviews.annotate(total=Sum('rating')).values('total'),
+            output_field=IntegerField()
+        ), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Сумма оценок'),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='review_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Число отзывов'),
+        ),
+        migrations.RunPython(fill_review_counters, migrations.RunPython.noop),
+    ]
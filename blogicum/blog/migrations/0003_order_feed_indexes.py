@@ -0,0 +1,25 @@
+# Generated by Django 3.2.16 on 2026-10-18 01:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0002_order_review_counters'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['-appointment_date', '-id'], name='order_published_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['service_type', '-appointment_date', '-id'], name='order_service_feed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['client', '-appointment_date', '-id'], name='order_client_date_idx'),
+        ),
+    ]
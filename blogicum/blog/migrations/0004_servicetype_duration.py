@@ -0,0 +1,19 @@
+# Generated by Django 3.2.16 on 2026-10-18 01:36
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0003_order_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='servicetype',
+            name='duration',
+            field=models.PositiveIntegerField(default=60, help_text='Сколько минут бокс занят машиной.', validators=[django.core.validators.MinValueValidator(1)], verbose_name='Длительность (мин)'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 3.2.16 on 2026-10-18 01:37
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0004_servicetype_duration'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BoxSlot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start', models.DateTimeField(verbose_name='Начало слота')),
+                ('locked_at', models.DateTimeField(null=True, verbose_name='Последняя запись')),
+                ('box', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='slots', to='blog.box', verbose_name='Бокс')),
+            ],
+            options={
+                'verbose_name': 'слот бокса',
+                'verbose_name_plural': 'Слоты боксов',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='boxslot',
+            constraint=models.UniqueConstraint(fields=('box', 'start'), name='unique_box_slot'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 3.2.16 on 2026-10-18 02:12
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('blog', '0010_mediablob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyRevenue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(editable=False, max_length=64, unique=True)),
+                ('day', models.DateField(db_index=True, verbose_name='День')),
+                ('orders', models.IntegerField(default=0, verbose_name='Записей')),
+                ('gross', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Без скидки')),
+                ('discount', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Скидки')),
+                ('net', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Выручка')),
+                ('box', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='blog.box', verbose_name='Бокс')),
+                ('service_type', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='blog.servicetype', verbose_name='Тип услуги')),
+                ('washer', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Мойщик')),
+            ],
+            options={
+                'verbose_name': 'выручка за день',
+                'verbose_name_plural': 'Выручка по дням',
+                'ordering': ('-day',),
+            },
+        ),
+    ]
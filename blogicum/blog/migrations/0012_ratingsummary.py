@@ -0,0 +1,36 @@
+# Generated by Django 3.2.16 on 2026-10-18 02:16
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('blog', '0011_dailyrevenue'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RatingSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('count', models.IntegerField(default=0, verbose_name='Оценок')),
+                ('total', models.IntegerField(default=0, verbose_name='Сумма оценок')),
+                ('rating_1', models.IntegerField(default=0, verbose_name='Оценок «1»')),
+                ('rating_2', models.IntegerField(default=0, verbose_name='Оценок «2»')),
+                ('rating_3', models.IntegerField(default=0, verbose_name='Оценок «3»')),
+                ('rating_4', models.IntegerField(default=0, verbose_name='Оценок «4»')),
+                ('rating_5', models.IntegerField(default=0, verbose_name='Оценок «5»')),
+                ('box', models.OneToOneField(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='rating_summary', to='blog.box', verbose_name='Бокс')),
+                ('service_type', models.OneToOneField(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='rating_summary', to='blog.servicetype', verbose_name='Тип услуги')),
+                ('washer', models.OneToOneField(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='rating_summary', to=settings.AUTH_USER_MODEL, verbose_name='Мойщик')),
+            ],
+            options={
+                'verbose_name': 'сводка оценок',
+                'verbose_name_plural': 'Сводки оценок',
+            },
+        ),
+    ]
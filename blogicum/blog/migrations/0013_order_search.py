@@ -0,0 +1,94 @@
+from django.db import migrations
+
+SQLITE_FORWARD = (
+    """
+    CREATE VIRTUAL TABLE blog_order_search USING fts5(
+        car_model, description, car_number,
+        content='blog_order', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER blog_order_search_insert AFTER INSERT ON blog_order
+    BEGIN
+        INSERT INTO blog_order_search(rowid, car_model, description,
+                                      car_number)
+        VALUES (new.id, new.car_model, new.description, new.car_number);
+    END
+    """,
+    """
+    CREATE TRIGGER blog_order_search_delete AFTER DELETE ON blog_order
+    BEGIN
+        INSERT INTO blog_order_search(blog_order_search, rowid, car_model,
+                                      description, car_number)
+        VALUES ('delete', old.id, old.car_model, old.description,
+                old.car_number);
+    END
+    """,
+    """
+    CREATE TRIGGER blog_order_search_update
+    AFTER UPDATE OF car_model, description, car_number ON blog_order
+    BEGIN
+        INSERT INTO blog_order_search(blog_order_search, rowid, car_model,
+                                      description, car_number)
+        VALUES ('delete', old.id, old.car_model, old.description,
+                old.car_number);
+        INSERT INTO blog_order_search(rowid, car_model, description,
+                                      car_number)
+        VALUES (new.id, new.car_model, new.description, new.car_number);
+    END
+    """,
+    "INSERT INTO blog_order_search(blog_order_search) VALUES ('rebuild')",
+)
+SQLITE_BACKWARD = (
+    'DROP TRIGGER IF EXISTS blog_order_search_update',
+    'DROP TRIGGER IF EXISTS blog_order_search_delete',
+    'DROP TRIGGER IF EXISTS blog_order_search_insert',
+    'DROP TABLE IF EXISTS blog_order_search',
+)
+POSTGRES_FORWARD = (
+    """
+    ALTER TABLE blog_order ADD COLUMN search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('russian', coalesce(car_model, '')), 'A')
+        || setweight(to_tsvector('simple', coalesce(car_number, '')), 'A')
+        || setweight(to_tsvector('russian', coalesce(description, '')), 'B')
+    ) STORED
+    """,
+    """
+    CREATE INDEX blog_order_search_idx ON blog_order
+    USING gin (search_vector)
+    """,
+)
+POSTGRES_BACKWARD = (
+    'DROP INDEX IF EXISTS blog_order_search_idx',
+    'ALTER TABLE blog_order DROP COLUMN IF EXISTS search_vector',
+)
+
+
+def run(statements):
+    def operation(apps, schema_editor):
+        for sql in statements.get(schema_editor.connection.vendor, ()):
+            schema_editor.execute(sql)
+    return operation
+
+
+class Migration(migrations.Migration):
+    """Полнотекстовый индекс записей вне моделей Django.
+
+    На SQLite — таблица FTS5 с внешним содержимым и триггерами,
+    на PostgreSQL — вычисляемая колонка tsvector с GIN-индексом.
+    На остальных СУБД поиск работает через icontains (см. blog.search).
+    """
+
+    dependencies = [
+        ('blog', '0012_ratingsummary'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run({'sqlite': SQLITE_FORWARD, 'postgresql': POSTGRES_FORWARD}),
+            run({'sqlite': SQLITE_BACKWARD,
+                 'postgresql': POSTGRES_BACKWARD}),
+        ),
+    ]
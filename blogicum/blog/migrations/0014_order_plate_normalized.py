@@ -0,0 +1,116 @@
+# Generated by Django 3.2.16 on 2026-10-18 02:21
+
+import re
+
+from django.db import migrations, models
+
+# Копия blog.plates.normalize_plate на момент миграции.
+LOOKALIKES = str.maketrans('АВЕКМНОРСТУХ', 'ABEKMHOPCTYX')
+NOISE_RE = re.compile(r'[\W_]+')
+COUNTRY_SUFFIX = 'RUS'
+
+SQLITE_FORWARD = (
+    """
+    CREATE VIRTUAL TABLE blog_order_plate USING fts5(
+        plate_normalized,
+        content='blog_order', content_rowid='id',
+        tokenize='trigram'
+    )
+    """,
+    """
+    CREATE TRIGGER blog_order_plate_insert AFTER INSERT ON blog_order
+    BEGIN
+        INSERT INTO blog_order_plate(rowid, plate_normalized)
+        VALUES (new.id, new.plate_normalized);
+    END
+    """,
+    """
+    CREATE TRIGGER blog_order_plate_delete AFTER DELETE ON blog_order
+    BEGIN
+        INSERT INTO blog_order_plate(blog_order_plate, rowid,
+                                     plate_normalized)
+        VALUES ('delete', old.id, old.plate_normalized);
+    END
+    """,
+    """
+    CREATE TRIGGER blog_order_plate_update
+    AFTER UPDATE OF plate_normalized ON blog_order
+    BEGIN
+        INSERT INTO blog_order_plate(blog_order_plate, rowid,
+                                     plate_normalized)
+        VALUES ('delete', old.id, old.plate_normalized);
+        INSERT INTO blog_order_plate(rowid, plate_normalized)
+        VALUES (new.id, new.plate_normalized);
+    END
+    """,
+    "INSERT INTO blog_order_plate(blog_order_plate) VALUES ('rebuild')",
+)
+SQLITE_BACKWARD = (
+    'DROP TRIGGER IF EXISTS blog_order_plate_update',
+    'DROP TRIGGER IF EXISTS blog_order_plate_delete',
+    'DROP TRIGGER IF EXISTS blog_order_plate_insert',
+    'DROP TABLE IF EXISTS blog_order_plate',
+)
+POSTGRES_FORWARD = (
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    """
+    CREATE INDEX blog_order_plate_trgm_idx ON blog_order
+    USING gin (plate_normalized gin_trgm_ops)
+    """,
+)
+POSTGRES_BACKWARD = (
+    'DROP INDEX IF EXISTS blog_order_plate_trgm_idx',
+)
+
+
+def run(statements):
+    def operation(apps, schema_editor):
+        for sql in statements.get(schema_editor.connection.vendor, ()):
+            schema_editor.execute(sql)
+    return operation
+
+
+def normalize_plate(value):
+    plate = NOISE_RE.sub('', (value or '').upper().translate(LOOKALIKES))
+    if plate.endswith(COUNTRY_SUFFIX) and len(plate) > len(COUNTRY_SUFFIX):
+        plate = plate[:-len(COUNTRY_SUFFIX)]
+    return plate
+
+
+def fill_plates(apps, schema_editor):
+    Order = apps.get_model('blog', 'Order')
+    orders = Order.objects.using(schema_editor.connection.alias)
+    changed = []
+    for order in orders.only('car_number').iterator(chunk_size=2000):
+        order.plate_normalized = normalize_plate(order.car_number)
+        changed.append(order)
+        if len(changed) >= 2000:
+            orders.bulk_update(changed, ['plate_normalized'])
+            changed = []
+    orders.bulk_update(changed, ['plate_normalized'])
+
+
+class Migration(migrations.Migration):
+    """Нормализованный номер с B-tree и триграммным индексом.
+
+    На SQLite триграммы хранит таблица FTS5 с tokenize='trigram',
+    на PostgreSQL — GIN-индекс pg_trgm.
+    """
+
+    dependencies = [
+        ('blog', '0013_order_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='plate_normalized',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=20, verbose_name='Номер для поиска'),
+        ),
+        migrations.RunPython(fill_plates, migrations.RunPython.noop),
+        migrations.RunPython(
+            run({'sqlite': SQLITE_FORWARD, 'postgresql': POSTGRES_FORWARD}),
+            run({'sqlite': SQLITE_BACKWARD,
+                 'postgresql': POSTGRES_BACKWARD}),
+        ),
+    ]
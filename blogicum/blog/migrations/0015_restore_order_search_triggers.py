@@ -0,0 +1,61 @@
+from django.db import migrations
+
+# AddField в 0014 пересоздаёт blog_order на SQLite, и триггеры
+# индекса 0013_order_search пропадают вместе со старой таблицей.
+SQLITE_FORWARD = (
+    """
+    CREATE TRIGGER IF NOT EXISTS blog_order_search_insert
+    AFTER INSERT ON blog_order
+    BEGIN
+        INSERT INTO blog_order_search(rowid, car_model, description,
+                                      car_number)
+        VALUES (new.id, new.car_model, new.description, new.car_number);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS blog_order_search_delete
+    AFTER DELETE ON blog_order
+    BEGIN
+        INSERT INTO blog_order_search(blog_order_search, rowid, car_model,
+                                      description, car_number)
+        VALUES ('delete', old.id, old.car_model, old.description,
+                old.car_number);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS blog_order_search_update
+    AFTER UPDATE OF car_model, description, car_number ON blog_order
+    BEGIN
+        INSERT INTO blog_order_search(blog_order_search, rowid, car_model,
+                                      description, car_number)
+        VALUES ('delete', old.id, old.car_model, old.description,
+                old.car_number);
+        INSERT INTO blog_order_search(rowid, car_model, description,
+                                      car_number)
+        VALUES (new.id, new.car_model, new.description, new.car_number);
+    END
+    """,
+    "INSERT INTO blog_order_search(blog_order_search) VALUES ('rebuild')",
+)
+
+
+def restore_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        for sql in SQLITE_FORWARD:
+            schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+    """Вернуть триггеры полнотекстового индекса после 0014 на SQLite.
+
+    Если blog_order пересоздаст следующая миграция, триггеры
+    восстановит обработчик post_migrate (blog.search_index).
+    """
+
+    dependencies = [
+        ('blog', '0014_order_plate_normalized'),
+    ]
+
+    operations = [
+        migrations.RunPython(restore_triggers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.16 on 2026-10-18 02:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0015_restore_order_search_triggers'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mediablob',
+            name='replaced_by',
+            field=models.CharField(blank=True, help_text='Имя файла без метаданных, который выдаётся вместо этого.', max_length=255, verbose_name='Заменён очищенным файлом'),
+        ),
+    ]
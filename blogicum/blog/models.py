@@ -1,9 +1,43 @@
+from decimal import ROUND_HALF_UP, Decimal
+
 from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator
-from django.db import models
+from django.db import models, transaction
+from django.db.models.functions import Cast, Round, Substr
+from django.utils import timezone
+
+from .plates import normalize_plate
+from .storage import ContentAddressedStorage
 
 User = get_user_model()
 
+DESCRIPTION_PREVIEW_LENGTH = 200
+CENT = Decimal('0.01')
+
+CARD_FIELDS = (
+    'id',
+    'car_model',
+    'car_number',
+    'appointment_date',
+    'car_image',
+    'car_image_widths',
+    'price',
+    'discount',
+    'is_published',
+    'updated_at',
+    'review_count',
+    'rating_sum',
+    'client__username',
+    'washer__username',
+    'box__name',
+    'box__is_published',
+    'box__updated_at',
+    'service_type__title',
+    'service_type__slug',
+    'service_type__is_published',
+    'service_type__updated_at',
+)
+
 
 class ServiceType(models.Model):
     title = models.CharField(
@@ -17,6 +51,12 @@ class ServiceType(models.Model):
         decimal_places=2,
         validators=[MinValueValidator(0)]
     )
+    duration = models.PositiveIntegerField(
+        'Длительность (мин)',
+        default=60,
+        validators=[MinValueValidator(1)],
+        help_text='Сколько минут бокс занят машиной.'
+    )
     slug = models.SlugField(
         'Идентификатор',
         unique=True,
@@ -34,6 +74,10 @@ class ServiceType(models.Model):
         'Добавлено',
         auto_now_add=True
     )
+    updated_at = models.DateTimeField(
+        'Изменено',
+        auto_now=True
+    )
 
     class Meta:
         verbose_name = 'тип услуги'
@@ -61,6 +105,10 @@ class Box(models.Model):
         'Добавлено',
         auto_now_add=True
     )
+    updated_at = models.DateTimeField(
+        'Изменено',
+        auto_now=True
+    )
 
     class Meta:
         verbose_name = 'бокс'
@@ -70,6 +118,124 @@ class Box(models.Model):
         return self.name
 
 
+class BoxSlot(models.Model):
+    """Строка-замок на слот бокса; её блокируют на время записи."""
+
+    box = models.ForeignKey(
+        Box,
+        on_delete=models.CASCADE,
+        related_name='slots',
+        verbose_name='Бокс'
+    )
+    start = models.DateTimeField('Начало слота')
+    locked_at = models.DateTimeField('Последняя запись', null=True)
+
+    class Meta:
+        verbose_name = 'слот бокса'
+        verbose_name_plural = 'Слоты боксов'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('box', 'start'),
+                name='unique_box_slot'
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.box} - {self.start}'
+
+
+def published_q():
+    """Условие видимости записи для всех: активна, услуга доступна,
+    время записи не в будущем."""
+    return models.Q(
+        is_published=True,
+        service_type__is_published=True,
+        appointment_date__lte=timezone.now()
+    )
+
+
+def page_visible_q():
+    """Условие видимости страницы записи для всех.
+
+    В отличие от published_q, запись без услуги тоже видна: в лентах
+    услуг её нет, но её страницу открывают по ссылке.
+    """
+    return models.Q(
+        is_published=True,
+        appointment_date__lte=timezone.now()
+    ) & (
+        models.Q(service_type__isnull=True)
+        | models.Q(service_type__is_published=True)
+    )
+
+
+def to_cents(field):
+    """Денежное поле в целых копейках."""
+    return Cast(Round(models.F(field) * 100), models.BigIntegerField())
+
+
+def final_price_cents():
+    """Итоговая цена в копейках с округлением половины копейки вверх.
+
+    Считается в целых числах: на SQLite DecimalField хранится как float,
+    и ROUND(x, 2) там расходится с Decimal на значениях вроде 5.025.
+    """
+    whole = models.Value(10000, output_field=models.BigIntegerField())
+    half = models.Value(5000, output_field=models.BigIntegerField())
+    return models.ExpressionWrapper(
+        (to_cents('price') * (whole - to_cents('discount')) + half) / whole,
+        output_field=models.BigIntegerField()
+    )
+
+
+class OrderQuerySet(models.QuerySet):
+
+    def published(self):
+        return self.filter(published_q())
+
+    def visible_to(self, user):
+        """Опубликованные записи и все записи самого пользователя."""
+        if not user.is_authenticated:
+            return self.published()
+        return self.filter(published_q() | models.Q(client=user))
+
+    def page_visible_to(self, user):
+        """Записи, чью страницу пользователь может открыть."""
+        if not user.is_authenticated:
+            return self.filter(page_visible_q())
+        return self.filter(page_visible_q() | models.Q(client=user))
+
+    def with_final_price(self):
+        """Итоговая цена со скидкой, посчитанная в базе.
+
+        Совпадает с Order.get_final_price до копейки, поэтому по ней
+        можно сортировать и суммировать без загрузки записей.
+        """
+        return self.annotate(final_price=models.ExpressionWrapper(
+            final_price_cents() * models.Value(CENT),
+            output_field=models.DecimalField(max_digits=12, decimal_places=2)
+        ))
+
+    def final_price_total(self):
+        """Сумма итоговых цен одним запросом."""
+        cents = self.aggregate(total=models.Sum(final_price_cents()))['total']
+        return Decimal(cents or 0) * CENT
+
+    def for_cards(self):
+        """Только колонки, нужные карточке в ленте.
+
+        Полный текст примечаний и служебные поля пользователей
+        не читаются; для карточки берётся начало текста.
+        """
+        return self.select_related(
+            'service_type', 'box', 'client', 'washer'
+        ).only(*CARD_FIELDS).annotate(
+            description_preview=Substr(
+                'description', 1, DESCRIPTION_PREVIEW_LENGTH
+            )
+        ).with_final_price()
+
+
 class Order(models.Model):
     STATUS_CHOICES = [
         ('pending', 'Ожидает'),
@@ -80,6 +246,13 @@ class Order(models.Model):
 
     car_model = models.CharField('Модель автомобиля', max_length=256)
     car_number = models.CharField('Гос. номер', max_length=20)
+    plate_normalized = models.CharField(
+        'Номер для поиска',
+        max_length=20,
+        blank=True,
+        editable=False,
+        db_index=True
+    )
     description = models.TextField('Примечания', blank=True)
     appointment_date = models.DateTimeField(
         'Дата и время записи',
@@ -134,8 +307,15 @@ class Order(models.Model):
     car_image = models.ImageField(
         'Фото автомобиля',
         upload_to='cars',
+        storage=ContentAddressedStorage(),
         blank=True
     )
+    car_image_widths = models.JSONField(
+        'Ширины уменьшенных копий фото',
+        default=list,
+        blank=True,
+        editable=False
+    )
     status = models.CharField(
         'Статус',
         max_length=20,
@@ -148,20 +328,79 @@ class Order(models.Model):
         help_text='Снимите галочку, чтобы скрыть запись.'
     )
     created_at = models.DateTimeField('Создано', auto_now_add=True)
+    updated_at = models.DateTimeField('Изменено', auto_now=True)
+    review_count = models.PositiveIntegerField(
+        'Число отзывов',
+        default=0,
+        editable=False
+    )
+    rating_sum = models.PositiveIntegerField(
+        'Сумма оценок',
+        default=0,
+        editable=False
+    )
+
+    objects = OrderQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'запись'
         verbose_name_plural = 'Записи'
         ordering = ('-appointment_date',)
+        indexes = (
+            models.Index(
+                fields=('-appointment_date', '-id'),
+                condition=models.Q(is_published=True),
+                name='order_published_date_idx'
+            ),
+            models.Index(
+                fields=('service_type', '-appointment_date', '-id'),
+                condition=models.Q(is_published=True),
+                name='order_service_feed_idx'
+            ),
+            models.Index(
+                fields=('client', '-appointment_date', '-id'),
+                name='order_client_date_idx'
+            ),
+        )
 
     def __str__(self):
         return f'{self.car_model} - {self.appointment_date}'
 
+    def save(self, *args, **kwargs):
+        """Сохранить запись вместе со сводками выручки в одной транзакции."""
+        self.plate_normalized = normalize_plate(self.car_number)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'car_number' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'plate_normalized'}
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get('using')):
+            return super().delete(*args, **kwargs)
+
     def get_final_price(self):
-        """Рассчитать итоговую цену с учетом скидки"""
-        if self.price:
-            discount_amount = self.price * (self.discount / 100)
-            return self.price - discount_amount
+        """Рассчитать итоговую цену с учетом скидки, до копейки"""
+        if self.price is None:
+            return None
+        return (self.price * (100 - self.discount) / 100).quantize(
+            CENT, rounding=ROUND_HALF_UP
+        )
+
+    @property
+    def card_version(self):
+        """Версия карточки записи для кэша фрагментов"""
+        parts = [self.updated_at, self.client.username]
+        for related in (self.service_type, self.box):
+            parts.append(related.updated_at if related else None)
+        parts.append(self.washer.username if self.washer else None)
+        return '|'.join(str(part) for part in parts)
+
+    @property
+    def average_rating(self):
+        """Средняя оценка по отзывам"""
+        if self.review_count:
+            return self.rating_sum / self.review_count
         return None
 
 
@@ -184,6 +423,7 @@ class Review(models.Model):
         verbose_name='Автор отзыва'
     )
     created_at = models.DateTimeField('Добавлено', auto_now_add=True)
+    updated_at = models.DateTimeField('Изменено', auto_now=True)
 
     class Meta:
         verbose_name = 'отзыв'
@@ -192,3 +432,195 @@ class Review(models.Model):
 
     def __str__(self):
         return f'Отзыв {self.author.username} на {self.order.car_model}'
+
+    def save(self, *args, **kwargs):
+        """Сохранить отзыв вместе со счётчиками и сводками оценок."""
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get('using')):
+            return super().delete(*args, **kwargs)
+
+
+class Task(models.Model):
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнена'),
+        (FAILED, 'Ошибка'),
+    ]
+
+    name = models.CharField('Задача', max_length=100)
+    kwargs = models.JSONField('Параметры', default=dict, blank=True)
+    status = models.CharField(
+        'Статус',
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default=PENDING
+    )
+    attempts = models.PositiveIntegerField('Попыток', default=0)
+    error = models.TextField('Последняя ошибка', blank=True)
+    run_after = models.DateTimeField('Выполнить после', default=timezone.now)
+    started_at = models.DateTimeField('Начата', null=True, blank=True)
+    finished_at = models.DateTimeField('Завершена', null=True, blank=True)
+    created_at = models.DateTimeField('Добавлена', auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+        ordering = ('run_after', 'id')
+        indexes = (
+            models.Index(
+                fields=('run_after', 'id'),
+                condition=models.Q(status='pending'),
+                name='task_pending_idx'
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.name} #{self.pk} ({self.get_status_display()})'
+
+
+class MediaBlob(models.Model):
+    name = models.CharField('Путь к файлу', max_length=255, unique=True)
+    ref_count = models.IntegerField('Ссылок', default=0)
+    widths = models.JSONField(
+        'Ширины уменьшенных копий',
+        default=list,
+        blank=True
+    )
+    replaced_by = models.CharField(
+        'Заменён очищенным файлом',
+        max_length=255,
+        blank=True,
+        help_text='Имя файла без метаданных, который выдаётся вместо этого.'
+    )
+    created_at = models.DateTimeField('Добавлен', auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'файл'
+        verbose_name_plural = 'Файлы'
+
+    def __str__(self):
+        return f'{self.name} ({self.ref_count})'
+
+
+class DailyRevenue(models.Model):
+    """Выручка завершённых записей за день по услуге, боксу и мойщику.
+
+    Строки меняются вместе с записью в той же транзакции; key
+    собран из дня и id, потому что уникальность по полям с NULL
+    не работает.
+    """
+
+    key = models.CharField(max_length=64, unique=True, editable=False)
+    day = models.DateField('День', db_index=True)
+    service_type = models.ForeignKey(
+        ServiceType,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='+',
+        verbose_name='Тип услуги'
+    )
+    box = models.ForeignKey(
+        Box,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='+',
+        verbose_name='Бокс'
+    )
+    washer = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='+',
+        verbose_name='Мойщик'
+    )
+    orders = models.IntegerField('Записей', default=0)
+    gross = models.DecimalField(
+        'Без скидки', max_digits=14, decimal_places=2, default=0
+    )
+    discount = models.DecimalField(
+        'Скидки', max_digits=14, decimal_places=2, default=0
+    )
+    net = models.DecimalField(
+        'Выручка', max_digits=14, decimal_places=2, default=0
+    )
+
+    class Meta:
+        verbose_name = 'выручка за день'
+        verbose_name_plural = 'Выручка по дням'
+        ordering = ('-day',)
+
+    def __str__(self):
+        return f'{self.day}: {self.net}'
+
+
+class RatingSummary(models.Model):
+    """Число, сумма и распределение оценок по услуге, боксу или мойщику.
+
+    Заполнено ровно одно из полей service_type, box, washer. Строка
+    меняется вместе с отзывом, поэтому средняя оценка не требует
+    агрегирования отзывов.
+    """
+
+    service_type = models.OneToOneField(
+        ServiceType,
+        on_delete=models.CASCADE,
+        null=True,
+        related_name='rating_summary',
+        verbose_name='Тип услуги'
+    )
+    box = models.OneToOneField(
+        Box,
+        on_delete=models.CASCADE,
+        null=True,
+        related_name='rating_summary',
+        verbose_name='Бокс'
+    )
+    washer = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        null=True,
+        related_name='rating_summary',
+        verbose_name='Мойщик'
+    )
+    count = models.IntegerField('Оценок', default=0)
+    total = models.IntegerField('Сумма оценок', default=0)
+    rating_1 = models.IntegerField('Оценок «1»', default=0)
+    rating_2 = models.IntegerField('Оценок «2»', default=0)
+    rating_3 = models.IntegerField('Оценок «3»', default=0)
+    rating_4 = models.IntegerField('Оценок «4»', default=0)
+    rating_5 = models.IntegerField('Оценок «5»', default=0)
+
+    class Meta:
+        verbose_name = 'сводка оценок'
+        verbose_name_plural = 'Сводки оценок'
+
+    def __str__(self):
+        subject = self.service_type or self.box or self.washer
+        return f'{subject}: {self.average or "-"}'
+
+    @property
+    def average(self):
+        if self.count > 0:
+            return self.total / self.count
+        return None
+
+    @property
+    def histogram(self):
+        """Пары (оценка, число) от 5 к 1 и доля от всех оценок в процентах."""
+        return [
+            (
+                rating,
+                getattr(self, f'rating_{rating}'),
+                round(100 * getattr(self, f'rating_{rating}') / self.count)
+                if self.count > 0 else 0,
+            )
+            for rating in range(5, 0, -1)
+        ]
@@ -0,0 +1,153 @@
+import re
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+
+from .paginators import decode_cursor
+
+PAGE_CACHE_TIMEOUT = 60
+LOCK_TIMEOUT = 10
+LOCK_WAIT = 2.0
+LOCK_POLL_INTERVAL = 0.05
+MAX_CACHED_PAGE = 50
+PAGE_NUMBER_RE = re.compile(r'[1-9][0-9]*')
+
+ALL_FEEDS = 'all'
+
+
+def generation_key(feed):
+    return f'blog:page_gen:{feed}'
+
+
+def feed_name(view_name, slug=None):
+    return view_name if slug is None else f'{view_name}:{slug}'
+
+
+def purge_pages(*feeds):
+    """Сбросить все закэшированные страницы перечисленных лент.
+
+    Страницы не перебираются: у каждой ленты есть номер поколения,
+    и он входит в ключ страницы, поэтому после увеличения номера
+    старые страницы просто перестают находиться и истекают сами.
+    """
+    for feed in feeds:
+        key = generation_key(feed)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, None)
+
+
+def purge_service_type_pages(service_type_ids):
+    """Сбросить кэш главной и страниц перечисленных услуг."""
+    from .models import ServiceType
+
+    slugs = ServiceType.objects.filter(
+        pk__in=[pk for pk in service_type_ids if pk is not None]
+    ).values_list('slug', flat=True)
+    purge_pages(
+        feed_name('index'),
+        *[feed_name('category', slug) for slug in slugs]
+    )
+
+
+def page_position(request):
+    """Позиция в ленте для ключа кэша или None, если её не кэшировать.
+
+    Номер страницы и курсор приводятся к одному виду, а мусорные
+    значения не кэшируются: иначе каждый новый ?page=… занимал бы
+    отдельный ключ и рендерился мимо защиты от лавины промахов.
+    """
+    if 'cursor' in request.GET:
+        token = request.GET['cursor']
+        if not token:
+            return 'cursor'
+        cursor = decode_cursor(token)
+        if cursor is None:
+            return None
+        appointment_date, pk, direction = cursor
+        return f'cursor:{appointment_date.isoformat()}:{pk}:{direction}'
+    page = request.GET.get('page', '1')
+    if not PAGE_NUMBER_RE.fullmatch(page) or int(page) > getattr(
+        settings, 'BLOG_PAGE_CACHE_MAX_PAGE', MAX_CACHED_PAGE
+    ):
+        return None
+    return f'page:{page}'
+
+
+def page_key(feed, request):
+    position = page_position(request)
+    if position is None:
+        return None
+    generations = cache.get_many(
+        [generation_key(ALL_FEEDS), generation_key(feed)]
+    )
+    return 'blog:page:{}:{}:{}:{}'.format(
+        feed,
+        generations.get(generation_key(ALL_FEEDS), 0),
+        generations.get(generation_key(feed), 0),
+        position,
+    )
+
+
+def wait_for_page(key):
+    deadline = time.monotonic() + getattr(
+        settings, 'BLOG_PAGE_CACHE_LOCK_WAIT', LOCK_WAIT
+    )
+    while time.monotonic() < deadline:
+        time.sleep(LOCK_POLL_INTERVAL)
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+    return None
+
+
+def cache_anonymous_page(view_name, slug_kwarg=None):
+    """Кэшировать страницу ленты целиком для анонимных посетителей.
+
+    Ключ строится из имени ленты, слага и позиции в ленте (см.
+    page_position). При промахе страницу строит только один запрос —
+    тот, кто взял блокировку через cache.add; остальные ждут его
+    результат и рендерят сами, только если не дождались, и чужую
+    блокировку не снимают.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method != 'GET' or request.user.is_authenticated:
+                return view(request, *args, **kwargs)
+            feed = feed_name(view_name, kwargs.get(slug_kwarg))
+            key = page_key(feed, request)
+            if key is None:
+                return view(request, *args, **kwargs)
+            cached = cache.get(key)
+            lock_key = f'{key}:lock'
+            locked = False
+            if cached is None:
+                locked = cache.add(lock_key, 1, LOCK_TIMEOUT)
+                if not locked:
+                    cached = wait_for_page(key)
+            if cached is not None:
+                content, content_type = cached
+                return HttpResponse(content, content_type=content_type)
+            try:
+                response = view(request, *args, **kwargs)
+                if response.status_code == 200 and not response.streaming:
+                    cache.set(
+                        key,
+                        (response.content, response['Content-Type']),
+                        getattr(
+                            settings,
+                            'BLOG_PAGE_CACHE_TIMEOUT',
+                            PAGE_CACHE_TIMEOUT
+                        )
+                    )
+            finally:
+                if locked:
+                    cache.delete(lock_key)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,236 @@
+import base64
+import binascii
+import json
+from collections.abc import Sequence
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+POSTS_PER_PAGE = 10
+# Диапазон BigAutoField: больший id ломает запрос с OverflowError.
+MAX_ID = 2 ** 63 - 1
+FEED_COUNT_TIMEOUT = 60
+
+NEXT = 'n'
+PREVIOUS = 'p'
+
+
+def encode_cursor(order, direction):
+    """Упаковать позицию записи в ленте в непрозрачный токен."""
+    payload = json.dumps({
+        'd': order.appointment_date.isoformat(),
+        'i': order.pk,
+        'r': direction,
+    }, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Распаковать токен; для битого или подделанного вернуть None.
+
+    Id должен помещаться в BigAutoField, а дата — быть с часовым поясом.
+    """
+    if not token:
+        return None
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        appointment_date = datetime.fromisoformat(payload['d'])
+        pk = int(payload['i'])
+        direction = payload['r']
+    except (
+        binascii.Error, ValueError, KeyError, TypeError, UnicodeDecodeError
+    ):
+        return None
+    if direction not in (NEXT, PREVIOUS) or not 1 <= pk <= MAX_ID:
+        return None
+    if appointment_date.utcoffset() is None:
+        return None
+    return appointment_date, pk, direction
+
+
+class KeysetPage(Sequence):
+    """Страница ленты, выбранная по ключу (appointment_date, id).
+
+    Повторяет ту часть интерфейса django.core.paginator.Page,
+    которую используют шаблоны, но не знает общего числа записей.
+    """
+
+    is_keyset = True
+
+    def __init__(self, object_list, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f'<KeysetPage of {len(self.object_list)} items>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """Постраничный вывод записей без OFFSET и COUNT(*).
+
+    Лента упорядочена по (-appointment_date, -id); каждая страница
+    выбирается условием «строго после/до курсора», поэтому стоимость
+    запроса не зависит от номера страницы.
+    """
+
+    def __init__(self, queryset, per_page=POSTS_PER_PAGE):
+        self.queryset = queryset.order_by('-appointment_date', '-id')
+        self.per_page = per_page
+
+    def get_page(self, token):
+        cursor = decode_cursor(token)
+        if cursor is None:
+            rows = list(self.queryset[:self.per_page + 1])
+            has_more = len(rows) > self.per_page
+            return self._build_page(
+                rows[:self.per_page], has_next=has_more, has_previous=False
+            )
+        appointment_date, pk, direction = cursor
+        if direction == NEXT:
+            rows = list(self.queryset.filter(
+                Q(appointment_date__lt=appointment_date)
+                | Q(appointment_date=appointment_date, id__lt=pk)
+            )[:self.per_page + 1])
+            has_more = len(rows) > self.per_page
+            return self._build_page(
+                rows[:self.per_page], has_next=has_more, has_previous=True
+            )
+        rows = list(self.queryset.filter(
+            Q(appointment_date__gt=appointment_date)
+            | Q(appointment_date=appointment_date, id__gt=pk)
+        ).order_by('appointment_date', 'id')[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page][::-1]
+        return self._build_page(rows, has_next=True, has_previous=has_more)
+
+    def _build_page(self, rows, has_next, has_previous):
+        next_cursor = previous_cursor = None
+        if rows and has_next:
+            next_cursor = encode_cursor(rows[-1], NEXT)
+        if rows and has_previous:
+            previous_cursor = encode_cursor(rows[0], PREVIOUS)
+        return KeysetPage(rows, next_cursor, previous_cursor)
+
+
+def feed_count_key(feed, pk=None):
+    """Ключ кэша с числом записей ленты: index, category или profile."""
+    if pk is None:
+        return f'blog:feed_count:{feed}'
+    return f'blog:feed_count:{feed}:{pk}'
+
+
+def invalidate_feed_counts(service_type_ids=(), client_ids=()):
+    keys = [feed_count_key('index')]
+    keys += [
+        feed_count_key('category', pk) for pk in service_type_ids
+        if pk is not None
+    ]
+    keys += [
+        feed_count_key('profile', pk) for pk in client_ids
+        if pk is not None
+    ]
+    cache.delete_many(keys)
+
+
+def estimate_count(queryset):
+    """Оценка числа строк по плану запроса PostgreSQL.
+
+    На других СУБД дешёвой оценки нет, поэтому возвращается None.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class CachedCountPaginator(Paginator):
+    """Paginator, который берёт общее число записей из кэша.
+
+    Счётчик хранится по ключу ленты и сбрасывается сигналами
+    при сохранении и удалении записей (см. blog.signals), а также
+    по таймауту — записи «из будущего» появляются в ленте со временем.
+    Для подсчёта можно передать облегчённый count_queryset без
+    select_related и аннотаций.
+    """
+
+    def __init__(self, object_list, per_page, count_key=None,
+                 count_queryset=None, estimate=False, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count_key = count_key
+        self.count_queryset = count_queryset
+        self.estimate = estimate
+
+    @cached_property
+    def count(self):
+        if self.count_key is None:
+            return self._count_uncached()
+        count = cache.get(self.count_key)
+        if count is None:
+            count = self._count_uncached()
+            cache.set(
+                self.count_key,
+                count,
+                getattr(
+                    settings, 'BLOG_FEED_COUNT_TIMEOUT', FEED_COUNT_TIMEOUT
+                )
+            )
+        return count
+
+    def _count_uncached(self):
+        queryset = self.count_queryset
+        if queryset is None:
+            queryset = self.object_list
+        if self.estimate:
+            count = estimate_count(queryset)
+            if count is not None:
+                return count
+        return queryset.count()
+
+
+def paginate_orders(request, queryset, count_key=None, count_queryset=None):
+    """Вернуть страницу ленты записей для текущего запроса.
+
+    Курсорный режим включается параметром ?cursor= или настройкой
+    BLOG_KEYSET_PAGINATION; иначе работает обычный Paginator по ?page=
+    с кэшированным числом записей.
+    """
+    if 'cursor' in request.GET or getattr(
+        settings, 'BLOG_KEYSET_PAGINATION', False
+    ):
+        return KeysetPaginator(queryset).get_page(request.GET.get('cursor'))
+    paginator = CachedCountPaginator(
+        queryset,
+        POSTS_PER_PAGE,
+        count_key=count_key,
+        count_queryset=count_queryset,
+        estimate=getattr(settings, 'BLOG_FEED_COUNT_ESTIMATE', False)
+    )
+    return paginator.get_page(request.GET.get('page'))
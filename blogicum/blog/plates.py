@@ -0,0 +1,100 @@
+import re
+
+from django.db import connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+# В номерах используются только буквы, одинаковые в кириллице и латинице.
+LOOKALIKES = str.maketrans('АВЕКМНОРСТУХ', 'ABEKMHOPCTYX')
+NOISE_RE = re.compile(r'[\W_]+')
+COUNTRY_SUFFIX = 'RUS'
+PLATE_TABLE = 'blog_order_plate'
+SIMILARITY_THRESHOLD = 0.3
+SIMILAR_LIMIT = 10
+EXACT_LIMIT = 50
+MIN_PLATE_LENGTH = 3
+CANDIDATES = 200
+
+
+def normalize_plate(value):
+    """Номер для поиска: латиница вместо кириллицы, без пробелов и RUS.
+
+    «а123вс 77», «A 123 BC 77 RUS» и «A123BC77» дают одно значение.
+    """
+    plate = NOISE_RE.sub('', (value or '').upper().translate(LOOKALIKES))
+    if plate.endswith(COUNTRY_SUFFIX) and len(plate) > len(COUNTRY_SUFFIX):
+        plate = plate[:-len(COUNTRY_SUFFIX)]
+    return plate
+
+
+def plate_prefix_q(plate):
+    """Номера, начинающиеся с plate, диапазоном по индексу.
+
+    Так находятся номера с любым кодом региона, а условие
+    >= и < использует обычный B-tree на любой СУБД.
+    """
+    upper = plate[:-1] + chr(ord(plate[-1]) + 1)
+    return Q(plate_normalized__gte=plate, plate_normalized__lt=upper)
+
+
+def trigrams(plate):
+    return {plate[index:index + 3] for index in range(len(plate) - 2)}
+
+
+def similarity(first, second):
+    """Доля общих триграмм, как similarity() в pg_trgm."""
+    first, second = trigrams(first), trigrams(second)
+    if not first or not second:
+        return 0.0
+    return len(first & second) / len(first | second)
+
+
+def candidate_filter(plate, using):
+    """Записи хотя бы с одной общей триграммой номера по индексу."""
+    connection = connections[using]
+    if connection.vendor == 'sqlite':
+        match = ' OR '.join(f'"{trigram}"' for trigram in trigrams(plate))
+        return Q(pk__in=RawSQL(
+            f'SELECT rowid FROM {PLATE_TABLE} '
+            f'WHERE {PLATE_TABLE} MATCH %s '
+            f'ORDER BY rank LIMIT {CANDIDATES}',
+            [match]
+        ))
+    if connection.vendor == 'postgresql':
+        table = connection.ops.quote_name('blog_order')
+        return Q(pk__in=RawSQL(
+            f'SELECT id FROM {table} WHERE plate_normalized %% %s',
+            [plate]
+        ))
+    return Q(plate_normalized__contains=plate[:3])
+
+
+def find_plates(queryset, value):
+    """Точные (с любым регионом) и похожие записи по номеру.
+
+    Возвращает нормализованный номер, до EXACT_LIMIT записей с этим
+    префиксом и до SIMILAR_LIMIT пар (запись, сходство) среди остальных.
+    Номер короче MIN_PLATE_LENGTH не ищется: под префикс из одной
+    буквы попадает заметная часть таблицы.
+    """
+    plate = normalize_plate(value)
+    if len(plate) < MIN_PLATE_LENGTH:
+        return plate, [], []
+    exact = list(queryset.filter(plate_prefix_q(plate)).order_by(
+        'plate_normalized', 'pk'
+    )[:EXACT_LIMIT])
+    found = {order.pk for order in exact}
+    candidates = queryset.filter(
+        candidate_filter(plate, queryset.db)
+    ).exclude(pk__in=found)
+    similar = sorted(
+        (
+            (order, similarity(plate, order.plate_normalized))
+            for order in candidates
+        ),
+        key=lambda pair: (-pair[1], pair[0].plate_normalized, pair[0].pk)
+    )
+    similar = [
+        pair for pair in similar if pair[1] >= SIMILARITY_THRESHOLD
+    ][:SIMILAR_LIMIT]
+    return plate, exact, similar
@@ -0,0 +1,96 @@
+import sys
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.db import connections
+from django.template.base import Node
+
+REPEAT_THRESHOLD = 3
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Блок кода выполнил больше запросов к базе, чем ему положено."""
+
+
+def template_origin():
+    """Шаблон и строка, из которых сейчас выполняется запрос, если есть.
+
+    Ищет ближайший кадр Node.render_annotated: это узел шаблона,
+    который обратился к ленивому queryset или связанному объекту.
+    """
+    frame = sys._getframe(1)
+    while frame is not None:
+        if frame.f_code is Node.render_annotated.__code__:
+            node = frame.f_locals['self']
+            origin = node.origin.template_name or node.origin.name
+            return f'{origin}:{node.token.lineno}'
+        frame = frame.f_back
+    return None
+
+
+class QueryLog:
+    """execute_wrapper, который запоминает SQL и место в шаблоне."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries.append((sql, template_origin()))
+        return execute(sql, params, many, context)
+
+    def __len__(self):
+        return len(self.queries)
+
+    def repeated(self, threshold=REPEAT_THRESHOLD):
+        """[(sql, сколько раз, места в шаблонах)] для частых запросов.
+
+        Запросы сравниваются без параметров: N+1 — это один и тот же
+        SQL с разными id.
+        """
+        counts = Counter(sql for sql, _ in self.queries)
+        return [
+            (sql, count, sorted({
+                origin for query, origin in self.queries
+                if query == sql and origin
+            }))
+            for sql, count in counts.most_common()
+            if count >= threshold
+        ]
+
+    def report(self):
+        lines = [f'{len(self)} запросов:']
+        lines += [
+            f'  {sql}' + (f'  [{origin}]' if origin else '')
+            for sql, origin in self.queries
+        ]
+        for sql, count, origins in self.repeated():
+            lines.append(
+                f'Повторён {count} раз: {sql} '
+                f'({", ".join(origins) or "вне шаблона"})'
+            )
+        return '\n'.join(lines)
+
+
+@contextmanager
+def capture_queries(using=None):
+    aliases = [using] if using else list(connections)
+    log = QueryLog()
+    with ExitStack() as stack:
+        for alias in aliases:
+            stack.enter_context(connections[alias].execute_wrapper(log))
+        yield log
+
+
+@contextmanager
+def query_budget(limit, using=None):
+    """Упасть, если блок выполнил больше limit запросов к базе.
+
+    Работает и без DEBUG. В сообщении — все запросы и повторы
+    с шаблоном и строкой, откуда они пришли.
+    """
+    with capture_queries(using) as log:
+        yield log
+    if len(log) > limit:
+        raise QueryBudgetExceeded(
+            f'Бюджет {limit} запросов превышен. {log.report()}'
+        )
@@ -0,0 +1,115 @@
+from collections import Counter
+
+from django.db.models import Count, F, Q
+
+from .models import Order, RatingSummary, Review
+
+SUBJECTS = ('service_type', 'box', 'washer')
+RATINGS = range(1, 6)
+
+
+def order_subjects(order_id, order=None):
+    """id услуги, бокса и мойщика записи; без запроса, если она загружена."""
+    if order is not None:
+        return {name: getattr(order, f'{name}_id') for name in SUBJECTS}
+    row = Order.objects.filter(pk=order_id).values_list(
+        *(f'{name}_id' for name in SUBJECTS)
+    ).first()
+    return dict(zip(SUBJECTS, row)) if row else None
+
+
+def review_subjects(review):
+    order = review.order if Review.order.is_cached(review) else None
+    return order_subjects(review.order_id, order)
+
+
+def changes(histogram, sign=1):
+    """Приращения полей сводки для оценок {оценка: число}."""
+    values = {
+        'count': F('count') + sign * sum(histogram.values()),
+        'total': F('total') + sign * sum(
+            rating * number for rating, number in histogram.items()
+        ),
+    }
+    for rating, number in histogram.items():
+        name = f'rating_{rating}'
+        values[name] = F(name) + sign * number
+    return values
+
+
+def subjects_filter(subjects):
+    condition = Q()
+    for name, pk in subjects:
+        condition |= Q(**{f'{name}_id': pk})
+    return condition
+
+
+def apply(subjects, histogram, sign=1):
+    """Одним UPDATE сдвинуть сводки всех затронутых услуг, боксов, мойщиков.
+
+    subjects — словарь {'service_type': id, ...}; пустые id пропускаются.
+    Недостающие строки создаются и обновляются отдельно — это бывает
+    только на первом отзыве.
+    """
+    subjects = [(name, pk) for name, pk in subjects.items() if pk]
+    if not subjects or not any(histogram.values()):
+        return
+    values = changes(histogram, sign)
+    summaries = RatingSummary.objects.filter(subjects_filter(subjects))
+    if summaries.update(**values) == len(subjects):
+        return
+    present = {
+        (name, row[index])
+        for row in summaries.values_list(*(f'{n}_id' for n in SUBJECTS))
+        for index, name in enumerate(SUBJECTS)
+    }
+    missing = [subject for subject in subjects if subject not in present]
+    RatingSummary.objects.bulk_create(
+        [RatingSummary(**{f'{name}_id': pk}) for name, pk in missing],
+        ignore_conflicts=True
+    )
+    RatingSummary.objects.filter(subjects_filter(missing)).update(**values)
+
+
+def order_histogram(order_id):
+    return Counter(dict(
+        Review.objects.filter(order_id=order_id).order_by().values(
+            'rating'
+        ).annotate(number=Count('pk')).values_list('rating', 'number')
+    ))
+
+
+def move_order_ratings(order_id, previous, current):
+    """Перенести оценки записи, если у неё сменились услуга, бокс, мойщик."""
+    moved = [
+        name for name in SUBJECTS
+        if previous[f'{name}_id'] != current[f'{name}_id']
+    ]
+    if not moved:
+        return
+    histogram = order_histogram(order_id)
+    apply({name: previous[f'{name}_id'] for name in moved}, histogram, -1)
+    apply({name: current[f'{name}_id'] for name in moved}, histogram)
+
+
+def rebuild_summaries():
+    """Пересчитать все сводки по отзывам; возвращает число строк."""
+    totals = {}
+    for name in SUBJECTS:
+        field = f'order__{name}'
+        rows = Review.objects.exclude(**{field: None}).order_by().values(
+            field, 'rating'
+        ).annotate(number=Count('pk')).values_list(field, 'rating', 'number')
+        for pk, rating, number in rows:
+            totals.setdefault((name, pk), Counter())[rating] += number
+    summaries = []
+    for (name, pk), histogram in totals.items():
+        summary = RatingSummary(**{f'{name}_id': pk})
+        summary.count = sum(histogram.values())
+        summary.total = sum(r * n for r, n in histogram.items())
+        for rating in RATINGS:
+            setattr(summary, f'rating_{rating}', histogram[rating])
+        summaries.append(summary)
+    RatingSummary.objects.all().delete()
+    RatingSummary.objects.bulk_create(summaries, batch_size=1000)
+    return len(summaries)
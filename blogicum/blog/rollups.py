@@ -0,0 +1,149 @@
+from datetime import timedelta
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.utils import timezone
+
+from .exports import start_of_day
+from .models import CENT, DailyRevenue, Order, final_price_cents, to_cents
+
+COUNTED_STATUS = 'completed'
+ORDER_FIELDS = (
+    'status',
+    'appointment_date',
+    'service_type_id',
+    'box_id',
+    'washer_id',
+    'price',
+    'discount',
+)
+AMOUNTS = ('gross', 'discount', 'net')
+BREAKDOWNS = (
+    ('by_service', 'service_type', 'service_type__title'),
+    ('by_box', 'box', 'box__name'),
+    ('by_washer', 'washer', 'washer__username'),
+)
+
+
+def revenue_key(day, service_type_id, box_id, washer_id):
+    ids = (service_type_id, box_id, washer_id)
+    return '|'.join([day.isoformat(), *(str(pk or '-') for pk in ids)])
+
+
+def order_values(order):
+    return {field: getattr(order, field) for field in ORDER_FIELDS}
+
+
+def to_decimal(value):
+    """Значение поля до сохранения может быть строкой или лишними знаками."""
+    return Decimal(str(value)).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def contribution(values):
+    """Ключ строки сводки и суммы записи или None, если она не считается.
+
+    Суммы округляются так же, как Order.get_final_price и
+    final_price_cents(), поэтому пересчёт командой даёт те же копейки.
+    """
+    if not values or values['status'] != COUNTED_STATUS:
+        return None
+    gross = to_decimal(values['price'] or 0)
+    net = Order(price=gross, discount=to_decimal(values['discount']))
+    net = net.get_final_price()
+    day = timezone.localdate(values['appointment_date'])
+    ids = (values['service_type_id'], values['box_id'], values['washer_id'])
+    return (
+        revenue_key(day, *ids),
+        day,
+        ids,
+        {'gross': gross, 'discount': gross - net, 'net': net},
+    )
+
+
+def apply(item, sign):
+    key, day, (service_type_id, box_id, washer_id), amounts = item
+    row, _ = DailyRevenue.objects.get_or_create(key=key, defaults={
+        'day': day,
+        'service_type_id': service_type_id,
+        'box_id': box_id,
+        'washer_id': washer_id,
+    })
+    DailyRevenue.objects.filter(pk=row.pk).update(
+        orders=F('orders') + sign,
+        **{name: F(name) + sign * amounts[name] for name in AMOUNTS}
+    )
+
+
+def update_rollups(previous, current):
+    """Перенести вклад записи из старой строки сводки в новую.
+
+    Вызывается из сигналов внутри транзакции Order.save/delete:
+    строки сводки меняются атомарно вместе с записью.
+    """
+    before, after = contribution(previous), contribution(current)
+    if before == after:
+        return
+    if before:
+        apply(before, -1)
+    if after:
+        apply(after, 1)
+
+
+def rebuild_day(day):
+    """Пересчитать сводку за день по записям; повторный запуск безопасен."""
+    orders = Order.objects.filter(
+        status=COUNTED_STATUS,
+        appointment_date__gte=start_of_day(day),
+        appointment_date__lt=start_of_day(day + timedelta(days=1)),
+    ).order_by().values('service_type_id', 'box_id', 'washer_id').annotate(
+        count=Count('pk'),
+        gross_cents=Sum(to_cents('price')),
+        net_cents=Sum(final_price_cents()),
+    )
+    with transaction.atomic():
+        DailyRevenue.objects.filter(day=day).delete()
+        rows = []
+        for group in orders:
+            ids = (group['service_type_id'], group['box_id'],
+                   group['washer_id'])
+            gross = Decimal(group['gross_cents'] or 0) * CENT
+            net = Decimal(group['net_cents'] or 0) * CENT
+            rows.append(DailyRevenue(
+                key=revenue_key(day, *ids),
+                day=day,
+                service_type_id=ids[0],
+                box_id=ids[1],
+                washer_id=ids[2],
+                orders=group['count'],
+                gross=gross,
+                discount=gross - net,
+                net=net,
+            ))
+        DailyRevenue.objects.bulk_create(rows)
+    return len(rows)
+
+
+def revenue_report(date_from, date_to):
+    """Итоги за период по дням и в разрезах — только из сводок."""
+    rollups = DailyRevenue.objects.filter(
+        day__gte=date_from, day__lte=date_to
+    ).order_by()
+    totals = {
+        f'{name}_sum': Sum(name) for name in ('orders', *AMOUNTS)
+    }
+    report = {
+        'by_day': list(
+            rollups.values('day').annotate(**totals).order_by('-day')
+        ),
+    }
+    for name, dimension, label in BREAKDOWNS:
+        report[name] = list(
+            rollups.values(dimension, label=F(label)).annotate(
+                **totals
+            ).order_by('-net_sum', 'label')
+        )
+    report['total'] = {
+        name: sum(row[name] for row in report['by_day']) for name in totals
+    }
+    return report
@@ -0,0 +1,78 @@
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+REPLICA_VIEWS = (
+    'blog:index',
+    'blog:category_posts',
+    'blog:profile',
+    'blog:post_detail',
+    'pages',
+)
+STICKY_COOKIE = 'blog_primary'
+STICKY_SECONDS = 10
+
+current_route = ContextVar('current_route', default=None)
+
+
+def replica_aliases():
+    return list(getattr(settings, 'BLOG_DATABASE_REPLICAS', ()))
+
+
+class RequestRoute:
+    """Куда читать в рамках одного запроса.
+
+    replica — выбранная для запроса реплика или None (основная база).
+    wrote становится True при первой записи: после неё запрос
+    и следующие запросы пользователя читают основную базу.
+    """
+
+    def __init__(self):
+        self.replica = None
+        self.wrote = False
+
+
+class ReplicaRouter:
+    """Чтение с реплик для представлений только на чтение.
+
+    Реплики перечисляются в BLOG_DATABASE_REPLICAS, запрос
+    к реплике выбирает ReplicaMiddleware. Вне запроса, после записи
+    и внутри транзакции основной базы читается основная база.
+    Для проверки на двух файлах SQLite достаточно добавить
+    в DATABASES алиас replica с копией db.sqlite3.
+    """
+
+    def db_for_read(self, model, **hints):
+        route = current_route.get()
+        if route is None or route.replica is None or route.wrote:
+            return None
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return route.replica
+
+    def db_for_write(self, model, **hints):
+        route = current_route.get()
+        if route is not None:
+            route.wrote = True
+        if replica_aliases():
+            return DEFAULT_DB_ALIAS
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *replica_aliases()}
+        if {obj1._state.db, obj2._state.db} <= databases:
+            return True
+        return None
+
+
+def choose_replica(view_name, namespace, cookies):
+    """Реплика для представления или None, если читать основную базу."""
+    replicas = replica_aliases()
+    views = getattr(settings, 'BLOG_REPLICA_VIEWS', REPLICA_VIEWS)
+    if not replicas or STICKY_COOKIE in cookies:
+        return None
+    if view_name not in views and namespace not in views:
+        return None
+    return random.choice(replicas)
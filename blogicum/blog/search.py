@@ -0,0 +1,118 @@
+import re
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Case, FloatField, Q, Value, When
+from django.db.models.expressions import RawSQL
+
+from .models import Order
+
+SEARCH_TABLE = 'blog_order_search'
+MAX_TERMS = 8
+MAX_RESULTS = 500
+WORD_RE = re.compile(r'\w+')
+# Вес колонок для bm25: модель и номер важнее примечаний.
+FTS5_WEIGHTS = '10.0, 1.0, 10.0'
+
+
+def search_terms(query):
+    """Слова запроса без операторов FTS5 и tsquery."""
+    return WORD_RE.findall((query or '').lower())[:MAX_TERMS]
+
+
+def fts5_query(terms):
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def tsquery(terms):
+    return ' & '.join(f'{term}:*' for term in terms)
+
+
+def search_filter(terms, using):
+    """Условие «все слова встречаются» по индексу записей.
+
+    Индекс создаёт миграция 0013_order_search; на СУБД без него
+    поиск идёт через icontains.
+    """
+    connection = connections[using]
+    if connection.vendor == 'sqlite':
+        return Q(pk__in=RawSQL(
+            f'SELECT rowid FROM {SEARCH_TABLE} '
+            f'WHERE {SEARCH_TABLE} MATCH %s',
+            [fts5_query(terms)]
+        ))
+    if connection.vendor == 'postgresql':
+        table = connection.ops.quote_name(Order._meta.db_table)
+        return Q(pk__in=RawSQL(
+            f'SELECT id FROM {table} '
+            f"WHERE search_vector @@ to_tsquery('russian', %s)",
+            [tsquery(terms)]
+        ))
+    condition = Q()
+    for term in terms:
+        condition &= (
+            Q(car_model__icontains=term)
+            | Q(car_number__icontains=term)
+            | Q(description__icontains=term)
+        )
+    return condition
+
+
+def ranked_matches(terms, using, limit):
+    """[(id, релевантность)] лучших limit совпадений одним запросом.
+
+    Ранжирование идёт по индексу целиком, без подзапроса на каждую
+    найденную запись; на СУБД без индекса возвращается None.
+    """
+    connection = connections[using]
+    table = connection.ops.quote_name(Order._meta.db_table)
+    if connection.vendor == 'sqlite':
+        sql = (
+            f'SELECT rowid, -bm25({SEARCH_TABLE}, {FTS5_WEIGHTS}) AS score '
+            f'FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s '
+            f'ORDER BY score DESC, rowid DESC LIMIT %s'
+        )
+        params = [fts5_query(terms), limit]
+    elif connection.vendor == 'postgresql':
+        sql = (
+            f"SELECT id, ts_rank(search_vector, to_tsquery('russian', %s)) "
+            f'AS score FROM {table} '
+            f"WHERE search_vector @@ to_tsquery('russian', %s) "
+            f'ORDER BY score DESC, id DESC LIMIT %s'
+        )
+        params = [tsquery(terms), tsquery(terms), limit]
+    else:
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def search_orders(queryset, query):
+    """Записи queryset, где встречаются все слова запроса, с полем rank.
+
+    Слова ищутся как префиксы в модели, номере и примечаниях.
+    В выдачу попадают только BLOG_SEARCH_MAX_RESULTS лучших
+    совпадений индекса, поэтому частое слово не заставляет
+    оценивать каждую запись таблицы.
+    """
+    terms = search_terms(query)
+    no_rank = Value(0.0, output_field=FloatField())
+    if not terms:
+        return queryset.annotate(rank=no_rank).none()
+    ranked = ranked_matches(terms, queryset.db, getattr(
+        settings, 'BLOG_SEARCH_MAX_RESULTS', MAX_RESULTS
+    ))
+    if ranked is None:
+        return queryset.filter(
+            search_filter(terms, queryset.db)
+        ).annotate(rank=no_rank)
+    if not ranked:
+        return queryset.annotate(rank=no_rank).none()
+    return queryset.filter(pk__in=[pk for pk, _ in ranked]).annotate(
+        rank=Case(
+            *[When(pk=pk, then=Value(score)) for pk, score in ranked],
+            default=no_rank,
+            output_field=FloatField()
+        )
+    )
@@ -0,0 +1,82 @@
+"""Таблицы FTS5 над blog_order для SQLite.
+
+Таблицы с внешним содержимым держатся в актуальном состоянии
+триггерами. SQLite пересоздаёт таблицу при большинстве изменений схемы
+(AddField, AlterField), и триггеры при этом пропадают, поэтому после
+каждой миграции ensure_indexes() создаёт недостающие и перестраивает
+индекс. Определения повторяют миграции 0013_order_search
+и 0014_order_plate_normalized.
+"""
+
+ORDER_TABLE = 'blog_order'
+INDEXES = {
+    'blog_order_search': {
+        'columns': ('car_model', 'description', 'car_number'),
+        'tokenize': 'unicode61 remove_diacritics 2',
+    },
+    'blog_order_plate': {
+        'columns': ('plate_normalized',),
+        'tokenize': 'trigram',
+    },
+}
+TRIGGERS = ('insert', 'delete', 'update')
+
+
+def trigger_name(name, event):
+    return f'{name}_{event}'
+
+
+def create_statements(name):
+    columns = INDEXES[name]['columns']
+    listed = ', '.join(columns)
+    new = ', '.join(f'new.{column}' for column in columns)
+    old = ', '.join(f'old.{column}' for column in columns)
+    insert = (
+        f'INSERT INTO {name}(rowid, {listed}) VALUES (new.id, {new});'
+    )
+    delete = (
+        f"INSERT INTO {name}({name}, rowid, {listed}) "
+        f"VALUES ('delete', old.id, {old});"
+    )
+    return (
+        f'CREATE VIRTUAL TABLE IF NOT EXISTS {name} USING fts5('
+        f"{listed}, content='{ORDER_TABLE}', content_rowid='id', "
+        f"tokenize='{INDEXES[name]['tokenize']}')",
+        f'CREATE TRIGGER IF NOT EXISTS {trigger_name(name, "insert")} '
+        f'AFTER INSERT ON {ORDER_TABLE} BEGIN {insert} END',
+        f'CREATE TRIGGER IF NOT EXISTS {trigger_name(name, "delete")} '
+        f'AFTER DELETE ON {ORDER_TABLE} BEGIN {delete} END',
+        f'CREATE TRIGGER IF NOT EXISTS {trigger_name(name, "update")} '
+        f'AFTER UPDATE OF {listed} ON {ORDER_TABLE} '
+        f'BEGIN {delete} {insert} END',
+        f"INSERT INTO {name}({name}) VALUES ('rebuild')",
+    )
+
+
+def ensure_indexes(connection, names=None):
+    """Вернуть триггеры, пропавшие после пересоздания blog_order.
+
+    Индекс без триггеров мог отстать от таблицы, поэтому он
+    перестраивается. Возвращает имена восстановленных индексов.
+    """
+    if connection.vendor != 'sqlite':
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger')"
+        )
+        existing = {row[0] for row in cursor.fetchall()}
+        if ORDER_TABLE not in existing:
+            return []
+        restored = []
+        for name in names or INDEXES:
+            if name not in existing:
+                continue
+            if all(
+                trigger_name(name, event) in existing for event in TRIGGERS
+            ):
+                continue
+            for sql in create_statements(name):
+                cursor.execute(sql)
+            restored.append(name)
+    return restored
@@ -0,0 +1,221 @@
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import connections
+from django.db.models import F
+from django.db.models.signals import (
+    post_delete, post_migrate, post_save, pre_save
+)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .blobs import release, retain
+from .models import Box, Order, Review, ServiceType
+from .page_cache import (
+    ALL_FEEDS, feed_name, purge_pages, purge_service_type_pages
+)
+from .paginators import invalidate_feed_counts
+from .ratings import apply, move_order_ratings, review_subjects
+from .rollups import ORDER_FIELDS, order_values, update_rollups
+from .search_index import ensure_indexes
+from .tasks import enqueue, process_car_image
+
+
+@receiver(pre_save, sender=Order)
+def remember_order_feeds(sender, instance, **kwargs):
+    """Запомнить ленты и фото записи до сохранения."""
+    instance._previous_feeds = None
+    if instance.pk:
+        instance._previous_feeds = Order.objects.filter(
+            pk=instance.pk
+        ).values(
+            'client_id', 'car_image', 'car_image_widths', *ORDER_FIELDS
+        ).first()
+
+
+@receiver(post_save, sender=Order)
+@receiver(post_delete, sender=Order)
+def reset_order_feed_counts(sender, instance, **kwargs):
+    service_type_ids = {instance.service_type_id}
+    client_ids = {instance.client_id}
+    previous = getattr(instance, '_previous_feeds', None)
+    if previous:
+        service_type_ids.add(previous['service_type_id'])
+        client_ids.add(previous['client_id'])
+    invalidate_feed_counts(service_type_ids, client_ids)
+    purge_service_type_pages(service_type_ids)
+
+
+@receiver(post_save, sender=Order)
+def refresh_car_image_variants(sender, instance, **kwargs):
+    """Перевесить ссылку на фото и при необходимости обработать его.
+
+    Если тот же файл уже загружали к другой записи, копии готовы
+    и берутся сразу. Иначе обработка ставится в очередь, а до её
+    окончания car_image_widths пуст и карточка показывает заглушку.
+    При loaddata (raw) ссылки на файлы и копии приходят из самого дампа.
+    """
+    if kwargs.get('raw'):
+        return
+    previous = getattr(instance, '_previous_feeds', None) or {}
+    old_name = previous.get('car_image') or ''
+    if instance.car_image.name == old_name:
+        return
+    if old_name:
+        release(instance.car_image.storage, old_name)
+    widths = []
+    if instance.car_image:
+        widths = retain(instance.car_image.name).widths
+        if not widths:
+            enqueue(
+                process_car_image,
+                order_id=instance.pk,
+                name=instance.car_image.name
+            )
+    if widths != instance.car_image_widths:
+        instance.car_image_widths = widths
+        Order.objects.filter(pk=instance.pk).update(car_image_widths=widths)
+
+
+@receiver(post_save, sender=Order)
+def update_revenue_on_save(sender, instance, raw, **kwargs):
+    """Сдвинуть сводки выручки в транзакции сохранения записи.
+
+    Записи из дампа (raw) учитываются командой backfill_revenue.
+    """
+    if raw:
+        return
+    update_rollups(
+        getattr(instance, '_previous_feeds', None), order_values(instance)
+    )
+
+
+@receiver(post_delete, sender=Order)
+def update_revenue_on_delete(sender, instance, **kwargs):
+    update_rollups(order_values(instance), None)
+
+
+@receiver(post_save, sender=Order)
+def move_ratings_with_order(sender, instance, raw, **kwargs):
+    """Перенести оценки в сводки новой услуги, бокса или мойщика."""
+    previous = getattr(instance, '_previous_feeds', None)
+    if raw or not previous:
+        return
+    move_order_ratings(instance.pk, previous, order_values(instance))
+
+
+@receiver(post_delete, sender=Order)
+def release_car_image(sender, instance, **kwargs):
+    """Удалить фото вместе с записью, если на него больше нет ссылок."""
+    if instance.car_image:
+        release(instance.car_image.storage, instance.car_image.name)
+
+
+@receiver(post_delete, sender=Order)
+def drop_order_card(sender, instance, **kwargs):
+    """Удалить кэш карточки удалённой записи, не дожидаясь таймаута."""
+    try:
+        version = instance.card_version
+    except ObjectDoesNotExist:
+        return
+    cache.delete(make_template_fragment_key(
+        'post_card', [instance.pk, version]
+    ))
+
+
+@receiver(post_save, sender=ServiceType)
+@receiver(post_delete, sender=ServiceType)
+def reset_service_type_feed_counts(sender, instance, **kwargs):
+    invalidate_feed_counts(service_type_ids=[instance.pk])
+    purge_pages(
+        feed_name('index'), feed_name('category', instance.slug)
+    )
+
+
+@receiver(post_save, sender=Box)
+@receiver(post_delete, sender=Box)
+def purge_box_pages(sender, instance, **kwargs):
+    """Бокс показан в карточках всех лент — сбросить их все."""
+    purge_pages(ALL_FEEDS)
+
+
+@receiver(pre_save, sender=Review)
+def remember_review_rating(sender, instance, **kwargs):
+    instance._previous_rating = None
+    if instance.pk:
+        instance._previous_rating = Review.objects.filter(
+            pk=instance.pk
+        ).values_list('rating', flat=True).first()
+
+
+@receiver(post_save, sender=Review)
+def count_saved_review(sender, instance, created, raw, **kwargs):
+    """Обновить счётчики записи одним UPDATE без чтения строки.
+
+    При loaddata счётчики уже есть в дампе записи.
+    """
+    if raw:
+        return
+    if created:
+        Order.objects.filter(pk=instance.order_id).update(
+            review_count=F('review_count') + 1,
+            rating_sum=F('rating_sum') + instance.rating,
+            updated_at=timezone.now()
+        )
+        return
+    previous = getattr(instance, '_previous_rating', None)
+    if previous is not None and previous != instance.rating:
+        Order.objects.filter(pk=instance.order_id).update(
+            rating_sum=F('rating_sum') + (instance.rating - previous),
+            updated_at=timezone.now()
+        )
+
+
+@receiver(post_delete, sender=Review)
+def count_deleted_review(sender, instance, **kwargs):
+    Order.objects.filter(pk=instance.order_id).update(
+        review_count=F('review_count') - 1,
+        rating_sum=F('rating_sum') - instance.rating,
+        updated_at=timezone.now()
+    )
+
+
+@receiver(post_save, sender=Review)
+def update_rating_summaries(sender, instance, created, raw, **kwargs):
+    """Учесть оценку в сводках услуги, бокса и мойщика записи."""
+    if raw:
+        return
+    rating = int(instance.rating)
+    if created:
+        histogram = {rating: 1}
+    else:
+        previous = getattr(instance, '_previous_rating', None)
+        if previous is None or previous == rating:
+            return
+        histogram = {rating: 1, previous: -1}
+    subjects = review_subjects(instance)
+    if subjects:
+        apply(subjects, histogram)
+
+
+@receiver(post_delete, sender=Review)
+def remove_rating_from_summaries(sender, instance, **kwargs):
+    subjects = review_subjects(instance)
+    if subjects:
+        apply(subjects, {int(instance.rating): 1}, -1)
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def purge_review_pages(sender, instance, **kwargs):
+    purge_service_type_pages(
+        Order.objects.filter(
+            pk=instance.order_id
+        ).values_list('service_type_id', flat=True)
+    )
+
+
+@receiver(post_migrate)
+def restore_search_triggers(sender, using, **kwargs):
+    if sender.name == 'blog':
+        ensure_indexes(connections[using])
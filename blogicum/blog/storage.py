@@ -0,0 +1,81 @@
+import hashlib
+import posixpath
+import re
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+CONTENT_NAME_RE = re.compile(r'(^|/)[0-9a-f]{2}/[0-9a-f]{64}(\.\w+)?$')
+
+
+def content_digest(content):
+    """SHA-256 содержимого; у загрузок он уже посчитан обработчиком."""
+    digest = getattr(content, 'sha256', None)
+    if digest:
+        return digest
+    hasher = hashlib.sha256()
+    for chunk in content.chunks():
+        hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+class AlreadyStored(Exception):
+    """Файл с таким содержимым уже лежит в хранилище."""
+
+
+def content_name(name, digest):
+    """cars/photo.JPG -> cars/3f/3f9c…e1.jpg: имя зависит только от байтов.
+
+    Для имени, уже построенного по хэшу, каталог берётся прежний:
+    cars/3f/3f9c…e1.jpg -> cars/a0/a0b1…77.jpg.
+    """
+    directory, filename = posixpath.split(name)
+    if is_content_name(name):
+        directory = posixpath.dirname(directory)
+    extension = posixpath.splitext(filename)[1].lower()
+    return posixpath.join(directory, digest[:2], digest + extension)
+
+
+def is_content_name(name):
+    return bool(CONTENT_NAME_RE.search(name))
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """Хранилище, где одинаковые файлы лежат на диске один раз.
+
+    Имя файла — хэш его содержимого, поэтому повторная загрузка того же
+    фото не пишет ничего нового, а возвращает уже сохранённое имя.
+    Сколько записей ссылается на файл, считает MediaBlob (см. blobs);
+    загрузка файла, который уже заменён очищенной копией, сразу
+    получает имя копии. Производные файлы пишутся под точным именем
+    через open(name, 'wb').
+    """
+
+    def save(self, name, content, max_length=None):
+        from .blobs import replacement
+
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = content_name(name, content_digest(content))
+        replaced_by = replacement(name)
+        if replaced_by:
+            return replaced_by
+        try:
+            return super().save(name, content, max_length)
+        except AlreadyStored:
+            return name
+
+    def get_available_name(self, name, max_length=None):
+        """Занятое имя значит те же байты, поэтому файл не пишется.
+
+        Проверка повторяется и при гонке, когда параллельная загрузка
+        успела создать файл между exists() и записью: вместо файла
+        с суффиксом save() вернёт уже сохранённое имя.
+        """
+        if self.exists(name):
+            raise AlreadyStored(name)
+        return name
@@ -0,0 +1,106 @@
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .blobs import prepare_blob
+from .models import Order, Task
+from .page_cache import purge_service_type_pages
+
+MAX_ATTEMPTS = 3
+RETRY_DELAY = timedelta(seconds=30)
+STALE_AFTER = timedelta(minutes=10)
+
+registry = {}
+
+
+def task(function):
+    """Зарегистрировать функцию как фоновую задачу по её имени."""
+    registry[function.__name__] = function
+    return function
+
+
+def enqueue(function, **kwargs):
+    """Поставить задачу в очередь в текущей транзакции.
+
+    Строка задачи создаётся вместе с данными, которые её породили:
+    воркеры увидят её только после фиксации, а при откате она
+    исчезнет вместе с ними. С настройкой BLOG_TASKS_EAGER задача
+    выполняется в том же процессе сразу после фиксации — так удобнее
+    в тестах и при разработке без воркера.
+    """
+    created = Task.objects.create(name=function.__name__, kwargs=kwargs)
+    if getattr(settings, 'BLOG_TASKS_EAGER', False):
+        transaction.on_commit(lambda: run_task(created.pk))
+    return created
+
+
+def claim_tasks(limit):
+    """Забрать до limit задач из очереди.
+
+    Задача считается своей, только если условный UPDATE перевёл её
+    из pending в running, поэтому два воркера не возьмут одну задачу
+    ни на одной СУБД.
+    """
+    now = timezone.now()
+    Task.objects.filter(
+        status=Task.RUNNING, started_at__lt=now - STALE_AFTER
+    ).update(status=Task.PENDING)
+    candidates = Task.objects.filter(
+        status=Task.PENDING, run_after__lte=now
+    ).order_by('run_after', 'id').values_list('pk', flat=True)[:limit]
+    claimed = []
+    for pk in candidates:
+        if Task.objects.filter(pk=pk, status=Task.PENDING).update(
+            status=Task.RUNNING, started_at=now
+        ):
+            claimed.append(pk)
+    return claimed
+
+
+def run_task(pk):
+    """Выполнить задачу и записать результат; ошибки не пробрасываются."""
+    current = Task.objects.get(pk=pk)
+    attempts = current.attempts + 1
+    try:
+        registry[current.name](**current.kwargs)
+    except Exception:
+        retry = attempts < getattr(
+            settings, 'BLOG_TASK_ATTEMPTS', MAX_ATTEMPTS
+        )
+        Task.objects.filter(pk=pk).update(
+            status=Task.PENDING if retry else Task.FAILED,
+            attempts=attempts,
+            error=traceback.format_exc(),
+            run_after=timezone.now() + RETRY_DELAY * attempts,
+            finished_at=None if retry else timezone.now()
+        )
+        return False
+    Task.objects.filter(pk=pk).update(
+        status=Task.DONE,
+        attempts=attempts,
+        error='',
+        finished_at=timezone.now()
+    )
+    return True
+
+
+@task
+def process_car_image(order_id, name):
+    """Очистить фото от метаданных и создать уменьшенные копии.
+
+    Очищенное фото получает новое имя, поэтому ширины и новое имя
+    достаются всем записям с этим файлом, а не только order_id.
+    """
+    order = Order.objects.filter(pk=order_id).only(
+        'pk', 'car_image', 'service_type_id'
+    ).first()
+    if order is None or order.car_image.name != name:
+        return
+    name, widths = prepare_blob(order.car_image)
+    orders = Order.objects.filter(car_image=name)
+    service_type_ids = set(orders.values_list('service_type_id', flat=True))
+    orders.update(car_image_widths=widths, updated_at=timezone.now())
+    purge_service_type_pages(service_type_ids)
@@ -0,0 +1,39 @@
+from django import template
+
+from blog.images import VARIANT_FORMATS, variant_name
+
+register = template.Library()
+
+FALLBACK_WIDTH = 640
+
+
+@register.inclusion_tag('includes/car_picture.html')
+def car_picture(order, css_class='', placeholder=False):
+    """<picture> с WebP/JPEG srcset по готовым уменьшенным копиям.
+
+    С placeholder=True, пока копии не готовы, вместо полноразмерного
+    оригинала выводится заглушка.
+    """
+    image = order.car_image
+    widths = sorted(order.car_image_widths or [])
+    storage = image.storage
+    sources = {
+        extension: ', '.join(
+            f'{storage.url(variant_name(image.name, width, extension))} '
+            f'{width}w'
+            for width in widths
+        )
+        for extension in VARIANT_FORMATS
+    }
+    fallback = image.url
+    if widths:
+        width = max([w for w in widths if w <= FALLBACK_WIDTH] or widths[:1])
+        fallback = storage.url(variant_name(image.name, width, 'jpeg'))
+    return {
+        'original_url': image.url,
+        'webp_srcset': sources['webp'] if widths else '',
+        'jpeg_srcset': sources['jpeg'] if widths else '',
+        'src': fallback,
+        'css_class': css_class,
+        'pending': placeholder and not widths,
+    }
@@ -0,0 +1,154 @@
+import hashlib
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import (
+    StopFutureHandlers, TemporaryFileUploadHandler
+)
+from django.template.defaultfilters import filesizeformat
+from PIL import Image
+
+MAX_UPLOAD_BYTES = 10 * 1024 * 1024
+MAX_IMAGE_PIXELS = 40_000_000
+HEADER_MIN_BYTES = 16 * 1024
+HEADER_MAX_BYTES = 512 * 1024
+ALLOWED_FORMATS = ('JPEG', 'PNG', 'WEBP', 'GIF')
+IMAGE_FIELDS = ('car_image',)
+
+TOO_LARGE_MESSAGE = 'Файл больше {}.'
+TOO_MANY_PIXELS_MESSAGE = 'Изображение больше {} мегапикселей.'
+NOT_AN_IMAGE_MESSAGE = 'Загрузите фото в формате JPEG, PNG, WebP или GIF.'
+
+
+def max_upload_bytes():
+    return getattr(settings, 'BLOG_UPLOAD_MAX_BYTES', MAX_UPLOAD_BYTES)
+
+
+def max_image_pixels():
+    return getattr(settings, 'BLOG_UPLOAD_MAX_PIXELS', MAX_IMAGE_PIXELS)
+
+
+def too_large_message():
+    return TOO_LARGE_MESSAGE.format(filesizeformat(max_upload_bytes()))
+
+
+def inspect_header(header, complete=False):
+    """Проверить изображение по первым байтам, не декодируя пиксели.
+
+    Pillow при открытии читает только заголовок, поэтому размеры
+    и формат известны до распаковки. Возвращает текст ошибки,
+    None, если всё в порядке, или False, если байтов пока мало
+    для решения.
+    """
+    pixels_message = TOO_MANY_PIXELS_MESSAGE.format(
+        max_image_pixels() // 10 ** 6
+    )
+    try:
+        with Image.open(BytesIO(header)) as image:
+            image_format, (width, height) = image.format, image.size
+    except Image.DecompressionBombError:
+        return pixels_message
+    except Exception:
+        if complete or len(header) >= HEADER_MAX_BYTES:
+            return NOT_AN_IMAGE_MESSAGE
+        return False
+    if image_format not in ALLOWED_FORMATS:
+        return NOT_AN_IMAGE_MESSAGE
+    if width * height > max_image_pixels():
+        return pixels_message
+    return None
+
+
+def check_upload(uploaded):
+    """Те же проверки для файла, который пришёл в обход обработчика."""
+    error = getattr(uploaded, 'upload_error', None)
+    if error:
+        return error
+    if uploaded.size is not None and uploaded.size > max_upload_bytes():
+        return too_large_message()
+    position = uploaded.tell()
+    uploaded.seek(0)
+    header = uploaded.read(HEADER_MAX_BYTES)
+    uploaded.seek(position)
+    return inspect_header(header, complete=True)
+
+
+class RejectedUpload(UploadedFile):
+    """Пустой файл на месте отклонённого, с причиной для формы."""
+
+    def __init__(self, name, content_type, charset, error):
+        super().__init__(BytesIO(), name, content_type, 0, charset)
+        self.upload_error = error
+
+
+class BoundedImageUploadHandler(TemporaryFileUploadHandler):
+    """Писать загрузку на диск по частям и обрывать её как можно раньше.
+
+    Файл не копится в памяти: каждый кусок сразу уходит во временный
+    файл, а по пути считается его SHA-256 для хранилища по содержимому.
+    Как только набралось байтов на заголовок, проверяются формат
+    и число пикселей, а при превышении любого лимита временный файл
+    удаляется и остаток загрузки отбрасывается. Форма получает
+    RejectedUpload и показывает причину.
+
+    Обрабатываются только поля из IMAGE_FIELDS (их формы используют
+    BoundedImageField); остальные файлы без изменений проходят
+    к стандартным обработчикам Django, которые стоят следом
+    в FILE_UPLOAD_HANDLERS.
+    """
+
+    def new_file(self, field_name, *args, **kwargs):
+        self.active = field_name in IMAGE_FIELDS
+        if not self.active:
+            return
+        self.header = b''
+        self.received = 0
+        self.error = None
+        self.checked = False
+        self.digest = hashlib.sha256()
+        super().new_file(field_name, *args, **kwargs)
+        if self.content_length and self.content_length > max_upload_bytes():
+            self.reject(too_large_message())
+        raise StopFutureHandlers
+
+    def reject(self, error):
+        self.error = error
+        self.file.close()
+
+    def receive_data_chunk(self, raw_data, start):
+        if not self.active:
+            return raw_data
+        if self.error:
+            return None
+        self.received += len(raw_data)
+        if self.received > max_upload_bytes():
+            self.reject(too_large_message())
+            return None
+        if not self.checked:
+            self.header += raw_data[:HEADER_MAX_BYTES - len(self.header)]
+            if len(self.header) >= HEADER_MIN_BYTES:
+                error = inspect_header(self.header)
+                if error is not False:
+                    self.checked = True
+                    self.header = b''
+                    if error:
+                        self.reject(error)
+                        return None
+        self.digest.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        if not self.active:
+            return None
+        if not self.error and not self.checked:
+            error = inspect_header(self.header, complete=True)
+            if error:
+                self.reject(error)
+        if self.error:
+            return RejectedUpload(
+                self.file_name, self.content_type, self.charset, self.error
+            )
+        uploaded = super().file_complete(file_size)
+        uploaded.sha256 = self.digest.hexdigest()
+        return uploaded
@@ -13,6 +13,7 @@ urlpatterns = [
         name='category_posts'
     ),
     path('posts/create/', views.create_post, name='create_post'),
+    path('slots/', views.free_slots, name='free_slots'),
     path('posts/<int:post_id>/edit/', views.edit_post, name='edit_post'),
     path('posts/<int:post_id>/delete/', views.delete_post, name='delete_post'),
     path('profile/<str:username>/', views.profile, name='profile'),
@@ -28,4 +29,18 @@ urlpatterns = [
         views.delete_comment,
         name='delete_comment'
     ),
+    path('search/', views.search, name='search'),
+    path('plates/lookup/', views.plate_lookup, name='plate_lookup'),
+    path('export/orders/', views.export_orders, name='export_orders'),
+    path(
+        'dashboard/revenue/',
+        views.revenue_dashboard,
+        name='revenue_dashboard'
+    ),
+    path('metrics/', views.request_metrics, name='request_metrics'),
+    path(
+        'metrics/json/',
+        views.request_metrics_json,
+        name='request_metrics_json'
+    ),
 ]
@@ -1,49 +1,109 @@
+from datetime import timedelta
+
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.forms import UserCreationForm
-from django.core.paginator import Paginator
-from django.db.models import Count
+from django.db.models import Max
+from django.http import JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
-from django.urls import reverse_lazy
+from django.urls import reverse, reverse_lazy
 from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django.utils.http import urlencode
+from django.views.decorators.http import condition
+from django.views.decorators.vary import vary_on_cookie
 from django.views.generic import CreateView
 
+from .availability import DayAvailability
+from .booking import SlotUnavailable, place_order
+from .exports import (
+    CONTENT_TYPES, ExportError, export_lines, export_queryset, export_rows,
+    parse_day
+)
 from .forms import OrderForm, ReviewForm, UserEditForm
+from .metrics import FIELDS, PERCENTILES, buffer
 from .models import Box, Order, Review, ServiceType
+from .page_cache import cache_anonymous_page
+from .paginators import (
+    POSTS_PER_PAGE, CachedCountPaginator, feed_count_key, paginate_orders
+)
+from .plates import MIN_PLATE_LENGTH, find_plates
+from .rollups import revenue_report
+from .search import search_orders
 
 User = get_user_model()
 
+SLOT_TAKEN_MESSAGE = 'Это время в выбранном боксе только что заняли.'
+REVENUE_DAYS = 30
+
 
+@cache_anonymous_page('index')
 def index(request):
-    order_list = Order.objects.select_related(
-        'service_type', 'box', 'client', 'washer'
-    ).filter(
-        is_published=True,
-        service_type__is_published=True,
-        appointment_date__lte=timezone.now()
-    ).annotate(
-        comment_count=Count('reviews')
-    ).order_by('-appointment_date')
-    paginator = Paginator(order_list, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    visible_orders = Order.objects.published()
+    order_list = visible_orders.for_cards().order_by(
+        '-appointment_date', '-id'
+    )
+    page_obj = paginate_orders(
+        request,
+        order_list,
+        count_key=feed_count_key('index'),
+        count_queryset=visible_orders
+    )
     context = {'page_obj': page_obj}
     return render(request, 'blog/index.html', context)
 
 
+def _post_detail_state(request, id):
+    """Метки изменения записи и её отзывов одним запросом.
+
+    Результат запоминается на объекте запроса: его используют ETag,
+    Last-Modified и сама view. Для записи, которую пользователю видеть
+    нельзя, возвращается None.
+    """
+    if not hasattr(request, '_post_detail_state'):
+        request._post_detail_state = Order.objects.page_visible_to(
+            request.user
+        ).filter(pk=id).annotate(
+            last_review=Max('reviews__updated_at')
+        ).values('updated_at', 'last_review').first()
+    return request._post_detail_state
+
+
+def _post_detail_last_modified(request, id):
+    state = _post_detail_state(request, id)
+    if state is None:
+        return None
+    return max(filter(None, (state['updated_at'], state['last_review'])))
+
+
+def _post_detail_etag(request, id):
+    state = _post_detail_state(request, id)
+    if state is None:
+        return None
+    # Страница зависит от пользователя: кнопки автора и форма отзыва.
+    return '{}-{}-{}'.format(
+        id,
+        _post_detail_last_modified(request, id).timestamp(),
+        request.user.pk or 0
+    )
+
+
+@vary_on_cookie
+@condition(
+    etag_func=_post_detail_etag,
+    last_modified_func=_post_detail_last_modified
+)
 def post_detail(request, id):
     order = get_object_or_404(
         Order.objects.select_related(
             'service_type', 'box', 'client', 'washer'
-        ),
+        ).with_final_price(),
         id=id
     )
-    if not order.client == request.user:
-        if (not order.is_published or
-                (order.service_type and not order.service_type.is_published) or
-                order.appointment_date > timezone.now()):
-            return redirect('blog:index')
-    reviews = order.reviews.all()
+    if _post_detail_state(request, id) is None:
+        return redirect('blog:index')
+    reviews = order.reviews.select_related('author')
     form = ReviewForm()
     context = {
         'post': order,
@@ -53,24 +113,25 @@ def post_detail(request, id):
     return render(request, 'blog/detail.html', context)
 
 
+@cache_anonymous_page('category', slug_kwarg='category_slug')
 def category_posts(request, category_slug):
     service_type = get_object_or_404(
-        ServiceType,
+        ServiceType.objects.select_related('rating_summary'),
         slug=category_slug,
         is_published=True
     )
-    order_list = Order.objects.select_related(
-        'service_type', 'box', 'client', 'washer'
-    ).filter(
-        service_type=service_type,
-        is_published=True,
-        appointment_date__lte=timezone.now()
-    ).annotate(
-        comment_count=Count('reviews')
-    ).order_by('-appointment_date')
-    paginator = Paginator(order_list, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    visible_orders = Order.objects.published().filter(
+        service_type=service_type
+    )
+    order_list = visible_orders.for_cards().order_by(
+        '-appointment_date', '-id'
+    )
+    page_obj = paginate_orders(
+        request,
+        order_list,
+        count_key=feed_count_key('category', service_type.pk),
+        count_queryset=visible_orders
+    )
     context = {
         'category': service_type,
         'page_obj': page_obj
@@ -78,6 +139,36 @@ def category_posts(request, category_slug):
     return render(request, 'blog/category.html', context)
 
 
+def free_slots(request):
+    """Свободные слоты услуги на день в JSON для страницы записи."""
+    service_type = get_object_or_404(
+        ServiceType,
+        slug=request.GET.get('service', ''),
+        is_published=True
+    )
+    try:
+        day = parse_date(request.GET.get('date', ''))
+    except ValueError:
+        day = None
+    if day is None:
+        return JsonResponse(
+            {'error': 'Укажите дату в формате ГГГГ-ММ-ДД.'}, status=400
+        )
+    slots = DayAvailability(day).free_slots(service_type)
+    return JsonResponse({
+        'service': service_type.slug,
+        'date': day.isoformat(),
+        'duration': service_type.duration,
+        'slots': [
+            {
+                'start': timezone.localtime(start).isoformat(),
+                'boxes': [{'id': box.pk, 'name': box.name} for box in boxes],
+            }
+            for start, boxes in slots
+        ],
+    })
+
+
 @login_required
 def create_post(request):
     form = OrderForm(request.POST or None, files=request.FILES or None)
@@ -86,8 +177,12 @@ def create_post(request):
         order.client = request.user
         if order.service_type:
             order.price = order.service_type.price
-        order.save()
-        return redirect('blog:profile', username=request.user.username)
+        try:
+            place_order(order)
+        except SlotUnavailable:
+            form.add_error('appointment_date', SLOT_TAKEN_MESSAGE)
+        else:
+            return redirect('blog:profile', username=request.user.username)
     return render(request, 'blog/create.html', {'form': form})
 
 
@@ -102,8 +197,12 @@ def edit_post(request, post_id):
         instance=order
     )
     if form.is_valid():
-        form.save()
-        return redirect('blog:post_detail', id=post_id)
+        try:
+            place_order(form.save(commit=False))
+        except SlotUnavailable:
+            form.add_error('appointment_date', SLOT_TAKEN_MESSAGE)
+        else:
+            return redirect('blog:post_detail', id=post_id)
     return render(request, 'blog/create.html', {'form': form})
 
 
@@ -121,16 +220,16 @@ def delete_post(request, post_id):
 
 def profile(request, username):
     profile_user = get_object_or_404(User, username=username)
-    order_list = Order.objects.filter(
-        client=profile_user
-    ).select_related(
-        'service_type', 'box', 'client', 'washer'
-    ).annotate(
-        comment_count=Count('reviews')
-    ).order_by('-appointment_date')
-    paginator = Paginator(order_list, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    client_orders = Order.objects.filter(client=profile_user)
+    order_list = client_orders.for_cards().order_by(
+        '-appointment_date', '-id'
+    )
+    page_obj = paginate_orders(
+        request,
+        order_list,
+        count_key=feed_count_key('profile', profile_user.pk),
+        count_queryset=client_orders
+    )
     context = {
         'profile': profile_user,
         'page_obj': page_obj
@@ -138,6 +237,24 @@ def profile(request, username):
     return render(request, 'blog/profile.html', context)
 
 
+def search(request):
+    """Поиск по модели, номеру и примечаниям; лучшие совпадения первыми."""
+    query = request.GET.get('q', '').strip()
+    matches = search_orders(Order.objects.visible_to(request.user), query)
+    order_list = matches.for_cards().order_by(
+        '-rank', '-appointment_date', '-id'
+    )
+    page_obj = CachedCountPaginator(
+        order_list, POSTS_PER_PAGE, count_queryset=matches
+    ).get_page(request.GET.get('page'))
+    context = {
+        'query': query,
+        'page_obj': page_obj,
+        'page_query': urlencode({'q': query}) + '&' if query else '',
+    }
+    return render(request, 'blog/search.html', context)
+
+
 @login_required
 def edit_profile(request):
     form = UserEditForm(
@@ -189,3 +306,115 @@ class RegistrationView(CreateView):
     form_class = UserCreationForm
     template_name = 'registration/registration_form.html'
     success_url = reverse_lazy('login')
+
+
+@staff_member_required
+def request_metrics(request):
+    """Перцентили числа запросов и времени по представлениям."""
+    rows = [
+        {
+            'view_name': view_name,
+            'count': summary['count'],
+            'values': [
+                [summary[field][f'p{rank}'] for rank in PERCENTILES]
+                for field in FIELDS
+            ],
+        }
+        for view_name, summary in buffer.summary().items()
+    ]
+    context = {'rows': rows, 'percentiles': PERCENTILES}
+    return render(request, 'blog/metrics.html', context)
+
+
+@staff_member_required
+def request_metrics_json(request):
+    return JsonResponse({
+        'percentiles': [f'p{rank}' for rank in PERCENTILES],
+        'views': buffer.summary(),
+    })
+
+
+@staff_member_required
+def export_orders(request):
+    """Выгрузка записей для бухгалтерии в CSV или JSONL потоком."""
+    export_format = request.GET.get('format', 'csv')
+    try:
+        orders = export_queryset(
+            date_from=request.GET.get('date_from'),
+            date_to=request.GET.get('date_to'),
+            statuses=request.GET.getlist('status'),
+        )
+        lines = export_lines(export_format, export_rows(orders))
+    except ExportError as error:
+        return JsonResponse({'error': str(error)}, status=400)
+    response = StreamingHttpResponse(
+        lines, content_type=CONTENT_TYPES[export_format]
+    )
+    filename = f'orders-{timezone.localdate():%Y%m%d}.{export_format}'
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+@staff_member_required
+def revenue_dashboard(request):
+    """Выручка по услугам, боксам и мойщикам из дневных сводок."""
+    date_to = timezone.localdate()
+    date_from = date_to - timedelta(days=REVENUE_DAYS - 1)
+    message = None
+    try:
+        date_from = parse_day(request.GET.get('date_from'), 'date_from') or (
+            date_from
+        )
+        date_to = parse_day(request.GET.get('date_to'), 'date_to') or date_to
+    except ExportError as error:
+        message = str(error)
+    context = {
+        'date_from': date_from,
+        'date_to': date_to,
+        'error': message,
+    }
+    report = revenue_report(date_from, date_to)
+    context['total'] = report['total']
+    context['sections'] = [
+        ('По услугам', report['by_service']),
+        ('По боксам', report['by_box']),
+        ('По мойщикам', report['by_washer']),
+        ('По дням', report['by_day']),
+    ]
+    return render(
+        request, 'blog/revenue.html', context, status=400 if message else 200
+    )
+
+
+@staff_member_required
+def plate_lookup(request):
+    """Записи по гос. номеру в любом написании: точные и похожие."""
+    plate, exact, similar = find_plates(
+        Order.objects.select_related('client'), request.GET.get('plate', '')
+    )
+    if len(plate) < MIN_PLATE_LENGTH:
+        return JsonResponse(
+            {'error': f'Укажите хотя бы {MIN_PLATE_LENGTH} символа номера.'},
+            status=400
+        )
+
+    def describe(order):
+        return {
+            'id': order.pk,
+            'car_number': order.car_number,
+            'car_model': order.car_model,
+            'client': order.client.username,
+            'appointment_date': timezone.localtime(
+                order.appointment_date
+            ).isoformat(),
+            'url': reverse('blog:post_detail', args=[order.pk]),
+        }
+
+    return JsonResponse({
+        'plate': plate,
+        'exact': [describe(order) for order in exact],
+        'similar': [
+            {**describe(order), 'similarity': round(score, 2)}
+            for order, score in similar
+        ],
+    })
@@ -0,0 +1,21 @@
+"""Точки входа для дочерних процессов воркера.
+
+Модуль не импортирует модели при загрузке: при запуске через spawn
+дочерний процесс сначала вызывает setup_process, и только потом
+получает задачи.
+"""
+import django
+from django.db import connections
+
+
+def setup_process():
+    django.setup()
+
+
+def execute(pk):
+    from .tasks import run_task
+
+    try:
+        return run_task(pk)
+    finally:
+        connections.close_all()
@@ -1,6 +1,8 @@
 from django.shortcuts import render
 from django.views.generic import TemplateView
 
+from blog.models import ServiceType
+
 
 def csrf_failure(request, reason=''):
     return render(request, 'pages/403csrf.html', status=403)
@@ -20,3 +22,11 @@ class AboutPageView(TemplateView):
 
 class RulesPageView(TemplateView):
     template_name = 'pages/rules.html'
+
+    def get_context_data(self, **kwargs):
+        """Прайс-лист со средними оценками из сводок, без чтения отзывов."""
+        context = super().get_context_data(**kwargs)
+        context['services'] = ServiceType.objects.filter(
+            is_published=True
+        ).select_related('rating_summary').order_by('title')
+        return context
@@ -0,0 +1,54 @@
+from datetime import timedelta
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils import timezone
+from mixer.backend.django import mixer
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def client_user():
+    return mixer.blend(get_user_model())
+
+
+@pytest.fixture
+def service_type():
+    return mixer.blend(
+        "blog.ServiceType", is_published=True, price="1000.00"
+    )
+
+
+@pytest.fixture
+def box():
+    return mixer.blend("blog.Box", is_published=True, capacity=2)
+
+
+@pytest.fixture
+def published_orders(client_user, service_type, box):
+    """25 записей в прошлом; у каждой пятой — одинаковое время."""
+    now = timezone.now()
+    dates = (
+        now - timedelta(hours=(i // 5) * 5 + 1) if i % 5 == 0
+        else now - timedelta(hours=i + 1)
+        for i in range(25)
+    )
+    return mixer.cycle(25).blend(
+        "blog.Order",
+        client=client_user,
+        service_type=service_type,
+        box=box,
+        washer=None,
+        car_image="",
+        is_published=True,
+        price="1000.00",
+        discount="10.00",
+        appointment_date=dates,
+    )
@@ -0,0 +1,12 @@
+import pytest
+
+from blog.query_budget import query_budget
+
+
+@pytest.fixture
+def max_queries():
+    """Контекстный менеджер: не больше limit запросов к базе в блоке.
+
+    Пример: with max_queries(5): client.get('/').
+    """
+    return query_budget
@@ -0,0 +1,11 @@
+"""Настройки дочерних процессов run_worker в тестах.
+
+Процессы пула запускаются через spawn и не видят тестовую базу
+в памяти, поэтому читают копию из файла BLOG_WORKER_DATABASE.
+"""
+import os
+
+from blogicum.settings import *  # noqa:F401,F403
+from blogicum.settings import DATABASES
+
+DATABASES['default']['NAME'] = os.environ['BLOG_WORKER_DATABASE']
@@ -0,0 +1,84 @@
+from datetime import timedelta
+
+import pytest
+from django.test import Client
+from django.utils import timezone
+from mixer.backend.django import mixer
+
+from blog.availability import BoxSchedule, DayAvailability, box_has_room
+from blog.models import Box, Order
+from fixtures.orders import (  # noqa:F401
+    box, clear_cache, client_user, service_type)
+
+
+def _tomorrow_at(hour, minute=0):
+    day = timezone.localtime() + timedelta(days=1)
+    return day.replace(hour=hour, minute=minute, second=0, microsecond=0)
+
+
+def _book(box, service_type, client_user, start):
+    return mixer.blend(
+        Order, box=box, service_type=service_type, client=client_user,
+        washer=None, car_image='', is_published=True, status='pending',
+        appointment_date=start
+    )
+
+
+def test_box_schedule_counts_overlaps():
+    schedule = BoxSchedule(Box(capacity=2))
+    start = _tomorrow_at(10)
+    schedule.add(start, start + timedelta(hours=1))
+    schedule.add(start + timedelta(minutes=30), start + timedelta(hours=2))
+    assert schedule.peak_load(start, start + timedelta(hours=1)) == 2
+    assert schedule.peak_load(
+        start + timedelta(hours=1), start + timedelta(hours=2)
+    ) == 1
+    assert not schedule.has_room(start, start + timedelta(hours=1))
+    assert schedule.has_room(
+        start + timedelta(hours=2), start + timedelta(hours=3)
+    )
+
+
+@pytest.mark.django_db
+def test_full_box_rejects_booking(box, service_type, client_user):
+    start = _tomorrow_at(10)
+    _book(box, service_type, client_user, start)
+    assert box_has_room(box, start, service_type)
+    second = _book(box, service_type, client_user, start)
+    assert not box_has_room(box, start + timedelta(minutes=30), service_type)
+    assert box_has_room(box, start, service_type, exclude_order_id=second.pk)
+
+    client = Client()
+    client.force_login(client_user)
+    response = client.post('/posts/create/', {
+        'car_model': 'Lada',
+        'car_number': 'A123BC77',
+        'appointment_date': start.strftime('%Y-%m-%d %H:%M:%S'),
+        'box': box.pk,
+        'service_type': service_type.pk,
+    })
+    assert response.status_code == 200
+    assert 'appointment_date' in response.context['form'].errors
+    assert Order.objects.count() == 2
+
+
+@pytest.mark.django_db
+def test_free_slots_endpoint(box, service_type, client_user):
+    start = _tomorrow_at(10)
+    _book(box, service_type, client_user, start)
+    _book(box, service_type, client_user, start)
+    availability = DayAvailability(start.date())
+    free_starts = [slot for slot, _ in availability.free_slots(service_type)]
+    assert start not in free_starts
+    assert start + timedelta(hours=1) in free_starts
+
+    response = Client().get(
+        '/slots/',
+        {'service': service_type.slug, 'date': start.date().isoformat()}
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data['slots'][0]['boxes'] == [{'id': box.pk, 'name': box.name}]
+    assert Client().get(
+        '/slots/', {'service': service_type.slug, 'date': 'завтра'}
+    ).status_code == 400
@@ -0,0 +1,43 @@
+import pytest
+from django.db.models import Count, Sum
+
+from blog.benchmark import compare_results, run_benchmark, seed_dataset
+from blog.models import Order, Review
+from fixtures.orders import clear_cache  # noqa:F401
+
+
+@pytest.mark.django_db
+def test_seed_dataset_counts_and_counters():
+    dataset = seed_dataset(300, batch_size=50)
+    assert Order.objects.count() == dataset['orders'] == 300
+    assert Review.objects.count() == dataset['reviews']
+    for order in Order.objects.annotate(
+        reviews_total=Count('reviews'), ratings_total=Sum('reviews__rating')
+    ):
+        assert order.review_count == order.reviews_total
+        assert order.rating_sum == (order.ratings_total or 0)
+    order = Order.objects.create(
+        car_model='Lada', car_number='A1', appointment_date=(
+            Order.objects.first().appointment_date
+        ), client_id=Order.objects.first().client_id
+    )
+    assert order.pk == 301, 'Последовательность id должна быть сдвинута.'
+
+
+@pytest.mark.django_db
+def test_run_benchmark_reports_every_view():
+    seed_dataset(200, batch_size=100)
+    results = run_benchmark(requests=3, warmup=1)
+    assert set(results) == {
+        'index', 'category_posts', 'profile', 'post_detail', 'create_post'
+    }
+    for name, stats in results.items():
+        assert stats['errors'] == 0, name
+        assert stats['rps'] > 0
+        assert set(stats['latency_ms']) == {
+            'mean', 'p50', 'p95', 'p99', 'max'
+        }
+        assert stats['queries']['p50'] > 0
+    assert Order.objects.count() == 204, 'create_post создаёт записи.'
+    lines = compare_results({'views': results}, {'views': results})
+    assert 'index p50' in lines[0] and '(+0.0%)' in lines[0]
@@ -0,0 +1,59 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from threading import Barrier
+
+import pytest
+from django.db import connection
+from django.test import override_settings
+from django.utils import timezone
+
+from blog.booking import SlotUnavailable, place_order, slot_starts
+from blog.models import Order
+from fixtures.orders import (  # noqa:F401
+    box, clear_cache, client_user, service_type)
+
+WRITERS = 50
+
+
+def test_overlapping_intervals_share_a_slot():
+    start = timezone.now().replace(minute=50, second=0, microsecond=0)
+    first = set(slot_starts(start, start + timedelta(hours=1)))
+    second = set(slot_starts(
+        start + timedelta(minutes=35), start + timedelta(hours=1, minutes=35)
+    ))
+    assert first & second
+
+
+@pytest.mark.django_db(transaction=True)
+@override_settings(BLOG_BOOKING_ATTEMPTS=WRITERS * 2)
+def test_parallel_bookings_do_not_overbook(box, service_type, client_user):
+    start = (timezone.now() + timedelta(days=1)).replace(
+        hour=10, minute=0, second=0, microsecond=0
+    )
+    barrier = Barrier(WRITERS)
+
+    def book(number):
+        order = Order(
+            car_model='Lada',
+            car_number=f'A{number:03}BC77',
+            appointment_date=start + timedelta(minutes=number % 3 * 10),
+            client=client_user,
+            box=box,
+            service_type=service_type,
+        )
+        barrier.wait()
+        try:
+            place_order(order)
+            return True
+        except SlotUnavailable:
+            return False
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=WRITERS) as executor:
+        results = list(executor.map(book, range(WRITERS)))
+
+    assert sum(results) == box.capacity, (
+        "Параллельные записи не должны превышать вместимость бокса."
+    )
+    assert Order.objects.filter(box=box).count() == box.capacity
@@ -0,0 +1,97 @@
+import io
+import json
+
+import pytest
+from django.core import serializers
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from mixer.backend.django import mixer
+
+from blog.bulk_load import iter_json_array
+from blog.models import Box, Order, Review, ServiceType
+from fixtures.orders import (  # noqa:F401
+    box, clear_cache, client_user, published_orders, service_type)
+
+MODELS = ('auth.user', 'blog.servicetype', 'blog.box', 'blog.order',
+          'blog.review')
+
+
+def test_iter_json_array_across_chunk_boundaries():
+    items = [{'model': 'x', 'pk': i, 'fields': {'text': 'é, ] [' * i}}
+             for i in range(50)]
+    dump = json.dumps(items, ensure_ascii=False, indent=2)
+    assert list(iter_json_array(io.StringIO(dump), chunk_size=7)) == items
+    assert list(iter_json_array(io.StringIO('[ ]'))) == []
+    with pytest.raises(ValueError):
+        list(iter_json_array(io.StringIO(dump[:-20]), chunk_size=7))
+
+
+def _snapshot():
+    return json.loads(serializers.serialize('json', [
+        *ServiceType.objects.order_by('pk'),
+        *Box.objects.order_by('pk'),
+        *Order.objects.order_by('pk'),
+        *Review.objects.order_by('pk'),
+    ]))
+
+
+@pytest.fixture
+def dump(tmp_path, published_orders, client_user):
+    for order in published_orders[:5]:
+        mixer.cycle(3).blend('blog.Review', order=order, author=client_user)
+    path = tmp_path / 'dump.json'
+    with open(path, 'w', encoding='utf-8') as target:
+        call_command('dumpdata', *MODELS, stdout=target)
+    return path
+
+
+def _clear():
+    Order.objects.all().delete()
+    Review.objects.all().delete()
+    ServiceType.objects.all().delete()
+    Box.objects.all().delete()
+
+
+@pytest.mark.django_db
+def test_bulk_loaddata_matches_loaddata(dump):
+    original = _snapshot()
+    _clear()
+    call_command('loaddata', str(dump), verbosity=0)
+    via_loaddata = _snapshot()
+    _clear()
+    output = io.StringIO()
+    call_command('bulk_loaddata', str(dump), batch_size=7, stdout=output)
+    assert _snapshot() == via_loaddata
+    # dumpdata округляет время до миллисекунд, поэтому с исходной базой
+    # сравниваются только id.
+    assert [item['pk'] for item in via_loaddata] == [
+        item['pk'] for item in original
+    ]
+    assert 'строк/с' in output.getvalue()
+    created = mixer.blend(
+        'blog.Order',
+        client=Order.objects.first().client,
+        washer=None,
+        car_image=''
+    )
+    assert created.pk > max(item['pk'] for item in original), (
+        'Последовательности id нужно сдвинуть после загрузки.'
+    )
+
+
+@pytest.mark.django_db
+def test_bulk_loaddata_rejects_broken_foreign_keys(tmp_path):
+    path = tmp_path / 'broken.json'
+    path.write_text(json.dumps([{
+        'model': 'blog.box', 'pk': 1,
+        'fields': {'name': 'Бокс', 'capacity': 2, 'is_published': True,
+                   'created_at': '2024-01-01T00:00:00Z',
+                   'updated_at': '2024-01-01T00:00:00Z'},
+    }, {
+        'model': 'blog.boxslot', 'pk': 1,
+        'fields': {'box': 999, 'start': '2024-01-01T00:00:00Z',
+                   'locked_at': None},
+    }]))
+    with pytest.raises(CommandError):
+        call_command('bulk_loaddata', str(path))
+    assert not Box.objects.exists(), 'Загрузка должна откатиться целиком.'
@@ -0,0 +1,96 @@
+from datetime import timedelta
+from io import BytesIO
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, override_settings
+from django.utils import timezone
+from PIL import Image
+
+from blog.images import variant_name
+from blog.models import Order
+from fixtures.orders import (  # noqa:F401
+    box, clear_cache, client_user, service_type)
+
+
+def _photo(size=(1600, 1200)):
+    buffer = BytesIO()
+    Image.new('RGB', size, 'navy').save(buffer, 'JPEG')
+    return SimpleUploadedFile(
+        'car.jpg', buffer.getvalue(), content_type='image/jpeg'
+    )
+
+
+@pytest.fixture
+def media_root(tmp_path):
+    with override_settings(MEDIA_ROOT=tmp_path):
+        yield tmp_path
+
+
+@pytest.fixture
+def order_with_photo(
+        media_root, client_user, service_type, box,
+        django_capture_on_commit_callbacks):
+    client = Client()
+    client.force_login(client_user)
+    with django_capture_on_commit_callbacks(execute=True):
+        client.post('/posts/create/', {
+            'car_model': 'Lada',
+            'car_number': 'A123BC77',
+            'appointment_date': (
+                timezone.localtime() - timedelta(hours=1)
+            ).strftime('%Y-%m-%d %H:%M:%S'),
+            'box': box.pk,
+            'service_type': service_type.pk,
+            'car_image': _photo(),
+        })
+    call_command('run_worker', processes=0, once=True)
+    return Order.objects.get()
+
+
+@pytest.mark.django_db
+def test_variants_created_on_upload(order_with_photo, media_root):
+    name = order_with_photo.car_image.name
+    assert order_with_photo.car_image_widths == [320, 640, 1280]
+    for width in (320, 640, 1280):
+        for extension in ('webp', 'jpeg'):
+            path = media_root / variant_name(name, width, extension)
+            assert path.exists(), f'Нет копии {path.name}'
+    with Image.open(media_root / variant_name(name, 640, 'webp')) as image:
+        assert image.size == (640, 480)
+
+
+@pytest.mark.django_db
+def test_card_uses_srcset(order_with_photo, client):
+    content = client.get('/').content.decode()
+    name = order_with_photo.car_image.name
+    assert 'type="image/webp"' in content
+    assert f'/media/{variant_name(name, 320, "webp")} 320w' in content
+    assert f'src="/media/{variant_name(name, 640, "jpeg")}"' in content
+
+
+@pytest.mark.django_db
+def test_missing_variants_regenerated(order_with_photo, media_root):
+    name = order_with_photo.car_image.name
+    (media_root / variant_name(name, 640, 'webp')).unlink()
+    call_command('regenerate_car_images')
+    assert (media_root / variant_name(name, 640, 'webp')).exists()
+
+
+@pytest.mark.django_db
+def test_card_shows_placeholder_until_processed(
+        media_root, client_user, service_type, box, client,
+        django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        Order.objects.create(
+            car_model='Lada', car_number='A123BC77',
+            appointment_date=timezone.now() - timedelta(hours=1),
+            client=client_user, box=box, service_type=service_type,
+            car_image=SimpleUploadedFile('car.jpg', _photo().read())
+        )
+    assert 'Фото обрабатывается' in client.get('/').content.decode()
+    call_command('run_worker', processes=0, once=True)
+    content = client.get('/').content.decode()
+    assert 'Фото обрабатывается' not in content
+    assert 'image/webp' in content
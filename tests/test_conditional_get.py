@@ -0,0 +1,52 @@
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from mixer.backend.django import mixer
+
+from blog.models import Review
+from fixtures.orders import (  # noqa:F401
+    box, clear_cache, client_user, published_orders, service_type)
+
+
+@pytest.mark.django_db
+def test_post_detail_not_modified(client, published_orders):
+    url = f'/posts/{published_orders[0].id}/'
+    response = client.get(url)
+    assert response.status_code == 200
+    etag = response['ETag']
+    with CaptureQueriesContext(connection) as queries:
+        cached = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert cached.status_code == 304
+    assert len(queries) == 1, (
+        "Для ответа 304 достаточно одного запроса меток изменения."
+    )
+
+    review = mixer.blend(Review, order=published_orders[0], rating=5)
+    assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200
+    etag = client.get(url)['ETag']
+    review.text = 'Исправленный отзыв'
+    review.save()
+    assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+
+@pytest.mark.django_db
+def test_post_detail_etag_is_per_user(
+        client, published_orders, client_user):
+    url = f'/posts/{published_orders[0].id}/'
+    etag = client.get(url)['ETag']
+    author = Client()
+    author.force_login(client_user)
+    assert author.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+
+@pytest.mark.django_db
+def test_hidden_post_still_redirects(client, published_orders):
+    order = published_orders[0]
+    order.appointment_date = timezone.now() + timedelta(days=1)
+    order.save()
+    response = client.get(f'/posts/{order.id}/', HTTP_IF_NONE_MATCH='*')
+    assert response.status_code == 302
@@ -0,0 +1,90 @@
+import csv
+import io
+import json
+from decimal import Decimal
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.urls import reverse
+from django.utils import timezone
+from mixer.backend.django import mixer
+
+from blog.models import Order
+from fixtures.orders import (  # noqa:F401
+    box, clear_cache, client_user, published_orders, service_type)
+
+URL = reverse('blog:export_orders')
+
+
+@pytest.fixture
+def staff_client(client):
+    client.force_login(mixer.blend('auth.User', is_staff=True))
+    return client
+
+
+def _content(response):
+    assert response.streaming, 'Выгрузка должна отдаваться потоком.'
+    return b''.join(response.streaming_content).decode()
+
+
+@pytest.mark.django_db
+def test_csv_export_streams_final_price(staff_client, published_orders):
+    response = staff_client.get(URL)
+    assert response.status_code == 200
+    assert response['Content-Type'].startswith('text/csv')
+    assert 'attachment; filename="orders-' in response['Content-Disposition']
+    rows = list(csv.DictReader(io.StringIO(_content(response))))
+    assert len(rows) == len(published_orders)
+    assert {Decimal(row['final_price']) for row in rows} == {Decimal('900')}
+    dates = [row['appointment_date'] for row in rows]
+    assert dates == sorted(dates)
+
+
+@pytest.mark.django_db
+def test_jsonl_export_filters_by_status_and_date(
+        staff_client, published_orders):
+    Order.objects.update(status='pending')
+    target = published_orders[3]
+    Order.objects.filter(pk=target.pk).update(status='completed')
+    day = timezone.localdate(target.appointment_date).isoformat()
+    response = staff_client.get(URL, {
+        'format': 'jsonl', 'status': 'completed',
+        'date_from': day, 'date_to': day,
+    })
+    assert response['Content-Type'].startswith('application/x-ndjson')
+    lines = _content(response).splitlines()
+    assert [json.loads(line)['id'] for line in lines] == [target.pk]
+    assert json.loads(lines[0])['service'] == target.service_type.title
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('params', (
+    {'format': 'xml'},
+    {'date_from': '2024-13-01'},
+    {'status': 'unknown'},
+))
+def test_export_rejects_bad_parameters(staff_client, params):
+    response = staff_client.get(URL, params)
+    assert response.status_code == 400
+    assert 'error' in response.json()
+
+
+@pytest.mark.django_db
+def test_export_is_staff_only(client, client_user):
+    client.force_login(client_user)
+    response = client.get(URL)
+    assert response.status_code == 302
+
+
+@pytest.mark.django_db
+def test_export_orders_command(tmp_path, published_orders):
+    output = io.StringIO()
+    call_command('export_orders', format='jsonl', chunk_size=7, stdout=output)
+    assert len(output.getvalue().splitlines()) == len(published_orders)
+    path = tmp_path / 'orders.csv'
+    call_command('export_orders', output=str(path), stderr=io.StringIO())
+    with open(path, encoding='utf-8', newline='') as source:
+        assert len(list(csv.DictReader(source))) == len(published_orders)
+    with pytest.raises(CommandError):
+        call_command('export_orders', date_to='вчера')
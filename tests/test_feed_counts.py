@@ -0,0 +1,52 @@
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from mixer.backend.django import mixer
+
+from blog.models import Order
+from blog.paginators import feed_count_key
+from fixtures.orders import (  # noqa:F401
+    box, clear_cache, client_user, published_orders, service_type)
+
+
+def _count_queries(queries):
+    return [q for q in queries if q['sql'].startswith('SELECT COUNT(*)')]
+
+
+@pytest.mark.django_db
+def test_index_count_is_cached(client, published_orders):
+    with CaptureQueriesContext(connection) as first:
+        response = client.get('/')
+    assert response.context['page_obj'].paginator.count == 25
+    assert len(_count_queries(first.captured_queries)) == 1
+    assert cache.get(feed_count_key('index')) == 25
+    with CaptureQueriesContext(connection) as second:
+        client.get('/', {'page': 2})
+    assert not _count_queries(second.captured_queries), (
+        "Повторный запрос ленты не должен выполнять COUNT(*)."
+    )
+
+
+@pytest.mark.django_db
+def test_count_reset_on_order_save_and_delete(
+        client, published_orders, service_type):
+    client.get('/')
+    client.get(f'/category/{service_type.slug}/')
+    order = published_orders[0]
+    client.get(f'/profile/{order.client.username}/')
+    order.delete()
+    for key in (
+        feed_count_key('index'),
+        feed_count_key('category', service_type.pk),
+        feed_count_key('profile', order.client_id),
+    ):
+        assert cache.get(key) is None
+    assert client.get('/').context['page_obj'].paginator.count == 24
+
+    other_service = mixer.blend('blog.ServiceType', is_published=True)
+    client.get(f'/category/{service_type.slug}/')
+    moved = Order.objects.first()
+    moved.service_type = other_service
+    moved.save()
+    assert cache.get(feed_count_key('category', service_type.pk)) is None
@@ -0,0 +1,37 @@
+import pytest
+
+from blog.models import Order
+from fixtures.orders import (  # noqa:F401
+    box, clear_cache, client_user, published_orders, service_type)
+
+
+def _feed_plan(queryset):
+    return queryset.for_cards().order_by(
+        '-appointment_date', '-id'
+    )[:10].explain()
+
+
+@pytest.mark.django_db
+def test_index_feed_uses_published_index(published_orders):
+    plan = _feed_plan(Order.objects.published())
+    assert 'order_published_date_idx' in plan, (
+        f"Лента на главной должна читаться по индексу:\n{plan}"
+    )
+
+
+@pytest.mark.django_db
+def test_category_feed_uses_service_index(published_orders, service_type):
+    plan = _feed_plan(
+        Order.objects.published().filter(service_type=service_type)
+    )
+    assert 'order_service_feed_idx' in plan, (
+        f"Лента услуги должна читаться по индексу услуги:\n{plan}"
+    )
+
+
+@pytest.mark.django_db
+def test_profile_feed_uses_client_index(published_orders, client_user):
+    plan = _feed_plan(Order.objects.filter(client=client_user))
+    assert 'order_client_date_idx' in plan, (
+        f"Лента профиля должна читаться по индексу клиента:\n{plan}"
+    )
@@ -0,0 +1,80 @@
+from decimal import Decimal
+
+import pytest
+from django.urls import reverse
+from mixer.backend.django import mixer
+
+from blog.models import Order
+from fixtures.orders import (  # noqa:F401
+    box, clear_cache, client_user, published_orders, service_type)
+
+PRICES = ('0.00', '0.01', '10.05', '99.99', '1000.00', '1234.57',
+          '99999999.99')
+DISCOUNTS = ('0.00', '0.50', '12.50', '33.33', '50.00', '66.67', '99.99',
+             '100.00')
+
+
+@pytest.fixture
+def priced_orders(client_user, service_type, box):
+    combos = [(price, discount) for price in PRICES for discount in DISCOUNTS]
+    orders = mixer.cycle(len(combos)).blend(
+        'blog.Order',
+        client=client_user,
+        service_type=service_type,
+        box=box,
+        washer=None,
+        car_image='',
+        price=(Decimal(price) for price, _ in combos),
+        discount=(Decimal(discount) for _, discount in combos),
+    )
+    mixer.blend(
+        'blog.Order', client=client_user, washer=None, car_image='',
+        price=None
+    )
+    return orders
+
+
+@pytest.mark.django_db
+def test_sql_final_price_matches_python_to_the_cent(priced_orders):
+    annotated = Order.objects.with_final_price().order_by('pk')
+    assert len(annotated) == len(priced_orders) + 1
+    for order in annotated:
+        assert order.final_price == order.get_final_price(), (
+            f'{order.price} со скидкой {order.discount}%'
+        )
+    assert Order.objects.get(pk=priced_orders[0].pk).get_final_price() == 0
+    assert Decimal('10.05') * Decimal('0.5') == Decimal('5.025')
+    half = Order.objects.with_final_price().get(
+        price=Decimal('10.05'), discount=Decimal('50.00')
+    )
+    assert half.final_price == Decimal('5.03')
+
+
+@pytest.mark.django_db
+def test_total_and_sorting_in_database(
+        priced_orders, django_assert_num_queries):
+    expected = sum(
+        order.get_final_price() for order in Order.objects.all()
+        if order.price is not None
+    )
+    with django_assert_num_queries(1):
+        assert Order.objects.final_price_total() == expected
+    prices = list(Order.objects.with_final_price().exclude(
+        price=None
+    ).order_by('-final_price', 'pk').values_list('final_price', flat=True))
+    assert prices == sorted(prices, reverse=True)
+    assert Order.objects.none().final_price_total() == 0
+
+
+@pytest.mark.django_db
+def test_feed_and_admin_show_final_price(client, admin_client,
+                                         published_orders):
+    response = client.get(reverse('blog:index'))
+    assert 'Цена: 900,00 руб.' in response.content.decode()
+    response = admin_client.get(
+        reverse('admin:blog_order_changelist'), {'o': '-11'}
+    )
+    assert response.status_code == 200
+    assert response.context_data['final_price_total'] == (
+        Decimal('900.00') * len(published_orders)
+    )
@@ -0,0 +1,81 @@
+import base64
+import json
+
+import pytest
+
+from blog.models import Order
+from blog.paginators import KeysetPaginator, decode_cursor
+from fixtures.orders import (  # noqa:F401
+    box, clear_cache, client_user, published_orders, service_type)
+
+
+def _walk_forward(paginator):
+    pages = [paginator.get_page(None)]
+    while pages[-1].has_next():
+        pages.append(paginator.get_page(pages[-1].next_cursor))
+    return pages
+
+
+@pytest.mark.django_db
+def test_keyset_pages_match_offset_order(published_orders):
+    expected = list(
+        Order.objects.order_by('-appointment_date', '-id')
+        .values_list('id', flat=True)
+    )
+    paginator = KeysetPaginator(Order.objects.all(), per_page=10)
+    pages = _walk_forward(paginator)
+    walked = [order.id for page in pages for order in page]
+    assert walked == expected, (
+        "Курсорная пагинация должна выдавать записи в том же порядке, "
+        "что и обычная, без пропусков и повторов."
+    )
+    assert [len(page) for page in pages] == [10, 10, 5]
+    assert not pages[0].has_previous()
+
+
+@pytest.mark.django_db
+def test_keyset_previous_page_returns_same_rows(published_orders):
+    paginator = KeysetPaginator(Order.objects.all(), per_page=10)
+    pages = _walk_forward(paginator)
+    for current, earlier in zip(pages[1:][::-1], pages[:-1][::-1]):
+        back = paginator.get_page(current.previous_cursor)
+        assert [o.id for o in back] == [o.id for o in earlier]
+    first_again = paginator.get_page(pages[1].previous_cursor)
+    assert not first_again.has_previous()
+
+
+@pytest.mark.django_db
+def test_index_accepts_cursor(client, published_orders):
+    response = client.get('/', {'cursor': ''})
+    page_obj = response.context['page_obj']
+    assert page_obj.is_keyset
+    response = client.get('/', {'cursor': page_obj.next_cursor})
+    assert response.status_code == 200
+    assert len(response.context['page_obj']) == 10
+
+
+def test_broken_cursor_is_ignored():
+    assert decode_cursor('not-a-cursor') is None
+    assert decode_cursor('') is None
+
+
+def forged_cursor(date, pk):
+    payload = json.dumps({'d': date, 'i': pk, 'r': 'n'})
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+@pytest.mark.parametrize('date, pk', (
+    ('2024-01-01T10:00:00+00:00', 10 ** 30),
+    ('2024-01-01T10:00:00+00:00', -1),
+    ('2024-01-01T10:00:00', 1),
+))
+def test_forged_cursor_is_ignored(date, pk):
+    assert decode_cursor(forged_cursor(date, pk)) is None
+
+
+@pytest.mark.django_db
+def test_index_with_overflowing_cursor(client, published_orders):
+    cursor = forged_cursor('2024-01-01T10:00:00+00:00', 10 ** 30)
+    response = client.get('/', {'cursor': cursor})
+    assert response.status_code == 200
+    assert not response.context['page_obj'].has_previous()
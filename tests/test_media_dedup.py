@@ -0,0 +1,165 @@
+import hashlib
+from datetime import timedelta
+from io import BytesIO
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, override_settings
+from django.utils import timezone
+from mixer.backend.django import mixer
+from PIL import Image
+
+from blog.images import variant_name
+from blog.models import MediaBlob, Order, Task
+from blog.storage import ContentAddressedStorage, is_content_name
+from fixtures.orders import (  # noqa:F401
+    box, clear_cache, client_user, service_type)
+
+
+def _photo_bytes(color='navy'):
+    buffer = BytesIO()
+    Image.new('RGB', (800, 600), color).save(buffer, 'JPEG')
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def media_root(tmp_path):
+    with override_settings(MEDIA_ROOT=tmp_path):
+        yield tmp_path
+
+
+@pytest.fixture
+def logged_client(client_user):
+    client = Client()
+    client.force_login(client_user)
+    return client
+
+
+@pytest.fixture
+def book(
+        logged_client, media_root, service_type, box,
+        django_capture_on_commit_callbacks):
+    def book(content, hours):
+        with django_capture_on_commit_callbacks(execute=True):
+            logged_client.post('/posts/create/', {
+                'car_model': 'Lada',
+                'car_number': 'A123BC77',
+                'appointment_date': (
+                    timezone.localtime() - timedelta(hours=hours)
+                ).strftime('%Y-%m-%d %H:%M:%S'),
+                'box': box.pk,
+                'service_type': service_type.pk,
+                'car_image': SimpleUploadedFile('car.jpg', content),
+            })
+        with django_capture_on_commit_callbacks(execute=True):
+            call_command('run_worker', processes=0, once=True)
+        return Order.objects.latest('pk')
+    return book
+
+
+@pytest.mark.django_db
+def test_same_photo_stored_once(book, media_root):
+    photo = _photo_bytes()
+    first = book(photo, hours=1)
+    second = book(photo, hours=3)
+    assert is_content_name(first.car_image.name)
+    assert first.car_image.name == second.car_image.name
+    assert len(list((media_root / 'cars').rglob('*.jpg'))) == 1
+    assert MediaBlob.objects.get(replaced_by='').ref_count == 2
+    assert second.car_image_widths == first.car_image_widths, (
+        'Копии уже готового файла не нужно создавать заново.'
+    )
+    assert Task.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_served_photo_keeps_content_address(book, media_root):
+    first = book(_photo_bytes('maroon'), hours=1)
+    served = (media_root / first.car_image.name).read_bytes()
+    digest = hashlib.sha256(served).hexdigest()
+    assert first.car_image.name.endswith(f'/{digest[:2]}/{digest}.jpg'), (
+        'После очистки от EXIF имя файла должно совпадать с его хэшем.'
+    )
+    second = book(served, hours=3)
+    third = book(_photo_bytes('maroon'), hours=5)
+    assert first.car_image.name == second.car_image.name
+    assert third.car_image.name == first.car_image.name, (
+        'Повторная загрузка оригинала должна получить очищенный файл.'
+    )
+    assert len(list((media_root / 'cars').rglob('*.jpg'))) == 1
+    assert MediaBlob.objects.get(replaced_by='').ref_count == 3
+
+
+@pytest.mark.django_db
+def test_storage_save_returns_name_written_concurrently(
+        media_root, monkeypatch):
+    storage = ContentAddressedStorage(location=media_root)
+    photo = _photo_bytes('teal')
+    name = storage.save('cars/car.jpg', BytesIO(photo))
+    real_exists = storage.exists
+    missed = []
+
+    def exists(path):
+        # Первая проверка не видит файл, записанный параллельно.
+        if path == name and not missed:
+            missed.append(path)
+            return False
+        return real_exists(path)
+
+    monkeypatch.setattr(storage, 'exists', exists)
+    assert storage.save('cars/other.jpg', BytesIO(photo)) == name
+    assert [path.name for path in (media_root / 'cars').rglob('*.jpg')] == [
+        name.rsplit('/', 1)[1]
+    ]
+
+
+@pytest.mark.django_db
+def test_delete_frees_file_after_last_reference(
+        book, media_root, logged_client, django_capture_on_commit_callbacks):
+    photo = _photo_bytes()
+    first = book(photo, hours=1)
+    second = book(photo, hours=3)
+    name = first.car_image.name
+    original = media_root / name
+    variant = media_root / variant_name(name, 320, 'webp')
+    with django_capture_on_commit_callbacks(execute=True):
+        logged_client.post(f'/posts/{first.pk}/delete/')
+    assert original.exists() and variant.exists()
+    assert MediaBlob.objects.get(replaced_by='').ref_count == 1
+    with django_capture_on_commit_callbacks(execute=True):
+        logged_client.post(f'/posts/{second.pk}/delete/')
+    assert not original.exists()
+    assert not variant.exists()
+    assert not MediaBlob.objects.exists()
+
+
+@pytest.mark.django_db
+def test_dedup_command_merges_legacy_files(
+        media_root, client_user, service_type, box):
+    photo = _photo_bytes('olive')
+    (media_root / 'cars').mkdir()
+    for name in ('a.jpg', 'b.jpg'):
+        (media_root / 'cars' / name).write_bytes(photo)
+    (media_root / 'cars' / 'a_320w.webp').write_bytes(b'variant')
+    orders = mixer.cycle(2).blend(
+        'blog.Order', client=client_user, service_type=service_type,
+        box=box, car_image='', washer=None
+    )
+    Order.objects.filter(pk=orders[0].pk).update(
+        car_image='cars/a.jpg', car_image_widths=[320]
+    )
+    Order.objects.filter(pk=orders[1].pk).update(car_image='cars/b.jpg')
+    call_command('dedup_car_images')
+    names = set(Order.objects.values_list('car_image', flat=True))
+    assert len(names) == 1
+    name = names.pop()
+    assert is_content_name(name)
+    assert (media_root / name).read_bytes() == photo
+    assert (media_root / variant_name(name, 320, 'webp')).exists()
+    assert not (media_root / 'cars' / 'a.jpg').exists()
+    assert not (media_root / 'cars' / 'b.jpg').exists()
+    blob = MediaBlob.objects.get()
+    assert (blob.name, blob.ref_count, blob.widths) == (name, 2, [320])
+    call_command('dedup_car_images')
+    assert MediaBlob.objects.get().ref_count == 2
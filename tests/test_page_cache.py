@@ -0,0 +1,91 @@
+import threading
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.test.client import RequestFactory
+from mixer.backend.django import mixer
+
+from blog.models import Review
+from blog.page_cache import page_key
+from fixtures.orders import (  # noqa:F401
+    box, clear_cache, client_user, published_orders, service_type)
+
+
+@pytest.mark.django_db
+def test_anonymous_page_served_from_cache(client, published_orders):
+    first = client.get('/')
+    with CaptureQueriesContext(connection) as queries:
+        second = client.get('/')
+    assert second.content == first.content
+    assert not queries.captured_queries, (
+        "Повторный анонимный запрос главной не должен обращаться к базе."
+    )
+
+
+@pytest.mark.django_db
+def test_pages_purged_by_signals(
+        client, published_orders, service_type, client_user):
+    category_url = f'/category/{service_type.slug}/'
+    order = max(published_orders, key=lambda o: (o.appointment_date, o.id))
+    client.get('/')
+    client.get(category_url)
+    mixer.blend(Review, order=order, rating=5)
+    assert 'Отзывы (1)' in client.get('/').content.decode()
+    assert 'Отзывы (1)' in client.get(category_url).content.decode()
+
+    order.car_model = 'Новая модель'
+    order.save()
+    assert 'Новая модель' in client.get(category_url).content.decode()
+
+
+@pytest.mark.django_db
+def test_logged_in_users_bypass_cache(published_orders, client_user):
+    client = Client()
+    client.force_login(client_user)
+    client.get('/')
+    assert client.get('/').context is not None
+
+
+@pytest.mark.django_db
+def test_concurrent_miss_waits_for_regeneration(client, published_orders):
+    key = page_key('index', RequestFactory().get('/'))
+    cache.add(f'{key}:lock', 1)
+
+    def regenerate():
+        cache.set(key, (b'rendered once', 'text/html; charset=utf-8'))
+
+    timer = threading.Timer(0.2, regenerate)
+    timer.start()
+    response = client.get('/')
+    timer.join()
+    assert response.content == b'rendered once'
+
+
+@pytest.mark.django_db
+def test_junk_page_values_are_not_cached(client, published_orders):
+    for value in ('x0', 'x1', '0', '01', '100000'):
+        request = RequestFactory().get('/', {'page': value})
+        assert page_key('index', request) is None
+    cursor = RequestFactory().get('/', {'cursor': 'junk'})
+    assert page_key('index', cursor) is None
+    assert page_key(
+        'index', RequestFactory().get('/', {'page': '1'})
+    ) == page_key('index', RequestFactory().get('/'))
+    cache.clear()
+    for value in ('x0', 'x1', 'x2'):
+        assert client.get('/', {'page': value}).status_code == 200
+    pages = [key for key in cache._cache if 'blog:page:' in key]
+    assert not pages, "Мусорные номера страниц не должны кэшироваться."
+
+
+@pytest.mark.django_db
+def test_waiting_request_keeps_foreign_lock(
+        client, published_orders, settings):
+    settings.BLOG_PAGE_CACHE_LOCK_WAIT = 0.1
+    key = page_key('index', RequestFactory().get('/'))
+    cache.add(f'{key}:lock', 1)
+    assert client.get('/').status_code == 200
+    assert cache.get(f'{key}:lock') == 1
@@ -0,0 +1,131 @@
+import pytest
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+from mixer.backend.django import mixer
+
+from blog.models import Order
+from blog.plates import find_plates, normalize_plate, similarity
+from blog.search import search_orders
+from blog.search_index import ensure_indexes
+from fixtures.orders import (  # noqa:F401
+    box, clear_cache, client_user, published_orders, service_type)
+
+URL = reverse('blog:plate_lookup')
+
+
+@pytest.mark.parametrize('value', (
+    'а123вс77', 'A 123 BC 77', 'A123BC77', 'а-123-ВС 77 RUS', 'A123BC77rus',
+))
+def test_normalize_plate(value):
+    assert normalize_plate(value) == 'A123BC77'
+
+
+def test_similarity():
+    assert similarity('A123BC77', 'A123BC77') == 1
+    assert similarity('A123BC77', 'A128BC77') > 0.3
+    assert similarity('A123BC77', 'X999XX99') == 0
+
+
+@pytest.fixture
+def plates(published_orders):
+    numbers = ('А123ВС77', 'a123bc 777', 'А128ВС77', 'Х999ХХ99')
+    for order, number in zip(published_orders, numbers):
+        order.car_number = number
+        order.save()
+    return published_orders[:len(numbers)]
+
+
+@pytest.fixture
+def staff_client(client):
+    client.force_login(mixer.blend('auth.User', is_staff=True))
+    return client
+
+
+@pytest.mark.django_db
+def test_plate_saved_normalized(plates):
+    assert [order.plate_normalized for order in plates] == [
+        'A123BC77', 'A123BC777', 'A128BC77', 'X999XX99'
+    ]
+    order = plates[0]
+    order.car_number = 'о001оо 01'
+    order.save(update_fields=['car_number'])
+    order.refresh_from_db()
+    assert order.plate_normalized == 'O001OO01'
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('query', ('а123вс77', 'A 123 BC 77'))
+def test_plate_lookup_exact_and_similar(staff_client, plates, query):
+    response = staff_client.get(URL, {'plate': query})
+    data = response.json()
+    assert data['plate'] == 'A123BC77'
+    assert [item['id'] for item in data['exact']] == [
+        plates[0].pk, plates[1].pk
+    ], 'Префикс находит тот же номер с трёхзначным регионом.'
+    assert [item['id'] for item in data['similar']] == [plates[2].pk]
+    assert data['similar'][0]['similarity'] >= 0.3
+
+
+@pytest.mark.django_db
+def test_plate_lookup_without_region_and_errors(staff_client, plates):
+    data = staff_client.get(URL, {'plate': 'а123 вс'}).json()
+    assert {item['id'] for item in data['exact']} == {
+        plates[0].pk, plates[1].pk
+    }
+    assert staff_client.get(URL, {'plate': ' - '}).status_code == 400
+    assert staff_client.get(URL, {'plate': 'а1'}).status_code == 400
+    anonymous = Client()
+    assert anonymous.get(URL, {'plate': 'A123BC77'}).status_code == 302
+
+
+@pytest.mark.django_db
+def test_admin_search_by_plate(admin_client, plates):
+    response = admin_client.get(
+        reverse('admin:blog_order_changelist'), {'q': 'а 123 вс 77'}
+    )
+    found = {order.pk for order in response.context['cl'].result_list}
+    assert found == {plates[0].pk, plates[1].pk}
+
+
+@pytest.mark.django_db
+def test_trigram_index_follows_updates(plates):
+    Order.objects.filter(pk=plates[3].pk).update(plate_normalized='A123BX77')
+    _, exact, similar = find_plates(Order.objects.all(), 'A123BX77')
+    assert [order.pk for order in exact] == [plates[3].pk]
+    assert plates[0].pk in {order.pk for order, _ in similar}
+
+
+@pytest.mark.django_db
+def test_ensure_indexes_restores_dropped_triggers(plates):
+    with connection.cursor() as cursor:
+        cursor.execute('DROP TRIGGER blog_order_search_update')
+        cursor.execute('DROP TRIGGER blog_order_plate_update')
+    Order.objects.filter(pk=plates[3].pk).update(
+        car_number='A123BX77', plate_normalized='A123BX77'
+    )
+    assert sorted(ensure_indexes(connection)) == [
+        'blog_order_plate', 'blog_order_search'
+    ]
+    assert ensure_indexes(connection) == []
+    _, exact, _ = find_plates(Order.objects.all(), 'A123BX77')
+    assert [order.pk for order in exact] == [plates[3].pk]
+    assert list(
+        search_orders(Order.objects.all(), 'a123bx77').values_list(
+            'pk', flat=True)
+    ) == [plates[3].pk]
+
+
+@pytest.mark.django_db
+def test_plate_lookup_caps_exact_matches(
+        staff_client, plates, published_orders, monkeypatch):
+    monkeypatch.setattr('blog.plates.EXACT_LIMIT', 5)
+    Order.objects.filter(pk__in=[o.pk for o in published_orders]).update(
+        plate_normalized='A123BC99'
+    )
+    response = staff_client.get(URL, {'plate': 'A12'})
+    assert len(response.json()['exact']) == 5, (
+        'Короткий префикс не должен выгружать все подходящие записи.'
+    )
+    response = staff_client.get(URL, {'plate': 'A'})
+    assert response.status_code == 400
@@ -0,0 +1,43 @@
+import pytest
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from mixer.backend.django import mixer
+
+from blog.models import Review
+from fixtures.orders import (  # noqa:F401
+    box, clear_cache, client_user, published_orders, service_type)
+
+
+@pytest.mark.django_db
+def test_cached_cards_follow_related_changes(
+        client, published_orders, service_type, box):
+    order = max(published_orders, key=lambda o: (o.appointment_date, o.id))
+    client.get('/')
+
+    service_type.title = 'Полировка фар'
+    service_type.save()
+    assert 'Полировка фар' in client.get('/').content.decode()
+
+    box.name = 'Бокс у ворот'
+    box.save()
+    assert 'Бокс у ворот' in client.get('/').content.decode()
+
+    mixer.blend(Review, order=order, rating=4)
+    assert 'Отзывы (1)' in client.get('/').content.decode()
+
+
+@pytest.mark.django_db
+def test_cached_cards_skip_rendering(published_orders, client_user):
+    client = Client()
+    client.force_login(client_user)
+    first = client.get('/')
+    with CaptureQueriesContext(connection) as queries:
+        second = client.get('/')
+    assert first.content == second.content
+    inner = 'includes/category_link.html'
+    assert inner in [t.name for t in first.templates]
+    assert inner not in [t.name for t in second.templates], (
+        "Неизменившиеся карточки должны браться из кэша без отрисовки."
+    )
+    assert len(queries) <= 4
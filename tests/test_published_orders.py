@@ -0,0 +1,68 @@
+from datetime import timedelta
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from mixer.backend.django import mixer
+
+from blog.models import Order
+from fixtures.orders import (  # noqa:F401
+    box, clear_cache, client_user, published_orders, service_type)
+
+
+@pytest.mark.django_db
+def test_published_filters_hidden_orders(published_orders, client_user):
+    hidden = published_orders[:3]
+    hidden[0].is_published = False
+    hidden[0].save()
+    hidden[1].appointment_date = timezone.now() + timedelta(days=1)
+    hidden[1].save()
+    hidden[2].service_type = mixer.blend(
+        'blog.ServiceType', is_published=False
+    )
+    hidden[2].save()
+    published_ids = set(Order.objects.published().values_list('id', flat=True))
+    assert published_ids == {o.id for o in published_orders[3:]}
+
+    stranger = mixer.blend(get_user_model())
+    assert Order.objects.visible_to(stranger).count() == 22
+    assert Order.objects.visible_to(client_user).count() == 25
+
+
+@pytest.mark.django_db
+def test_order_without_service_type_page_is_public(client, published_orders):
+    order = published_orders[0]
+    Order.objects.filter(pk=order.pk).update(service_type=None)
+    assert order.pk not in set(
+        Order.objects.published().values_list('id', flat=True)
+    ), "В лентах записи без услуги нет, как и раньше."
+    response = client.get(reverse('blog:post_detail', args=[order.pk]))
+    assert response.status_code == 200, (
+        "Страница записи без услуги должна открываться для всех."
+    )
+    Order.objects.filter(pk=order.pk).update(is_published=False)
+    response = client.get(reverse('blog:post_detail', args=[order.pk]))
+    assert response.status_code == 302
+
+
+@pytest.mark.django_db
+def test_cards_skip_large_columns(client, published_orders):
+    with CaptureQueriesContext(connection) as queries:
+        client.get('/')
+    feed_sql = next(
+        q['sql'] for q in queries.captured_queries
+        if 'description_preview' in q['sql']
+    )
+    assert feed_sql.count('"blog_order"."description"') == 1, (
+        "Полный текст примечаний читается только внутри SUBSTR."
+    )
+    assert '"auth_user"."password"' not in feed_sql
+    full_sql = str(Order.objects.select_related(
+        'service_type', 'box', 'client', 'washer'
+    ).query)
+    assert feed_sql.count(',') < full_sql.count(','), (
+        "Лента должна читать меньше колонок, чем полный select_related."
+    )
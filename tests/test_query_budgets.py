@@ -0,0 +1,216 @@
+import logging
+from datetime import timedelta
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.db.models import QuerySet
+from django.template import Context, Template
+from django.urls import reverse
+from django.utils import timezone
+from mixer.backend.django import mixer
+
+from blog import urls as blog_urls
+from blog.query_budget import (
+    QueryBudgetExceeded, capture_queries, query_budget
+)
+from fixtures.orders import (  # noqa:F401
+    box, clear_cache, client_user, published_orders, service_type)
+from fixtures.queries import max_queries  # noqa:F401
+
+REVIEWS = 12
+
+# Сколько запросов к базе может сделать каждое представление blog.urls.
+# Данных в тесте много, поэтому N+1 сразу выходит за бюджет.
+BUDGETS = {
+    'index': 2,
+    'post_detail': 5,
+    'category_posts': 3,
+    'create_post': 4,
+    'free_slots': 4,
+    'edit_post': 6,
+    'delete_post': 5,
+    'profile': 3,
+    'edit_profile': 2,
+    'add_comment': 10,
+    'edit_comment': 5,
+    'delete_comment': 4,
+    'export_orders': 3,
+    'request_metrics': 2,
+    'plate_lookup': 5,
+    'revenue_dashboard': 6,
+    'search': 3,
+    'request_metrics_json': 2,
+}
+
+
+@pytest.fixture
+def scene(client_user, service_type, published_orders):
+    order = published_orders[0]
+    reviews = [
+        mixer.blend(
+            'blog.Review', order=order, author=mixer.blend(
+                get_user_model()
+            ), rating=5
+        )
+        for _ in range(REVIEWS)
+    ]
+    own_review = mixer.blend(
+        'blog.Review', order=order, author=client_user, rating=4
+    )
+    client_user.is_staff = True
+    client_user.save()
+    return {
+        'order': order,
+        'reviews': reviews,
+        'own_review': own_review,
+        'user': client_user,
+        'service_type': service_type,
+    }
+
+
+def requests_for(scene):
+    order = scene['order']
+    review = scene['own_review']
+    tomorrow = (timezone.localdate() + timedelta(days=1)).isoformat()
+    return {
+        'index': ('get', reverse('blog:index'), None, False),
+        'post_detail': (
+            'get', reverse('blog:post_detail', args=[order.pk]), None, True
+        ),
+        'category_posts': (
+            'get',
+            reverse('blog:category_posts', args=[
+                scene['service_type'].slug
+            ]),
+            None,
+            False
+        ),
+        'create_post': ('get', reverse('blog:create_post'), None, True),
+        'free_slots': (
+            'get',
+            reverse('blog:free_slots'),
+            {'service': scene['service_type'].slug, 'date': tomorrow},
+            False
+        ),
+        'edit_post': (
+            'get', reverse('blog:edit_post', args=[order.pk]), None, True
+        ),
+        'delete_post': (
+            'get', reverse('blog:delete_post', args=[order.pk]), None, True
+        ),
+        'profile': (
+            'get',
+            reverse('blog:profile', args=[scene['user'].username]),
+            None,
+            False
+        ),
+        'edit_profile': ('get', reverse('blog:edit_profile'), None, True),
+        'add_comment': (
+            'post',
+            reverse('blog:add_comment', args=[order.pk]),
+            {'text': 'Отлично', 'rating': 5},
+            True
+        ),
+        'edit_comment': (
+            'get',
+            reverse('blog:edit_comment', args=[order.pk, review.pk]),
+            None,
+            True
+        ),
+        'delete_comment': (
+            'get',
+            reverse('blog:delete_comment', args=[order.pk, review.pk]),
+            None,
+            True
+        ),
+        'export_orders': (
+            'get', reverse('blog:export_orders'), {'format': 'csv'}, True
+        ),
+        'request_metrics': (
+            'get', reverse('blog:request_metrics'), None, True
+        ),
+        'request_metrics_json': (
+            'get', reverse('blog:request_metrics_json'), None, True
+        ),
+        'plate_lookup': (
+            'get', reverse('blog:plate_lookup'), {'plate': order.car_number},
+            True
+        ),
+        'revenue_dashboard': (
+            'get', reverse('blog:revenue_dashboard'), None, True
+        ),
+        'search': (
+            'get', reverse('blog:search'), {'q': order.car_model[:5]}, False
+        ),
+    }
+
+
+def test_every_view_has_budget():
+    names = {pattern.name for pattern in blog_urls.urlpatterns}
+    assert names == set(BUDGETS), (
+        'Добавьте бюджет запросов для новых представлений blog.urls.'
+    )
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('name', sorted(BUDGETS))
+def test_view_query_budget(client, scene, max_queries, name):  # noqa:F811
+    method, url, data, login = requests_for(scene)[name]
+    if login:
+        client.force_login(scene['user'])
+    with max_queries(BUDGETS[name]):
+        response = getattr(client, method)(url, data)
+        if response.streaming:
+            b''.join(response.streaming_content)
+    assert response.status_code in (200, 302)
+
+
+@pytest.mark.django_db
+def test_budget_reports_template_origin(client, scene):
+    with pytest.raises(QueryBudgetExceeded) as error:
+        with query_budget(1):
+            client.get(reverse('blog:post_detail', args=[scene['order'].pk]))
+    assert 'Бюджет 1 запросов превышен' in str(error.value)
+    assert '[includes/comments.html:11]' in str(error.value)
+
+
+@pytest.mark.django_db
+def test_repeated_queries_found_with_template_origin(scene):
+    template = Template(
+        '{% for review in reviews %}{{ review.author.username }}{% endfor %}'
+    )
+    with capture_queries() as log:
+        template.render(Context({
+            'reviews': list(scene['order'].reviews.all())
+        }))
+    (sql, count, origins), = log.repeated()
+    assert 'auth_user' in sql
+    assert count == REVIEWS + 1
+    assert origins == ['<unknown source>:1']
+
+
+@pytest.mark.django_db
+def test_debug_detector_logs_n_plus_one(
+        client, scene, caplog, settings, monkeypatch):
+    settings.DEBUG = True
+    monkeypatch.setattr(
+        QuerySet, 'select_related', lambda queryset, *fields: queryset
+    )
+    with caplog.at_level(logging.WARNING, logger='blog.queries'):
+        client.get(reverse('blog:post_detail', args=[scene['order'].pk]))
+    messages = [
+        record.getMessage() for record in caplog.records
+        if 'auth_user' in record.getMessage()
+    ]
+    assert len(messages) == 1, (
+        "N+1 по авторам отзывов должен попасть в лог одним сообщением."
+    )
+    assert messages[0].startswith('blog:post_detail: запрос повторён')
+    assert 'includes/comments.html:15' in messages[0]
+
+
+@pytest.mark.django_db
+def test_debug_detector_silent_without_n_plus_one(client, scene, caplog):
+    with caplog.at_level(logging.WARNING, logger='blog.queries'):
+        client.get(reverse('blog:post_detail', args=[scene['order'].pk]))
+    assert not caplog.records
@@ -0,0 +1,88 @@
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from mixer.backend.django import mixer
+
+from blog.models import RatingSummary, Review
+from fixtures.orders import (  # noqa:F401
+    box, clear_cache, client_user, published_orders, service_type)
+
+
+def _summaries():
+    return sorted(RatingSummary.objects.values_list(
+        'service_type', 'box', 'washer', 'count', 'total',
+        'rating_1', 'rating_2', 'rating_3', 'rating_4', 'rating_5'
+    ), key=str)
+
+
+@pytest.fixture
+def washer():
+    return mixer.blend('auth.User')
+
+
+@pytest.mark.django_db
+def test_reviews_update_summaries(
+        client, client_user, published_orders, service_type, box, washer):
+    order = published_orders[0]
+    order.washer = washer
+    order.save()
+    client.force_login(client_user)
+    url = reverse('blog:add_comment', args=[order.pk])
+    client.post(url, {'text': 'Отлично', 'rating': 5})
+    client.post(url, {'text': 'Неплохо', 'rating': 3})
+    mixer.blend(Review, order=published_orders[1], rating=4)
+    summary = RatingSummary.objects.get(service_type=service_type)
+    assert (summary.count, summary.total, summary.average) == (3, 12, 4)
+    assert [number for _, number, _ in summary.histogram] == [1, 1, 1, 0, 0]
+    assert RatingSummary.objects.get(washer=washer).count == 2
+
+    review = Review.objects.get(order=order, rating=3)
+    client.post(
+        reverse('blog:edit_comment', args=[order.pk, review.pk]),
+        {'text': 'Хорошо', 'rating': 1}
+    )
+    summary = RatingSummary.objects.get(box=box)
+    assert (summary.count, summary.total) == (3, 10)
+    assert (summary.rating_3, summary.rating_1) == (0, 1)
+
+    client.post(reverse('blog:delete_comment', args=[order.pk, review.pk]))
+    summary = RatingSummary.objects.get(washer=washer)
+    assert (summary.count, summary.total, summary.rating_1) == (1, 5, 0)
+
+
+@pytest.mark.django_db
+def test_ratings_move_with_order_and_match_rebuild(published_orders, washer):
+    order = published_orders[0]
+    mixer.cycle(3).blend(
+        Review, order=order, rating=(rating for rating in (2, 4, 5))
+    )
+    mixer.blend(Review, order=published_orders[1], rating=1)
+    other_box = mixer.blend('blog.Box')
+    order.box = other_box
+    order.washer = washer
+    order.save()
+    summary = RatingSummary.objects.get(box=other_box)
+    assert (summary.count, summary.total) == (3, 11)
+    assert RatingSummary.objects.get(washer=washer).count == 3
+    published_orders[2].delete()
+    incremental = _summaries()
+    call_command('rebuild_review_counters')
+    assert _summaries() == [
+        row for row in incremental if row[3]
+    ], 'Пересчёт должен совпасть с инкрементальными сводками.'
+
+
+@pytest.mark.django_db
+def test_category_and_rules_show_average(
+        client, published_orders, service_type, django_assert_num_queries):
+    mixer.cycle(2).blend(
+        Review, order=published_orders[0], rating=(rating for rating in (4, 5))
+    )
+    response = client.get(
+        reverse('blog:category_posts', args=[service_type.slug])
+    )
+    assert 'Средняя оценка: 4,5' in response.content.decode()
+    with django_assert_num_queries(1):
+        response = client.get(reverse('pages:rules'))
+    content = response.content.decode()
+    assert service_type.title in content and '4,5' in content
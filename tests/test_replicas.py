@@ -0,0 +1,117 @@
+from datetime import timedelta
+
+import pytest
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+from mixer.backend.django import mixer
+
+from blog.availability import box_has_room
+from blog.booking import SlotUnavailable, place_order
+from blog.models import Order
+from blog.routers import STICKY_COOKIE, RequestRoute, current_route
+from fixtures.orders import (  # noqa:F401
+    box, clear_cache, client_user, published_orders, service_type)
+
+REPLICA = 'replica'
+
+
+@pytest.fixture
+def replica(tmp_path, settings):
+    """Вторая база SQLite в файле, которая обновляется только явно."""
+    connections.databases[REPLICA] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': str(tmp_path / 'replica.sqlite3'),
+    }
+    settings.BLOG_DATABASE_REPLICAS = [REPLICA]
+    yield REPLICA
+    connections[REPLICA].close()
+    del connections[REPLICA]
+    del connections.databases[REPLICA]
+
+
+def replicate(alias):
+    primary, replica = connections[DEFAULT_DB_ALIAS], connections[alias]
+    primary.ensure_connection()
+    replica.ensure_connection()
+    primary.connection.backup(replica.connection)
+
+
+@pytest.fixture
+def author(client_user):
+    client = Client()
+    client.force_login(client_user)
+    return client
+
+
+@pytest.mark.django_db(transaction=True)
+def test_feed_views_read_from_replica(replica, published_orders):
+    replicate(replica)
+    Order.objects.filter(pk=published_orders[0].pk).delete()
+    url = reverse('blog:post_detail', args=[published_orders[0].pk])
+    assert Client().get(url).status_code == 200
+    sticky = Client()
+    sticky.cookies[STICKY_COOKIE] = '1'
+    assert sticky.get(url).status_code == 404
+
+
+@pytest.mark.django_db(transaction=True)
+def test_author_reads_own_comment(replica, author, published_orders):
+    replicate(replica)
+    url = reverse('blog:post_detail', args=[published_orders[0].pk])
+    response = author.post(
+        reverse('blog:add_comment', args=[published_orders[0].pk]),
+        {'text': 'Свежий отзыв', 'rating': 5}
+    )
+    assert response.cookies[STICKY_COOKIE].value == '1'
+    assert 'Свежий отзыв' in author.get(url).content.decode()
+    assert 'Свежий отзыв' not in Client().get(url).content.decode()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_no_sticky_cookie_without_replicas(author, published_orders):
+    response = author.post(
+        reverse('blog:add_comment', args=[published_orders[0].pk]),
+        {'text': 'Отзыв', 'rating': 5}
+    )
+    assert STICKY_COOKIE not in response.cookies
+
+
+@pytest.mark.django_db(transaction=True)
+def test_booking_checks_room_on_primary(
+        replica, box, service_type, client_user):
+    start = (timezone.now() + timedelta(days=1)).replace(
+        hour=10, minute=0, second=0, microsecond=0
+    )
+    replicate(replica)
+    mixer.cycle(box.capacity).blend(
+        'blog.Order',
+        client=client_user,
+        service_type=service_type,
+        box=box,
+        car_image='',
+        is_published=True,
+        status='pending',
+        appointment_date=start,
+    )
+    route = RequestRoute()
+    route.replica = replica
+    token = current_route.set(route)
+    try:
+        assert box_has_room(box, start, service_type)
+        assert not box_has_room(
+            box, start, service_type, using=DEFAULT_DB_ALIAS
+        )
+        with pytest.raises(SlotUnavailable):
+            place_order(Order(
+                car_model='Lada',
+                car_number='A001BC77',
+                appointment_date=start,
+                client=client_user,
+                box=box,
+                service_type=service_type,
+            ))
+    finally:
+        current_route.reset(token)
+    assert Order.objects.filter(box=box).count() == box.capacity
@@ -0,0 +1,74 @@
+import re
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from mixer.backend.django import mixer
+
+from blog.metrics import buffer, percentiles
+from fixtures.orders import (  # noqa:F401
+    box, clear_cache, client_user, published_orders, service_type)
+
+SERVER_TIMING_RE = re.compile(
+    r'db;dur=[\d.]+;desc="(\d+) queries", tpl;dur=([\d.]+), '
+    r'total;dur=[\d.]+'
+)
+
+
+@pytest.fixture(autouse=True)
+def empty_buffer():
+    buffer.clear()
+    yield
+    buffer.clear()
+
+
+@pytest.fixture
+def staff_client(client):
+    client.force_login(
+        mixer.blend(get_user_model(), is_staff=True, is_active=True)
+    )
+    return client
+
+
+def test_percentiles_nearest_rank():
+    assert percentiles(list(range(1, 101))) == {
+        'p50': 50, 'p95': 95, 'p99': 99
+    }
+    assert percentiles([7]) == {'p50': 7, 'p95': 7, 'p99': 7}
+
+
+@pytest.mark.django_db
+def test_server_timing_header(client, published_orders):
+    response = client.get('/')
+    match = SERVER_TIMING_RE.fullmatch(response['Server-Timing'])
+    assert match, response['Server-Timing']
+    assert int(match.group(1)) > 0
+    assert float(match.group(2)) > 0
+    response = client.get(reverse('pages:rules'))
+    assert SERVER_TIMING_RE.fullmatch(response['Server-Timing'])
+
+
+@pytest.mark.django_db
+def test_metrics_grouped_by_view(staff_client, published_orders):
+    for _ in range(3):
+        staff_client.get('/')
+    staff_client.get(reverse('pages:about'))
+    staff_client.get('/no-such-page/')
+    summary = staff_client.get(
+        reverse('blog:request_metrics_json')
+    ).json()['views']
+    assert summary['blog:index']['count'] == 3
+    assert summary['pages:about']['count'] == 1
+    assert set(summary['blog:index']) == {
+        'count', 'queries', 'sql_ms', 'template_ms', 'total_ms'
+    }
+    assert summary['blog:index']['queries']['p50'] > 0
+    page = staff_client.get(reverse('blog:request_metrics'))
+    assert 'blog:index' in page.content.decode()
+
+
+@pytest.mark.django_db
+def test_metrics_staff_only(client, client_user):
+    client.force_login(client_user)
+    for name in ('blog:request_metrics', 'blog:request_metrics_json'):
+        assert client.get(reverse(name)).status_code == 302
@@ -0,0 +1,127 @@
+import io
+from decimal import Decimal
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.models.signals import post_save
+from django.urls import reverse
+from django.utils import timezone
+from mixer.backend.django import mixer
+
+from blog.models import DailyRevenue, Order
+from fixtures.orders import (  # noqa:F401
+    box, clear_cache, client_user, published_orders, service_type)
+
+
+@pytest.fixture
+def orders(published_orders):
+    Order.objects.update(status='pending')
+    DailyRevenue.objects.all().delete()
+    return published_orders
+
+
+def _rollups():
+    return list(
+        DailyRevenue.objects.exclude(orders=0).order_by('key').values_list(
+            'day', 'service_type', 'box', 'washer', 'orders', 'gross',
+            'discount', 'net'
+        )
+    )
+
+
+def _complete(order, **fields):
+    order.status = 'completed'
+    for name, value in fields.items():
+        setattr(order, name, value)
+    order.save()
+
+
+@pytest.mark.django_db
+def test_rollup_follows_status_changes(orders):
+    assert not DailyRevenue.objects.exists(), (
+        'Незавершённые записи в выручку не входят.'
+    )
+    order = orders[0]
+    _complete(order, price=Decimal('10.05'), discount=Decimal('50'))
+    row = DailyRevenue.objects.get()
+    assert (row.orders, row.gross, row.discount, row.net) == (
+        1, Decimal('10.05'), Decimal('5.02'), Decimal('5.03')
+    )
+    assert row.day == timezone.localdate(order.appointment_date)
+    washer = mixer.blend('auth.User')
+    order.washer = washer
+    order.save()
+    assert DailyRevenue.objects.get(washer=washer).orders == 1
+    assert DailyRevenue.objects.get(washer=None).orders == 0
+    order.status = 'cancelled'
+    order.save()
+    assert not _rollups()
+
+
+@pytest.mark.django_db
+def test_backfill_matches_incremental_rollups(orders):
+    washer = mixer.blend('auth.User')
+    for index, order in enumerate(orders[:12]):
+        _complete(
+            order,
+            washer=washer if index % 2 else None,
+            discount=Decimal(index * 7) / 3,
+        )
+    orders[3].delete()
+    orders[4].status = 'pending'
+    orders[4].save()
+    incremental = _rollups()
+    assert sum(row[4] for row in incremental) == 10
+    DailyRevenue.objects.all().delete()
+    output = io.StringIO()
+    call_command('backfill_revenue', stdout=output)
+    assert _rollups() == incremental
+    assert 'Пересчитаны дни' in output.getvalue()
+    call_command('backfill_revenue', stdout=output)
+    assert _rollups() == incremental, 'Повторный запуск ничего не меняет.'
+
+
+@pytest.mark.django_db
+def test_backfill_resumes_from_day(orders):
+    for order in orders:
+        _complete(order)
+    expected = _rollups()
+    last_day = max(row[0] for row in expected)
+    DailyRevenue.objects.filter(day=last_day).delete()
+    call_command(
+        'backfill_revenue', since=last_day.isoformat(), stdout=io.StringIO()
+    )
+    assert _rollups() == expected
+    with pytest.raises(CommandError):
+        call_command('backfill_revenue', since='завтра')
+
+
+@pytest.mark.django_db
+def test_rollup_rolled_back_with_order(orders):
+    def fail(sender, instance, **kwargs):
+        raise RuntimeError('сбой после обновления сводки')
+
+    post_save.connect(fail, sender=Order)
+    try:
+        with pytest.raises(RuntimeError):
+            _complete(orders[0])
+    finally:
+        post_save.disconnect(fail, sender=Order)
+    assert Order.objects.get(pk=orders[0].pk).status != 'completed'
+    assert not _rollups()
+
+
+@pytest.mark.django_db
+def test_dashboard_reads_rollups(
+        admin_client, orders, service_type, django_assert_max_num_queries):
+    for order in orders[:4]:
+        _complete(order)
+    url = reverse('blog:revenue_dashboard')
+    Order.objects.update(price=0)
+    with django_assert_max_num_queries(6):
+        response = admin_client.get(url)
+    assert response.status_code == 200
+    assert response.context['total']['net_sum'] == Decimal('3600')
+    assert service_type.title in response.content.decode()
+    assert admin_client.get(url, {'date_from': 'вчера'}).status_code == 400
@@ -0,0 +1,49 @@
+import pytest
+from django.core.management import call_command
+from django.test import Client
+from mixer.backend.django import mixer
+
+from blog.models import Order, Review
+from fixtures.orders import (  # noqa:F401
+    box, clear_cache, client_user, published_orders, service_type)
+
+
+@pytest.mark.django_db
+def test_review_views_keep_counters(published_orders, client_user):
+    order = published_orders[0]
+    client = Client()
+    client.force_login(client_user)
+    client.post(
+        f'/posts/{order.id}/comment/', {'text': 'Отлично', 'rating': 5}
+    )
+    client.post(
+        f'/posts/{order.id}/comment/', {'text': 'Неплохо', 'rating': 3}
+    )
+    order.refresh_from_db()
+    assert (order.review_count, order.rating_sum) == (2, 8)
+    assert order.average_rating == 4
+
+    review = Review.objects.filter(order=order, rating=3).get()
+    client.post(
+        f'/posts/{order.id}/edit_comment/{review.id}/',
+        {'text': 'Хорошо', 'rating': 4}
+    )
+    order.refresh_from_db()
+    assert (order.review_count, order.rating_sum) == (2, 9)
+
+    client.post(f'/posts/{order.id}/delete_comment/{review.id}/')
+    order.refresh_from_db()
+    assert (order.review_count, order.rating_sum) == (1, 5)
+
+
+@pytest.mark.django_db
+def test_rebuild_review_counters(published_orders):
+    order = published_orders[0]
+    mixer.cycle(3).blend(Review, order=order, rating=4)
+    Order.objects.update(review_count=0, rating_sum=0)
+    call_command('rebuild_review_counters', batch_size=7)
+    order.refresh_from_db()
+    assert (order.review_count, order.rating_sum) == (3, 12)
+    assert not Order.objects.exclude(pk=order.pk).filter(
+        review_count__gt=0
+    ).exists()
@@ -0,0 +1,115 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from mixer.backend.django import mixer
+
+from blog.models import Order
+from blog.search import search_orders
+from fixtures.orders import (  # noqa:F401
+    box, clear_cache, client_user, published_orders, service_type)
+
+URL = reverse('blog:search')
+
+
+def _found(query):
+    return list(search_orders(Order.objects.all(), query).order_by(
+        '-rank', 'pk'
+    ).values_list('pk', flat=True))
+
+
+@pytest.fixture
+def cars(published_orders):
+    first, second, third = published_orders[:3]
+    Order.objects.filter(pk=first.pk).update(
+        car_model='Тойота Камри', car_number='А123ВС77', description=''
+    )
+    Order.objects.filter(pk=second.pk).update(
+        car_model='Лада Веста', car_number='Е456КХ99',
+        description='Клиент просил помыть тойоту отдельно'
+    )
+    Order.objects.filter(pk=third.pk).update(
+        car_model='Škoda Octavia', car_number='М789ОР50', description=''
+    )
+    return first, second, third
+
+
+@pytest.mark.django_db
+def test_search_index_follows_orders(cars):
+    first, second, third = cars
+    assert _found('тойот') == [first.pk, second.pk], (
+        'Совпадение в модели важнее совпадения в примечаниях.'
+    )
+    assert _found('ТОЙОТА камри') == [first.pk]
+    assert _found('а123') == [first.pk]
+    assert _found('skoda') == [third.pk]
+    first.car_model = 'Ниссан'
+    first.save()
+    assert _found('камри') == []
+    second.delete()
+    assert _found('тойоту') == []
+    assert _found('"*)( -') == [] and _found('') == []
+
+
+@pytest.mark.django_db
+def test_search_view_ranks_and_paginates(client, cars, published_orders):
+    response = client.get(URL, {'q': 'тойот'})
+    assert [post.pk for post in response.context['page_obj']] == [
+        cars[0].pk, cars[1].pk
+    ]
+    Order.objects.filter(pk__in=[o.pk for o in published_orders]).update(
+        description='мойка днища'
+    )
+    response = client.get(URL, {'q': 'днищ'})
+    assert response.status_code == 200
+    page = response.context['page_obj']
+    assert page.paginator.count == len(published_orders)
+    content = response.content.decode()
+    assert 'q=%D0%B4%D0%BD%D0%B8%D1%89&amp;page=2' in content
+
+
+@pytest.mark.django_db
+def test_search_respects_visibility(client, cars):
+    Order.objects.filter(pk=cars[0].pk).update(is_published=False)
+    response = client.get(URL, {'q': 'камри'})
+    assert list(response.context['page_obj']) == []
+
+
+@pytest.mark.django_db
+def test_admin_search_uses_index(admin_client, cars, client_user):
+    url = reverse('admin:blog_order_changelist')
+    response = admin_client.get(url, {'q': 'веста'})
+    assert [order.pk for order in response.context['cl'].result_list] == [
+        cars[1].pk
+    ]
+    other = mixer.blend('auth.User', username='ivanov')
+    mixer.blend(
+        'blog.Order', client=other, washer=None, car_image='',
+        car_model='Audi'
+    )
+    for query in ('ivanov', 'Ivan'):
+        response = admin_client.get(url, {'q': query})
+        result = response.context['cl'].result_list
+        assert [order.client for order in result] == [other]
+
+
+@pytest.mark.django_db
+def test_search_ranks_in_one_index_query(client, published_orders, settings):
+    settings.BLOG_SEARCH_MAX_RESULTS = 10
+    Order.objects.filter(pk__in=[o.pk for o in published_orders]).update(
+        description='синтетическая мойка'
+    )
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(URL, {'q': 'синтетическая'})
+    index_queries = [
+        query['sql'] for query in queries.captured_queries
+        if 'blog_order_search' in query['sql']
+    ]
+    assert len(index_queries) == 1, (
+        'Индекс поиска должен читаться одним запросом на страницу.'
+    )
+    assert 'LIMIT 10' in index_queries[0]
+    assert '"blog_order"."id"' not in index_queries[0], (
+        'Релевантность не должна считаться подзапросом на каждую запись.'
+    )
+    assert response.context['page_obj'].paginator.count == 10
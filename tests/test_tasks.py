@@ -0,0 +1,101 @@
+import sqlite3
+from contextlib import closing
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection, transaction
+
+from blog.models import Task
+from blog.tasks import claim_tasks, enqueue, registry, run_task, task
+
+
+def flaky_task(fail):
+    if fail:
+        raise RuntimeError('сбой')
+
+
+@pytest.fixture(autouse=True)
+def registered_task():
+    task(flaky_task)
+    yield
+    registry.pop('flaky_task', None)
+
+
+@pytest.mark.django_db
+def test_task_claimed_once():
+    Task.objects.create(name='flaky_task', kwargs={'fail': False})
+    first = claim_tasks(10)
+    assert len(first) == 1
+    assert claim_tasks(10) == [], "Задачу нельзя забрать дважды."
+    assert run_task(first[0])
+    assert Task.objects.get().status == Task.DONE
+
+
+@pytest.mark.django_db
+def test_failed_task_retried_then_marked_failed(settings):
+    settings.BLOG_TASK_ATTEMPTS = 2
+    pending = Task.objects.create(name='flaky_task', kwargs={'fail': True})
+    assert not run_task(pending.pk)
+    pending.refresh_from_db()
+    assert pending.status == Task.PENDING
+    assert pending.attempts == 1
+    assert 'RuntimeError' in pending.error
+    assert not run_task(pending.pk)
+    pending.refresh_from_db()
+    assert pending.status == Task.FAILED
+
+
+@pytest.mark.django_db
+def test_worker_drains_queue():
+    Task.objects.bulk_create(
+        Task(name='flaky_task', kwargs={'fail': False}) for _ in range(5)
+    )
+    call_command('run_worker', processes=0, once=True)
+    assert set(Task.objects.values_list('status', flat=True)) == {Task.DONE}
+
+
+@pytest.mark.django_db
+def test_enqueue_creates_task_in_current_transaction():
+    with pytest.raises(RuntimeError):
+        with transaction.atomic():
+            enqueue(flaky_task, fail=False)
+            assert Task.objects.filter(name='flaky_task').exists()
+            raise RuntimeError
+    assert not Task.objects.exists(), (
+        "Задача должна откатываться вместе с транзакцией."
+    )
+
+
+@pytest.mark.django_db
+def test_eager_task_runs_after_commit(
+        settings, django_capture_on_commit_callbacks):
+    settings.BLOG_TASKS_EAGER = True
+    with django_capture_on_commit_callbacks(execute=True) as callbacks:
+        created = enqueue(flaky_task, fail=False)
+        assert Task.objects.get().status == Task.PENDING
+    assert len(callbacks) == 1
+    created.refresh_from_db()
+    assert created.status == Task.DONE
+
+
+@pytest.mark.django_db(transaction=True)
+def test_worker_pool_runs_tasks_in_child_processes(tmp_path, monkeypatch):
+    Task.objects.bulk_create(
+        Task(name='process_car_image', kwargs={'order_id': 0, 'name': ''})
+        for _ in range(3)
+    )
+    database = tmp_path / 'worker.sqlite3'
+    connection.ensure_connection()
+    with sqlite3.connect(database) as copy:
+        connection.connection.backup(copy)
+    monkeypatch.setenv('DJANGO_SETTINGS_MODULE', 'fixtures.worker_settings')
+    monkeypatch.setenv('BLOG_WORKER_DATABASE', str(database))
+    out = StringIO()
+    call_command('run_worker', processes=2, once=True, stdout=out)
+    assert 'Выполнено задач: 3, с ошибкой: 0.' in out.getvalue()
+    with closing(sqlite3.connect(database)) as copy:
+        statuses = {
+            status for status, in copy.execute('SELECT status FROM blog_task')
+        }
+    assert statuses == {Task.DONE}
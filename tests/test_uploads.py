@@ -0,0 +1,140 @@
+import struct
+import zlib
+from datetime import timedelta
+from io import BytesIO
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.files.uploadhandler import StopFutureHandlers
+from django.test import Client, override_settings
+from django.utils import timezone
+from PIL import Image
+
+from blog.models import Order
+from blog.uploads import BoundedImageUploadHandler, RejectedUpload
+from fixtures.orders import (  # noqa:F401
+    box, clear_cache, client_user, service_type)
+
+
+def _png_chunk(kind, data):
+    return (
+        struct.pack('>I', len(data)) + kind + data
+        + struct.pack('>I', zlib.crc32(kind + data))
+    )
+
+
+def _bomb_header(width=100_000, height=100_000):
+    """Заголовок PNG на 10 гигапикселей: несколько десятков байт."""
+    return b'\x89PNG\r\n\x1a\n' + _png_chunk(
+        b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)
+    ) + _png_chunk(b'IDAT', b'')
+
+
+def _photo(size=(800, 600)):
+    buffer = BytesIO()
+    Image.effect_noise(size, 64).convert('RGB').save(buffer, 'JPEG')
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def post_photo(tmp_path, client_user, service_type, box):
+    client = Client()
+    client.force_login(client_user)
+
+    def post(content, name='car.jpg'):
+        with override_settings(MEDIA_ROOT=tmp_path):
+            return client.post('/posts/create/', {
+                'car_model': 'Lada',
+                'car_number': 'A123BC77',
+                'appointment_date': (
+                    timezone.localtime() + timedelta(days=1)
+                ).strftime('%Y-%m-%d 12:00:00'),
+                'box': box.pk,
+                'service_type': service_type.pk,
+                'car_image': SimpleUploadedFile(name, content),
+            })
+    return post
+
+
+def _stream(handler, content, chunk_size=64 * 1024, field='car_image'):
+    try:
+        handler.new_file(field, 'car.png', 'image/png', None)
+    except StopFutureHandlers:
+        pass
+    written = 0
+    for start in range(0, len(content), chunk_size):
+        chunk = handler.receive_data_chunk(
+            content[start:start + chunk_size], start
+        )
+        if chunk is not None:
+            written += len(chunk)
+    return handler.file_complete(len(content)), written
+
+
+def test_bomb_rejected_after_first_chunk():
+    handler = BoundedImageUploadHandler()
+    uploaded, _ = _stream(handler, _bomb_header() + b'\0' * 1024 * 1024)
+    assert isinstance(uploaded, RejectedUpload)
+    assert 'мегапикселей' in uploaded.upload_error
+    assert handler.received == 64 * 1024, (
+        'Файл нужно отклонить по первому куску, не дочитывая его.'
+    )
+    assert handler.file.closed
+
+
+@override_settings(BLOG_UPLOAD_MAX_BYTES=100 * 1024)
+def test_upload_cut_off_past_byte_limit():
+    handler = BoundedImageUploadHandler()
+    uploaded, _ = _stream(handler, _photo(size=(1200, 900)), 32 * 1024)
+    assert isinstance(uploaded, RejectedUpload)
+    assert 'больше' in uploaded.upload_error
+    assert handler.received <= 100 * 1024 + 32 * 1024
+
+
+def test_other_fields_left_to_default_handlers():
+    content = b'not an image' * 10_000
+    uploaded, written = _stream(
+        BoundedImageUploadHandler(), content, field='attachment'
+    )
+    assert uploaded is None
+    assert written == len(content)
+
+
+def test_valid_photo_streamed_to_disk():
+    content = _photo()
+    uploaded, _ = _stream(BoundedImageUploadHandler(), content)
+    assert not isinstance(uploaded, RejectedUpload)
+    assert uploaded.size == len(content)
+    assert uploaded.temporary_file_path()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('content, message', [
+    (_bomb_header(), 'мегапикселей'),
+    (b'GIF89a not really', 'Загрузите фото'),
+    (b'#!/bin/sh\necho hi\n', 'Загрузите фото'),
+])
+def test_form_reports_rejected_upload(post_photo, content, message):
+    response = post_photo(content)
+    assert response.status_code == 200
+    assert message in response.content.decode()
+    assert not Order.objects.exists()
+
+
+@pytest.mark.django_db
+def test_pixel_limit_configurable(post_photo, settings):
+    settings.BLOG_UPLOAD_MAX_PIXELS = 100_000
+    assert 'мегапикселей' in post_photo(_photo()).content.decode()
+    settings.BLOG_UPLOAD_MAX_PIXELS = 1_000_000
+    assert post_photo(_photo()).status_code == 302
+    assert Order.objects.get().car_image
+
+
+@pytest.mark.django_db
+def test_other_file_fields_keep_default_upload(rf):
+    request = rf.post('/', {
+        'attachment': SimpleUploadedFile('notes.txt', b'plain text'),
+    })
+    uploaded = request.FILES['attachment']
+    assert not isinstance(uploaded, RejectedUpload)
+    assert uploaded.read() == b'plain text'